@@ -1,5 +1,36 @@
 import streamlit as st
-from core.security import initialize_session, login, check_session, logout
+from core.security import initialize_session, login, check_session, logout, is_admin
+
+def profiling_panel():
+    """
+    Admin-only sidebar panel: waterfall of the latest profiled rerun and rolling duration percentiles.
+    """
+    import plotly.graph_objects as go
+    from submodules.profiling import current_session_id, rolling_percentiles, run_waterfall
+
+    with st.sidebar.expander("🩺 Profiling", expanded=True):
+        waterfall = run_waterfall(session=current_session_id())
+        if waterfall.empty:
+            waterfall = run_waterfall()
+        if waterfall.empty:
+            st.info("No profiled reruns yet.")
+        else:
+            labels = [f"{i:02d} {'· ' * depth}{name}" for i, (depth, name) in enumerate(zip(waterfall["depth"], waterfall["name"]))]
+            fig = go.Figure(go.Bar(
+                x=waterfall["duration"] * 1000,
+                y=labels,
+                base=waterfall["start_offset"] * 1000,
+                orientation="h",
+                customdata=waterfall[["rows_in", "rows_out", "cache_hits", "cache_misses"]],
+                hovertemplate="%{y}<br>%{x:.1f} ms<br>rows %{customdata[0]} → %{customdata[1]}"
+                              "<br>cache %{customdata[2]} hit / %{customdata[3]} miss<extra></extra>",
+            ))
+            fig.update_layout(title="Latest rerun", xaxis_title="ms since rerun start",
+                              yaxis_autorange="reversed", height=max(250, 22 * len(labels)), margin=dict(l=0, r=0, t=40, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.caption("Rolling percentiles (seconds)")
+        st.dataframe(rolling_percentiles(), use_container_width=True)
 
 def main():
     # Initialize session
@@ -19,5 +50,9 @@ def main():
     st.title("Welcome to the Importer Dashboard!")
     st.write("🔍 Explore your import data and gain insights.")
 
+    # Operational panel for administrators
+    if is_admin() and st.sidebar.checkbox("Show profiling", value=False):
+        profiling_panel()
+
 if __name__ == "__main__":
     main()
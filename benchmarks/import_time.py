@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start import benchmark: each module is imported in a fresh interpreter and the median
+# import time is compared with its budget. Importing a module must also not load any of the
+# heavy, feature-specific dependencies listed for it; they are loaded on first use instead.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_REPEAT = 5
+
+# Seconds; pandas (~0.5 s) and streamlit (~0.5 s) are unavoidable at startup
+IMPORT_BUDGETS = {
+    "submodules": 0.25,
+    "submodules.report_generator": 1.0,
+    "submodules.ml_forecasting": 1.0,
+    "core": 1.0,
+    "market_overview": 2.0,
+    "state_insights": 2.0,
+}
+
+HEAVY_MODULES = ["fpdf", "openpyxl", "sklearn", "statsmodels", "plotly.express"]
+
+# streamlit imports plotly itself, so plotly is only checked for modules that do not import streamlit
+FORBIDDEN_MODULES = {
+    "submodules": HEAVY_MODULES + ["plotly"],
+    "submodules.report_generator": HEAVY_MODULES + ["plotly"],
+    "submodules.ml_forecasting": HEAVY_MODULES + ["plotly"],
+    "core": HEAVY_MODULES + ["plotly"],
+    "market_overview": HEAVY_MODULES,
+    "state_insights": HEAVY_MODULES,
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": sorted(m for m in {forbidden!r} if m in sys.modules)}}))
+"""
+
+def measure_import(module, repeat=IMPORT_REPEAT):
+    """
+    Import a module in `repeat` fresh interpreters.
+
+    Returns:
+        dict: Median and all import times in seconds, and the forbidden modules it loaded.
+    """
+    forbidden = FORBIDDEN_MODULES.get(module, HEAVY_MODULES)
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=forbidden)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(probe["seconds"])
+        loaded.update(probe["loaded"])
+    return {"median_seconds": statistics.median(timings), "seconds": timings, "loaded": sorted(loaded)}
+
+def run_import_benchmark(budgets=IMPORT_BUDGETS, repeat=IMPORT_REPEAT, budget_scale=1.0):
+    """
+    Measure every module in budgets and check it against its budget.
+
+    Returns:
+        list: One result dict per module with a "passed" flag.
+    """
+    results = []
+    for module, budget in budgets.items():
+        measured = measure_import(module, repeat)
+        limit = budget * budget_scale
+        results.append({
+            "module": module,
+            "budget_seconds": limit,
+            **measured,
+            "passed": measured["median_seconds"] <= limit and not measured["loaded"],
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when cold-start import time regresses past its budget.")
+    parser.add_argument("--repeat", type=int, default=IMPORT_REPEAT, help="fresh interpreters per module")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    results = run_import_benchmark(repeat=args.repeat, budget_scale=args.budget_scale)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            status = "ok" if result["passed"] else "FAIL"
+            extra = f" (loaded {', '.join(result['loaded'])})" if result["loaded"] else ""
+            print(f"{status:4} {result['module']:<30} {result['median_seconds']:.3f}s / {result['budget_seconds']:.3f}s{extra}")
+    return 0 if all(result["passed"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
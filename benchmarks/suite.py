@@ -0,0 +1,526 @@
+import argparse
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic_data import DEFAULT_SEED, TIERS, generate_tier
+
+# Benchmark suite for the public functions of core and submodules.
+# Every benchmark runs cold: memoization caches are cleared and it receives a fresh frame object
+# (so per-dataset indexes, cubes and fingerprints are rebuilt); "[hit]" benchmarks instead time a
+# memoized hit after an untimed warm-up (BENCHMARK_SETUP). Each benchmark is timed `repeat`
+# times, then run once more under tracemalloc for its peak traced memory. Results can be written
+# as JSON and compared with a stored baseline; a regression beyond the tolerance fails the run.
+
+BENCHMARK_REPEAT = 3
+REGRESSION_TOLERANCE = 0.20  # Fractional slowdown (or memory growth) allowed against the baseline
+TIME_NOISE_SECONDS = 0.005  # Timing differences below this are never reported
+MEMORY_NOISE_MB = 1.0  # Peak memory differences below this are never reported
+
+# Forecast fits: one batch of (series, months) fitted in-process, and the same batch split across
+# the shared process pool. Measured at 40k / 200k / 1M series x 72 months, the in-process fit
+# takes 0.016 / 0.076 / 0.38s while the pool takes 0.08 / 0.48 / 2.8s (4 blocks); pickling the
+# inputs alone costs 0.036 / 0.18 / 1.2s, more than the fit at every size. There is no batch size
+# above which the pool pays off, so fit_series never uses it.
+FIT_SERIES_SHAPE = (40_000, 72)
+FIT_POOL_BLOCKS = 4
+
+class BenchmarkContext:
+    """
+    Inputs shared by the benchmarks of one tier, prepared once and reused read-only.
+    """
+
+    def __init__(self, tier, seed):
+        import core
+
+        self.tier = tier
+        self.seed = seed
+        self.raw = generate_tier(tier, seed)
+        self.data = core.compact_data(core.preprocess_data(core.map_columns(self.raw, {})))
+        self.store_dir = tempfile.mkdtemp(prefix="benchmark-store-")
+        self._csv = None
+        self._kpis = None
+        self._latest_month = None
+        self._fit_inputs = None
+
+    @property
+    def csv_bytes(self):
+        if self._csv is None:
+            self._csv = self.raw.to_csv(index=False).encode("utf-8")
+        return self._csv
+
+    def upload(self):
+        """
+        The CSV records as an uploaded file object.
+        """
+        file = io.BytesIO(self.csv_bytes)
+        file.name = f"benchmark-{self.tier}.csv"
+        return file
+
+    def fresh(self):
+        """
+        A new frame object over the same columns, with nothing derived or memoized for it.
+        """
+        return self.data.copy(deep=False)
+
+    def stored(self):
+        """
+        Name of the dataset written to the benchmark's encrypted store (written once).
+        """
+        from core import cipher
+        from submodules import encrypted_store
+
+        if "benchmark" not in encrypted_store.list_datasets(self.store_dir):
+            encrypted_store.save_dataset(self.data, "benchmark", cipher, store_dir=self.store_dir)
+        return "benchmark"
+
+    def kpis(self):
+        from submodules.key_metrics import calculate_kpis
+
+        if self._kpis is None:
+            self._kpis = calculate_kpis(self.data)
+        return self._kpis
+
+    def latest_month(self):
+        """
+        (base, delta): the records before the latest month, with filter indexes and cube built,
+        and the latest month's records as the delta to append.
+        """
+        from submodules.filter_index import get_filter_index
+        from submodules.olap_cube import get_cube
+
+        if self._latest_month is None:
+            latest = self.data["Period"] == self.data["Period"].max()
+            base = self.data[~latest].reset_index(drop=True)
+            get_filter_index(base)
+            get_cube(base)
+            self._latest_month = (base, self.data[latest].reset_index(drop=True))
+        return self._latest_month
+
+    def fit_inputs(self):
+        """
+        (values, periods): a seeded FIT_SERIES_SHAPE batch of monthly series to fit.
+        """
+        import numpy as np
+        from submodules.periods import index_to_period
+
+        if self._fit_inputs is None:
+            series, months = FIT_SERIES_SHAPE
+            values = np.random.default_rng(self.seed).lognormal(5, 1, (series, months))
+            self._fit_inputs = (values, index_to_period(np.arange(2018 * 12, 2018 * 12 + months)))
+        return self._fit_inputs
+
+    def close(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+def _top(values):
+    return values.value_counts().index[0]
+
+def _bench_core_parse_quantity(ctx):
+    from core import parse_quantity
+    return parse_quantity(ctx.raw["Quantity"])[0]
+
+def _bench_core_map_columns(ctx):
+    from core import map_columns
+    return map_columns(ctx.raw, {})
+
+def _bench_core_preprocess_data(ctx):
+    from core import preprocess_data
+    return preprocess_data(ctx.raw)
+
+def _bench_core_compact_data(ctx):
+    from core import compact_data, preprocess_data
+    return compact_data(preprocess_data(ctx.raw))
+
+def _bench_core_file_fingerprint(ctx):
+    from core import file_fingerprint
+    return file_fingerprint(ctx.upload(), {})
+
+def _bench_core_load_uploaded_file(ctx):
+    from core import load_uploaded_file
+    return load_uploaded_file(ctx.upload(), {}, use_cache=False)
+
+def _bench_core_get_filtered_data(ctx):
+    from core import get_filtered_data
+    data = ctx.fresh()
+    return get_filtered_data(data, state=[_top(ctx.data["State"])], year=int(ctx.data["Year"].max()))
+
+def _bench_filter_index_build(ctx):
+    from submodules.filter_index import build_filter_index
+    return build_filter_index(ctx.fresh())
+
+def _bench_dataset_fingerprint(ctx):
+    from submodules.dataset_registry import dataset_fingerprint
+    return dataset_fingerprint(ctx.fresh())
+
+def _bench_olap_build_cube(ctx):
+    from submodules.olap_cube import build_cube
+    return build_cube(ctx.fresh())
+
+def _bench_olap_get_filtered_cube(ctx):
+    from submodules.olap_cube import get_filtered_cube
+    return get_filtered_cube(ctx.fresh(), state=[_top(ctx.data["State"])])
+
+def _bench_olap_rollup(ctx):
+    from submodules.olap_cube import rollup
+    return rollup(ctx.fresh(), ["State", "Year"])
+
+def _bench_panel_build(ctx):
+    from submodules.panel import build_panel
+    return build_panel(ctx.fresh(), "Consignee Name").values
+
+def _bench_calculate_kpis(ctx):
+    from submodules.key_metrics import calculate_kpis
+    return calculate_kpis(ctx.fresh())
+
+def _bench_build_growth_panel(ctx):
+    from submodules.growth_metrics import build_growth_panel
+    return build_growth_panel(ctx.fresh(), "Consignee Name").values
+
+def _bench_growth_table(ctx):
+    from submodules.growth_metrics import growth_table
+    return growth_table(ctx.fresh(), "Consignee Name")
+
+def _bench_get_monthly_trends(ctx):
+    from submodules.trends_tools import get_monthly_trends
+    return get_monthly_trends(ctx.fresh())
+
+def _bench_get_yearly_trends(ctx):
+    from submodules.trends_tools import get_yearly_trends
+    return get_yearly_trends(ctx.fresh())
+
+def _bench_get_comparative_trends(ctx):
+    from submodules.trends_tools import get_comparative_trends
+    return get_comparative_trends(ctx.fresh(), "State")
+
+def _bench_plot_state_contributions(ctx):
+    from submodules.state_visuals import plot_state_contributions
+    return plot_state_contributions(ctx.fresh())
+
+def _bench_plot_state_heatmap(ctx):
+    from submodules.state_visuals import plot_state_heatmap
+    return plot_state_heatmap(ctx.fresh())
+
+def _bench_top_k_contributions(ctx):
+    from submodules.contribution_tools import top_k_contributions
+    return top_k_contributions(ctx.fresh(), "Consignee Name")
+
+def _bench_plot_contributions(ctx):
+    from submodules.contribution_tools import plot_contributions
+    return plot_contributions(ctx.fresh(), "Consignee Name")
+
+def _bench_detect_anomalies(ctx):
+    from submodules.anomaly_detection import detect_anomalies
+    return detect_anomalies(ctx.fresh())
+
+def _bench_forecast_table(ctx):
+    from submodules.ml_forecasting import forecast_table
+    return forecast_table(ctx.fresh(), "Consignee Name")
+
+def _bench_fit_series(ctx):
+    from submodules.ml_forecasting import fit_series
+    return fit_series(*ctx.fit_inputs())[0]
+
+def _bench_fit_series_process_pool(ctx):
+    import numpy as np
+    from submodules.ml_forecasting import SEASONAL_MIN_MONTHS, _design_matrix, _fit_block
+    from submodules.periods import period_to_index
+    from submodules.stage_executor import submit_to_process_pool
+
+    values, periods = ctx.fit_inputs()
+    projection = np.linalg.pinv(_design_matrix(period_to_index(periods), len(periods) >= SEASONAL_MIN_MONTHS))
+    futures = [submit_to_process_pool(_fit_block, projection, block) for block in np.array_split(values, FIT_POOL_BLOCKS)]
+    return np.concatenate([future.result() for future in futures])
+
+def _bench_forecast_imports(ctx):
+    from submodules.ml_forecasting import forecast_imports
+    return forecast_imports(ctx.fresh(), "State")
+
+def _warm_forecast_imports(ctx):
+    from submodules.ml_forecasting import forecast_imports
+    forecast_imports(ctx.data, "State")
+
+def _bench_forecast_imports_hit(ctx):
+    # A memoized figure hit: compare with ml_forecasting.forecast_imports, which builds it
+    from submodules.ml_forecasting import forecast_imports
+    return forecast_imports(ctx.data, "State")
+
+def _bench_get_smart_alerts(ctx):
+    from submodules.smart_alerts import get_smart_alerts
+    return get_smart_alerts(ctx.fresh())
+
+def _bench_export_csv_gzip(ctx):
+    from submodules.report_generator import export_data
+    return export_data(ctx.data, "CSV (gzip)")
+
+def _bench_export_parquet(ctx):
+    from submodules.report_generator import export_data
+    return export_data(ctx.data, "Parquet")
+
+def _bench_generate_pdf_report(ctx):
+    from submodules.olap_cube import build_cube
+    from submodules.report_generator import generate_pdf_report
+    return generate_pdf_report(build_cube(ctx.fresh()), ctx.kpis())
+
+def _bench_encrypted_store_save(ctx):
+    from core import cipher
+    from submodules.encrypted_store import save_dataset
+    return save_dataset(ctx.data, "benchmark-save", cipher, store_dir=ctx.store_dir)
+
+def _bench_encrypted_store_open(ctx):
+    from core import cipher
+    from submodules.encrypted_store import open_dataset
+    return open_dataset(ctx.stored(), cipher, store_dir=ctx.store_dir)
+
+def _bench_encrypted_store_open_filtered(ctx):
+    from core import cipher
+    from submodules.encrypted_store import open_dataset
+    filters = {"State": _top(ctx.data["State"]), "Year": int(ctx.data["Year"].max())}
+    return open_dataset(ctx.stored(), cipher, columns=["Quantity", "Consignee Name"], filters=filters, store_dir=ctx.store_dir)
+
+def _bench_publish_shared_dataset(ctx):
+    from submodules.shared_dataset import publish_dataset, release_dataset
+    key = f"benchmark-{time.perf_counter_ns()}"
+    try:
+        return publish_dataset(key, ctx.data, shared_dir=ctx.store_dir)
+    finally:
+        release_dataset(key, shared_dir=ctx.store_dir, remove_file=True)
+
+def _bench_incremental_append(ctx):
+    from submodules.incremental import append_rows, carry_forward
+    base, delta = ctx.latest_month()
+    combined, _, _ = append_rows(base, delta)
+    carry_forward(base, combined)
+    return combined
+
+# Benchmark name -> callable(context); names follow module.function
+BENCHMARKS = {
+    "core.parse_quantity": _bench_core_parse_quantity,
+    "core.map_columns": _bench_core_map_columns,
+    "core.preprocess_data": _bench_core_preprocess_data,
+    "core.compact_data": _bench_core_compact_data,
+    "core.file_fingerprint": _bench_core_file_fingerprint,
+    "core.load_uploaded_file": _bench_core_load_uploaded_file,
+    "core.get_filtered_data": _bench_core_get_filtered_data,
+    "filter_index.build_filter_index": _bench_filter_index_build,
+    "dataset_registry.dataset_fingerprint": _bench_dataset_fingerprint,
+    "olap_cube.build_cube": _bench_olap_build_cube,
+    "olap_cube.get_filtered_cube": _bench_olap_get_filtered_cube,
+    "olap_cube.rollup": _bench_olap_rollup,
+    "panel.build_panel": _bench_panel_build,
+    "key_metrics.calculate_kpis": _bench_calculate_kpis,
+    "growth_metrics.build_growth_panel": _bench_build_growth_panel,
+    "growth_metrics.growth_table": _bench_growth_table,
+    "trends_tools.get_monthly_trends": _bench_get_monthly_trends,
+    "trends_tools.get_yearly_trends": _bench_get_yearly_trends,
+    "trends_tools.get_comparative_trends": _bench_get_comparative_trends,
+    "state_visuals.plot_state_contributions": _bench_plot_state_contributions,
+    "state_visuals.plot_state_heatmap": _bench_plot_state_heatmap,
+    "contribution_tools.top_k_contributions": _bench_top_k_contributions,
+    "contribution_tools.plot_contributions": _bench_plot_contributions,
+    "anomaly_detection.detect_anomalies": _bench_detect_anomalies,
+    "ml_forecasting.forecast_table": _bench_forecast_table,
+    "ml_forecasting.forecast_imports": _bench_forecast_imports,
+    "ml_forecasting.forecast_imports[hit]": _bench_forecast_imports_hit,
+    "ml_forecasting.fit_series": _bench_fit_series,
+    "ml_forecasting.fit_series[process_pool]": _bench_fit_series_process_pool,
+    "smart_alerts.get_smart_alerts": _bench_get_smart_alerts,
+    "report_generator.export_data[csv.gz]": _bench_export_csv_gzip,
+    "report_generator.export_data[parquet]": _bench_export_parquet,
+    "report_generator.generate_pdf_report": _bench_generate_pdf_report,
+    "encrypted_store.save_dataset": _bench_encrypted_store_save,
+    "encrypted_store.open_dataset": _bench_encrypted_store_open,
+    "encrypted_store.open_dataset[filtered]": _bench_encrypted_store_open_filtered,
+    "shared_dataset.publish_dataset": _bench_publish_shared_dataset,
+    "incremental.append_rows": _bench_incremental_append,
+}
+
+# Benchmark name -> callable(context) run untimed before each measurement, after the caches are cleared
+BENCHMARK_SETUP = {
+    "ml_forecasting.forecast_imports[hit]": _warm_forecast_imports,
+}
+
+def clear_caches():
+    """
+    Empty every memoization cache in the submodules so the next call computes from scratch.
+    """
+    from submodules.memo_cache import MemoCache
+
+    for name, module in list(sys.modules.items()):
+        if name.startswith("submodules."):
+            for value in list(vars(module).values()):
+                if isinstance(value, MemoCache):
+                    value.clear()
+
+def _rows_out(result):
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+def run_benchmark(name, ctx, repeat=BENCHMARK_REPEAT):
+    """
+    Time one benchmark cold `repeat` times, then measure its peak traced memory.
+    Its BENCHMARK_SETUP step, if any, runs untimed before each measurement.
+
+    Returns:
+        dict: Timings in seconds, peak memory in MB and the size of the result.
+    """
+    func = BENCHMARKS[name]
+    setup = BENCHMARK_SETUP.get(name, lambda ctx: None)
+    timings = []
+    result = None
+    for _ in range(repeat):
+        clear_caches()
+        setup(ctx)
+        started = time.perf_counter()
+        result = func(ctx)
+        timings.append(time.perf_counter() - started)
+
+    rows_out = _rows_out(result)
+    result = None
+    clear_caches()
+    setup(ctx)
+    tracemalloc.start()
+    try:
+        func(ctx)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": timings,
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "peak_memory_mb": peak / 1024 ** 2,
+        "rows_in": len(ctx.data),
+        "rows_out": rows_out,
+    }
+
+def run_suite(tier="100k", seed=DEFAULT_SEED, repeat=BENCHMARK_REPEAT, names=None, progress=None):
+    """
+    Run the selected benchmarks (all by default) on a synthetic tier.
+
+    Returns:
+        dict: Run metadata and per-benchmark results (failed benchmarks carry an "error").
+    """
+    names = list(BENCHMARKS) if not names else list(names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    ctx = BenchmarkContext(tier, seed)
+    results = {}
+    try:
+        for name in names:
+            try:
+                results[name] = run_benchmark(name, ctx, repeat)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+            if progress is not None:
+                progress(name, results[name])
+    finally:
+        ctx.close()
+        clear_caches()
+
+    return {
+        "tier": tier,
+        "rows": TIERS[tier],
+        "seed": seed,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+def compare_with_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    Compare a run with a baseline run of the same tier.
+
+    Returns:
+        list: One dict per benchmark present in both runs with time and memory ratios and a
+            status of "regressed", "improved" or "ok".
+    """
+    if baseline.get("tier") != report.get("tier"):
+        raise ValueError(f"Baseline tier {baseline.get('tier')} does not match run tier {report.get('tier')}")
+    comparisons = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None or "error" in previous or "error" in current:
+            continue
+        time_ratio = current["median_seconds"] / max(previous["median_seconds"], 1e-9)
+        time_delta = abs(current["median_seconds"] - previous["median_seconds"])
+        memory_delta = current["peak_memory_mb"] - previous["peak_memory_mb"]
+        memory_ratio = current["peak_memory_mb"] / max(previous["peak_memory_mb"], 1e-9)
+        memory_regressed = memory_ratio > 1 + tolerance and memory_delta > MEMORY_NOISE_MB
+        time_changed = time_delta > TIME_NOISE_SECONDS
+        if (time_ratio > 1 + tolerance and time_changed) or memory_regressed:
+            status = "regressed"
+        elif time_ratio < 1 - tolerance and time_changed:
+            status = "improved"
+        else:
+            status = "ok"
+        comparisons.append({
+            "name": name,
+            "baseline_seconds": previous["median_seconds"],
+            "current_seconds": current["median_seconds"],
+            "time_ratio": time_ratio,
+            "baseline_peak_memory_mb": previous["peak_memory_mb"],
+            "current_peak_memory_mb": current["peak_memory_mb"],
+            "memory_ratio": memory_ratio,
+            "status": status,
+        })
+    return comparisons
+
+def _print_result(name, result):
+    if "error" in result:
+        print(f"ERROR {name:<42} {result['error']}")
+    else:
+        print(f"      {name:<42} {result['median_seconds'] * 1000:10.1f} ms {result['peak_memory_mb']:9.1f} MB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time core and submodule functions on synthetic import data.")
+    parser.add_argument("--tier", choices=list(TIERS), default="100k")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmark names to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="baseline JSON to compare against; regressions exit non-zero")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results only")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    report = run_suite(args.tier, args.seed, args.repeat, args.only,
+                       progress=None if args.json else _print_result)
+    failed = any("error" in result for result in report["results"].values())
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["comparison"] = compare_with_baseline(report, json.load(file), args.tolerance)
+        failed = failed or any(item["status"] == "regressed" for item in report["comparison"])
+        if not args.json:
+            for item in report["comparison"]:
+                if item["status"] != "ok":
+                    print(f"{item['status'].upper():9} {item['name']:<42} time x{item['time_ratio']:.2f}, memory x{item['memory_ratio']:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
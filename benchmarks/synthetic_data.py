@@ -0,0 +1,133 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from submodules.periods import MONTH_NAMES
+
+# Seeded synthetic import records shaped like a real upload: Zipf-distributed consignees and
+# exporters, states from states.json, seasonal quantities with yearly growth, and Quantity
+# strings in the mix of units, cases and separators the ingestion parser has to handle.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATES_FILE = os.path.join(REPO_ROOT, "states.json")
+
+TIERS = {
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+DEFAULT_SEED = 42
+FIRST_YEAR = 2019
+YEARS = 6
+ZIPF_EXPONENT = 1.1
+ROWS_PER_CONSIGNEE = 100
+ROWS_PER_EXPORTER = 1_000
+SEASONALITY = 0.35  # Peak-to-mean amplitude of the yearly cycle
+YEARLY_GROWTH = 0.06
+INVALID_QUANTITY_RATE = 0.002
+
+# (unit spelling, kilograms per unit, probability)
+QUANTITY_UNITS = [
+    ("KGS", 1.0, 0.45),
+    ("kg", 1.0, 0.15),
+    ("Kgs.", 1.0, 0.05),
+    ("", 1.0, 0.05),
+    ("MT", 1000.0, 0.12),
+    ("tons", 1000.0, 0.05),
+    ("QTL", 100.0, 0.04),
+    ("LBS", 0.45359237, 0.05),
+    ("GMS", 0.001, 0.04),
+]
+INVALID_QUANTITIES = np.array(["N/A", "-", "TBD", "nil"])
+
+def load_states(path=STATES_FILE):
+    """
+    State codes from states.json.
+    """
+    with open(path) as file:
+        return list(json.load(file))
+
+def zipf_codes(rng, rows, size, exponent=ZIPF_EXPONENT):
+    """
+    Draw rows entity codes in [0, size) with Zipf-distributed popularity (code 0 most frequent).
+    """
+    ranks = np.arange(1, size + 1, dtype=float)
+    weights = ranks ** -exponent
+    return rng.choice(size, size=rows, p=weights / weights.sum()).astype(np.int32)
+
+def _entity_names(prefix, size, suffixes):
+    return np.array([f"{prefix} {i:05d} {suffixes[i % len(suffixes)]}" for i in range(size)], dtype=object)
+
+def _messy_quantities(rng, kilograms):
+    """
+    Render quantities in kilograms as strings with random units, case, thousands separators
+    and padding; a small share is unparseable.
+    """
+    units, factors, weights = zip(*QUANTITY_UNITS)
+    unit_codes = rng.choice(len(units), size=len(kilograms), p=np.array(weights) / sum(weights))
+    amounts = np.round(kilograms / np.array(factors)[unit_codes], 2)
+
+    text = pd.Series(amounts).map("{:.2f}".format).str.rstrip("0").str.rstrip(".")
+    separated = rng.random(len(text)) < 0.3
+    text[separated] = pd.Series(amounts[separated]).map("{:,.2f}".format).to_numpy()
+
+    spaced = np.where(rng.random(len(text)) < 0.8, " ", "")
+    padded = np.where(rng.random(len(text)) < 0.05, "  ", "")
+    values = padded + text.to_numpy(dtype=object) + spaced + np.array(units, dtype=object)[unit_codes]
+
+    invalid = rng.random(len(values)) < INVALID_QUANTITY_RATE
+    values[invalid] = rng.choice(INVALID_QUANTITIES, size=int(invalid.sum()))
+    return values
+
+def generate_import_records(rows, seed=DEFAULT_SEED):
+    """
+    Generate raw import records as they would be uploaded, before mapping and preprocessing.
+
+    Args:
+        rows (int): Number of records.
+        seed (int): Random seed; the same rows and seed always produce the same frame.
+
+    Returns:
+        pd.DataFrame: Quantity (strings), Year, Month (names), State, Consignee Name and
+        Exporter Name, plus the mapped display columns (Consignee, Exporter, Consignee State).
+    """
+    rng = np.random.default_rng(seed)
+    states = np.array(load_states(), dtype=object)
+    consignees = _entity_names("Consignee", max(rows // ROWS_PER_CONSIGNEE, 50), ["Pvt Ltd", "Industries", "Traders", "Exports & Imports"])
+    exporters = _entity_names("Exporter", max(rows // ROWS_PER_EXPORTER, 20), ["Co Ltd", "GmbH", "LLC", "SA"])
+
+    consignee_codes = zipf_codes(rng, rows, len(consignees))
+    exporter_codes = zipf_codes(rng, rows, len(exporters))
+    # Each consignee imports into a home state most of the time
+    home_states = rng.integers(0, len(states), size=len(consignees))
+    state_codes = np.where(rng.random(rows) < 0.85, home_states[consignee_codes], rng.integers(0, len(states), size=rows))
+
+    years = rng.integers(FIRST_YEAR, FIRST_YEAR + YEARS, size=rows)
+    months = rng.integers(1, 13, size=rows)
+    seasonal = 1 + SEASONALITY * np.sin(2 * np.pi * (months - 3) / 12)
+    growth = (1 + YEARLY_GROWTH) ** (years - FIRST_YEAR)
+    kilograms = rng.lognormal(mean=7.0, sigma=1.2, size=rows) * seasonal * growth
+
+    month_names = np.array(MONTH_NAMES, dtype=object)
+    data = pd.DataFrame({
+        "Quantity": _messy_quantities(rng, kilograms),
+        "Year": years,
+        "Month": month_names[months - 1],
+        "State": states[state_codes],
+        "Consignee Name": consignees[consignee_codes],
+        "Exporter Name": exporters[exporter_codes],
+    })
+    data["Consignee"] = data["Consignee Name"]
+    data["Exporter"] = data["Exporter Name"]
+    data["Consignee State"] = data["State"]
+    return data
+
+def generate_tier(tier, seed=DEFAULT_SEED):
+    """
+    Generate the records for a named tier (see TIERS).
+    """
+    if tier not in TIERS:
+        raise ValueError(f"Unknown tier: {tier} (choose from {', '.join(TIERS)})")
+    return generate_import_records(TIERS[tier], seed)
@@ -1,8 +1,22 @@
 import pandas as pd  # Ensure pandas is imported
+import numpy as np
 from cryptography.fernet import Fernet
 import os
 import logging
 import json
+import time
+import hashlib
+import shutil
+import warnings
+from submodules.filter_index import get_filtered_data, get_filter_index
+from submodules.olap_cube import get_cube
+from submodules.periods import month_numbers, period_codes
+from submodules import encrypted_store
+from submodules.shared_dataset import get_shared_dataset, publish_dataset
+from submodules.dataset_registry import dataset_fingerprint
+from submodules.incremental import ROW_KEY_COLUMNS, append_report, append_rows, carry_forward, new_row_mask
+from submodules.profiling import profiled
+from submodules.excel_ingest import read_excel_columns
 
 # Setup Logging
 logging.basicConfig(
@@ -40,7 +54,7 @@ def map_columns(data, mapping):
     Map dataset columns based on user-defined or expected mapping.
     """
     try:
-        data.rename(columns=mapping, inplace=True)
+        data = data.rename(columns=mapping, copy=False)
 
         # Validate required columns
         missing_columns = [col for col in EXPECTED_COLUMNS.values() if col not in data.columns]
@@ -52,48 +66,425 @@ def map_columns(data, mapping):
         logging.error(f"Error in mapping columns: {e}")
         raise ValueError(f"Mapping error: {e}")
 
+# Quantity units normalized to kilograms (an empty unit is read as kilograms)
+UNIT_TO_KG = {
+    "": 1.0,
+    "KG": 1.0,
+    "KGS": 1.0,
+    "KILOGRAM": 1.0,
+    "KILOGRAMS": 1.0,
+    "G": 0.001,
+    "GM": 0.001,
+    "GMS": 0.001,
+    "GRAM": 0.001,
+    "GRAMS": 0.001,
+    "MT": 1000.0,
+    "MTS": 1000.0,
+    "TON": 1000.0,
+    "TONS": 1000.0,
+    "TONNE": 1000.0,
+    "TONNES": 1000.0,
+    "QTL": 100.0,
+    "QUINTAL": 100.0,
+    "QUINTALS": 100.0,
+    "LB": 0.45359237,
+    "LBS": 0.45359237,
+}
+
+# Commas are accepted only as thousands separators (each followed by exactly three digits), so a
+# decimal comma such as "12,5 MT" fails to parse instead of being read as 125
+QUANTITY_PATTERN = r"^\s*([-+]?(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d*\.?\d+))\s*([A-Z]*)\.?\s*$"
+
+def parse_quantity(values):
+    """
+    Parse quantity strings such as "1,200 KGS" or "12.5 MT" into kilograms.
+    Each distinct string is parsed once and broadcast back to the rows. Decimal commas
+    ("12,5 MT", "1.200,5 KG") are ambiguous and counted as failures rather than guessed.
+
+    Returns:
+        tuple: (pd.Series of floats in Kgs, number of non-empty values that failed to parse)
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float), 0
+
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype="string").str.upper()
+    parts = text.str.extract(QUANTITY_PATTERN)
+    amount = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    factor = parts[1].fillna("").map(UNIT_TO_KG)
+    parsed = (amount * factor).to_numpy(dtype=float)
+
+    quantities = pd.Series(parsed[codes], index=values.index, dtype=float)
+    quantities[codes == -1] = float("nan")
+    failed = int(((codes != -1) & pd.isna(quantities).to_numpy()).sum())
+    return quantities, failed
+
+def _parse_date_layout(values):
+    """
+    Parse dates sharing one layout with the format inferred from them. Day/month order is the
+    one that parses more values (e.g. "25/02/2024" settles day first); values the inferred
+    format still rejects are parsed one by one.
+    """
+    best = None
+    for dayfirst in (False, True):
+        with warnings.catch_warnings():
+            # pandas warns when the inferred format contradicts dayfirst; the count decides instead
+            warnings.simplefilter("ignore", UserWarning)
+            parsed = pd.to_datetime(values, errors="coerce", dayfirst=dayfirst)
+        if best is None or parsed.notna().sum() > best[1].notna().sum():
+            best = (dayfirst, parsed)
+        if parsed.notna().all():
+            break
+    dayfirst, parsed = best
+    unparsed = parsed.isna().to_numpy()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(values[unparsed], errors="coerce", format="mixed", dayfirst=dayfirst)
+    return parsed
+
+def parse_dates(values):
+    """
+    Parse a date column once. Values are grouped by layout (digits masked, so "05/02/2024" and
+    "2024-02-05" fall in different groups) and each group's format is inferred separately.
+    Each distinct value is parsed once and broadcast back to the rows.
+
+    Returns:
+        tuple: (pd.Series of datetimes, number of non-empty values that failed to parse)
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, 0
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques)
+    layouts = uniques.astype(str).str.replace(r"\d", "0", regex=True)
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    for positions in layouts.groupby(layouts).indices.values():
+        parsed.iloc[positions] = _parse_date_layout(uniques.iloc[positions].reset_index(drop=True)).to_numpy()
+    dates = pd.Series(parsed.to_numpy()[codes], index=values.index)
+    dates[codes == -1] = pd.NaT
+    failed = int(((codes != -1) & dates.isna().to_numpy()).sum())
+    return dates, failed
+
+@profiled(kind="ingest")
 def preprocess_data(data):
     """
     Preprocess the data by standardizing columns, handling missing values, and generating derived fields.
+    A summary of rows that failed to parse is stored in data.attrs["parse_report"].
     """
     try:
+        data = data.copy(deep=False)  # Replace columns on a shallow copy, never in the caller's frame
+        parse_report = {"rows": len(data), "quantity_failed": 0, "date_failed": 0, "month_failed": 0}
+
         # Process 'Quantity' column
         if 'Quantity' in data.columns:
-            data['Quantity'] = data['Quantity'].str.extract(r'(\d+)').astype(float)
+            data['Quantity'], parse_report["quantity_failed"] = parse_quantity(data['Quantity'])
 
-        # Add derived columns
+        # Add derived columns; Month is kept as a number (1-12) and named only for display
         if 'Date' in data.columns:
-            data['Year'] = pd.to_datetime(data['Date']).dt.year
-            data['Month'] = pd.to_datetime(data['Date']).dt.month_name()
+            dates, parse_report["date_failed"] = parse_dates(data['Date'])
+            data['Year'] = dates.dt.year
+            data['Month'] = dates.dt.month
+        elif 'Month' in data.columns:
+            months = month_numbers(data['Month'])
+            parse_report["month_failed"] = int((data['Month'].notna().to_numpy() & np.isnan(months)).sum())
+            data['Month'] = months
 
+        # Canonical integer time axis (yyyymm, -1 where Year or Month is missing)
+        if 'Year' in data.columns and 'Month' in data.columns:
+            data['Period'] = period_codes(data[['Year', 'Month']])
+
+        if parse_report["quantity_failed"] or parse_report["date_failed"] or parse_report["month_failed"]:
+            logging.warning(
+                f"Rows failed to parse: {parse_report['quantity_failed']} Quantity, "
+                f"{parse_report['date_failed']} Date, {parse_report['month_failed']} Month "
+                f"(of {parse_report['rows']})"
+            )
+        data.attrs["parse_report"] = parse_report
         return data
 
     except Exception as e:
         logging.error(f"Error in preprocessing: {e}")
         raise ValueError(f"Preprocessing error: {e}")
 
-def load_uploaded_file(file, mapping):
+# Columns kept after compaction; dimension columns become categoricals with sorted categories
+DATASET_COLUMNS = ['Quantity', 'Year', 'Month', 'Period', 'State', 'Consignee Name', 'Exporter Name']
+DIMENSION_COLUMNS = ['State', 'Consignee Name', 'Exporter Name', 'Consignee', 'Exporter', 'Consignee State']
+
+@profiled(kind="ingest")
+def compact_data(data):
+    """
+    Shrink the in-memory representation of a preprocessed dataset.
+    Dimension columns become categoricals with a sorted, stable dictionary, Year, Month and Period
+    are downcast to the smallest integer types, Quantity to float32 when that loses no precision,
+    and columns the dashboard does not use are dropped.
+    Before/after memory is stored in data.attrs["memory_report"].
+    """
+    try:
+        bytes_before = int(data.memory_usage(deep=True).sum())
+        keep = [c for c in data.columns if c in DATASET_COLUMNS or c in EXPECTED_COLUMNS.values()]
+        data = data[keep].copy()
+
+        for column in DIMENSION_COLUMNS:
+            if column in data.columns and not isinstance(data[column].dtype, pd.CategoricalDtype):
+                values = data[column]
+                if not pd.api.types.is_string_dtype(values):  # Names read as numbers stay text
+                    values = values.astype(str).where(values.notna())
+                categories = pd.Index(values.dropna().unique()).sort_values()
+                data[column] = pd.Categorical(values, categories=categories)
+
+        for column in ('Year', 'Month', 'Period'):
+            if column in data.columns and pd.api.types.is_numeric_dtype(data[column]) and not data[column].isna().any():
+                data[column] = pd.to_numeric(data[column], downcast='integer')
+
+        if 'Quantity' in data.columns and data['Quantity'].dtype == np.float64:
+            narrowed = data['Quantity'].astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), data['Quantity'].to_numpy(), equal_nan=True):
+                data['Quantity'] = narrowed
+
+        bytes_after = int(data.memory_usage(deep=True).sum())
+        data.attrs["memory_report"] = {"bytes_before": bytes_before, "bytes_after": bytes_after}
+        logging.info(f"Compacted dataset from {bytes_before / 1024 ** 2:,.1f} MB to {bytes_after / 1024 ** 2:,.1f} MB")
+        return data
+
+    except Exception as e:
+        logging.error(f"Error compacting data: {e}")
+        raise ValueError(f"Compaction error: {e}")
+
+# Ingestion Cache (preprocessed frames stored as Parquet, keyed on content hash + mapping)
+INGEST_CACHE_DIR = ".ingest_cache"
+INGEST_CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+INGEST_CACHE_MAX_AGE = 30 * 24 * 3600  # 30 days
+INGEST_CACHE_VERSION = 2  # Bump when the preprocessed layout changes so old entries are not reused
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+def file_fingerprint(file, mapping):
+    """
+    Hash the uploaded file content together with the column mapping.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    digest.update(json.dumps({"mapping": mapping, "version": INGEST_CACHE_VERSION}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def _ingest_cache_path(key):
+    return os.path.join(INGEST_CACHE_DIR, f"{key}.parquet")
+
+def read_ingest_cache(key):
+    """
+    Return the cached preprocessed frame for the given key, or None on a miss.
+    """
+    path = _ingest_cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        data = pd.read_parquet(path)
+        os.utime(path)  # Refresh age so frequently used entries survive eviction
+        logging.info(f"Ingestion cache hit: {key}")
+        return data
+    except Exception as e:
+        logging.error(f"Error reading ingestion cache {key}: {e}")
+        return None
+
+def write_ingest_cache(key, data):
+    """
+    Write a preprocessed frame to the ingestion cache and evict old entries.
+    """
+    try:
+        os.makedirs(INGEST_CACHE_DIR, exist_ok=True)
+        path = _ingest_cache_path(key)
+        tmp_path = f"{path}.tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        logging.info(f"Ingestion cache write: {key}")
+        evict_ingest_cache()
+    except Exception as e:
+        logging.error(f"Error writing ingestion cache {key}: {e}")
+
+def evict_ingest_cache(max_bytes=INGEST_CACHE_MAX_BYTES, max_age=INGEST_CACHE_MAX_AGE):
+    """
+    Remove cache entries older than max_age, then the least recently used ones until under max_bytes.
+    """
+    if not os.path.isdir(INGEST_CACHE_DIR):
+        return []
+    # Per-sheet Excel caches are no longer written; drop any left from older versions
+    shutil.rmtree(os.path.join(INGEST_CACHE_DIR, "excel"), ignore_errors=True)
+    entries = []
+    for name in os.listdir(INGEST_CACHE_DIR):
+        if name.endswith(".parquet"):
+            stat = os.stat(os.path.join(INGEST_CACHE_DIR, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    now = time.time()
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    evicted = []
+    for mtime, size, name in entries:
+        if now - mtime <= max_age and total_bytes <= max_bytes:
+            continue
+        try:
+            os.remove(os.path.join(INGEST_CACHE_DIR, name))
+            total_bytes -= size
+            evicted.append(name)
+        except OSError as e:
+            logging.error(f"Error evicting ingestion cache entry {name}: {e}")
+    if evicted:
+        logging.info(f"Ingestion cache evicted {len(evicted)} entries")
+    return evicted
+
+# Source columns the pipeline can use; Excel ingestion reads only these and the mapped ones
+INGEST_COLUMNS = set(EXPECTED_COLUMNS) | set(EXPECTED_COLUMNS.values()) | {"Date"}
+
+def read_uploaded_file(file, mapping, progress=None):
+    """
+    Read an uploaded CSV or Excel file, then map, preprocess and compact it.
+    `progress(fraction, message)` is called while reading (fractions 0 to 0.8).
+    """
+    progress = progress or (lambda fraction, message: None)
+    if file.name.endswith(".csv"):
+        progress(0.0, "Reading CSV")
+        data = pd.read_csv(file)
+    elif file.name.endswith(".xlsx"):
+        # Only sheets with every column the mapping needs are loaded (summary sheets are skipped)
+        required = {next((source for source, target in mapping.items() if target == column), column)
+                    for column in EXPECTED_COLUMNS.values()}
+        data = read_excel_columns(
+            file, INGEST_COLUMNS | set(mapping), required=required,
+            progress=lambda fraction, message: progress(0.8 * fraction, message),
+        )
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+    progress(0.8, "Preprocessing")
+
+    # Apply column mapping
+    data = map_columns(data, mapping)
+
+    # Preprocess and compact data
+    return compact_data(preprocess_data(data))
+
+@profiled(kind="ingest")
+def load_uploaded_file(file, mapping, use_cache=True, progress=None):
     """
     Load and preprocess data from an uploaded file (CSV or Excel) with column mapping.
+    Preprocessed results are cached on disk by file content and mapping, and the
+    filter indexes and aggregate cube are built before the data is returned.
+    Excel workbooks are streamed in read-only mode, reading only the mapped columns, with
+    sheets parsed in parallel. `progress(fraction, message)` is called
+    as loading advances.
+    With use_cache, the result is the read-only shared instance every session loading the
+    same file and mapping receives, so it must not be modified.
     """
     try:
-        if file.name.endswith(".csv"):
-            data = pd.read_csv(file)
-        elif file.name.endswith(".xlsx"):
-            data = pd.read_excel(file)
-        else:
-            raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+        progress = progress or (lambda fraction, message: None)
+        cache_key = None
+        if use_cache:
+            cache_key = file_fingerprint(file, mapping)
+            shared = get_shared_dataset(cache_key)
+            if shared is not None:
+                get_filter_index(shared)
+                get_cube(shared)
+                return shared
+            cached = read_ingest_cache(cache_key)
+            if cached is not None:
+                cached = publish_dataset(cache_key, cached)
+                get_filter_index(cached)
+                get_cube(cached)
+                return cached
 
-        # Apply column mapping
-        data = map_columns(data, mapping)
+        data = read_uploaded_file(file, mapping, progress=progress)
 
-        # Preprocess data
-        return preprocess_data(data)
+        if cache_key is not None:
+            write_ingest_cache(cache_key, data)
+            data = publish_dataset(cache_key, data)
+
+        # Build filter indexes and the aggregate cube once so sidebar changes never rescan rows
+        progress(0.9, "Building indexes")
+        get_filter_index(data)
+        get_cube(data)
+        progress(1.0, "Loaded")
+        return data
 
     except Exception as e:
         logging.error(f"Error loading file: {e}")
         raise ValueError(f"Error loading file: {e}")
 
+@profiled(kind="ingest")
+def append_uploaded_file(file, mapping, base=None, name=None, progress=None):
+    """
+    Append a delta file (e.g. the latest month of customs records) to a loaded dataset and/or
+    a dataset in the encrypted store. Rows whose hashed row key already exists in the periods
+    the delta covers are skipped. For a loaded dataset, the filter indexes, aggregate cube and
+    memoized panels and growth figures are extended for the touched periods and entities
+    instead of being rebuilt; a shared read-only dataset is republished with the new rows.
+
+    Returns:
+        tuple: (dataset with the new rows, append report)
+    """
+    try:
+        if base is None and name is None:
+            raise ValueError("Nothing to append to: pass a loaded dataset or a stored dataset name.")
+        progress = progress or (lambda fraction, message: None)
+        delta = read_uploaded_file(file, mapping,
+                                   progress=lambda fraction, message: progress(0.6 * fraction, message))
+
+        report = None
+        if name is not None:
+            progress(0.6, "Checking stored records")
+            stored_columns = encrypted_store.read_manifest(name, cipher)["columns"]
+            filters = {"Period": np.unique(delta["Period"]).tolist()} if "Period" in stored_columns else None
+            existing = encrypted_store.open_dataset(
+                name, cipher, columns=[c for c in ROW_KEY_COLUMNS if c in stored_columns], filters=filters,
+            )
+            fresh = delta[new_row_mask(existing, delta)]
+            encrypted_store.append_dataset(fresh, name, cipher)
+            report = append_report(delta, fresh)
+
+        if base is None:
+            progress(0.9, "Opening dataset")
+            data = open_dataset(name)
+            progress(1.0, "Appended")
+            return data, report
+
+        progress(0.8, "Appending rows")
+        data, appended, base_report = append_rows(base, delta)
+        if data is not base:
+            base_key = dataset_fingerprint(base)
+            if get_shared_dataset(base_key) is base:
+                key = hashlib.sha256(f"{base_key}:{dataset_fingerprint(appended)}".encode()).hexdigest()
+                data = publish_dataset(key, data)
+            progress(0.9, "Updating indexes")
+            carry_forward(base, data)
+        progress(1.0, "Appended")
+        return data, report or base_report
+
+    except Exception as e:
+        logging.error(f"Error appending file: {e}")
+        raise ValueError(f"Error appending file: {e}")
+
+def save_dataset(data, name):
+    """
+    Persist a loaded dataset in the encrypted store (each column chunk encrypted with the dashboard key).
+    """
+    return encrypted_store.save_dataset(data, name, cipher)
+
+def open_dataset(name, columns=None, filters=None):
+    """
+    Open a dataset from the encrypted store, decrypting only the columns and row groups
+    the filters can match. Full opens also build the filter indexes and aggregate cube.
+    """
+    data = encrypted_store.open_dataset(name, cipher, columns=columns, filters=filters)
+    if columns is None and not filters:
+        get_filter_index(data)
+        get_cube(data)
+    return data
+
+def list_datasets():
+    """
+    Names of the datasets in the encrypted store.
+    """
+    return encrypted_store.list_datasets()
+
 def dynamic_column_mapping_ui(data):
     """
     UI logic for dynamic column mapping using Streamlit.
@@ -8,6 +8,9 @@ CREDENTIALS = {
     "password_hash": sha256("adminpass".encode()).hexdigest()  # Replace 'adminpass' with your desired password
 }
 
+# Users who can see operational panels (profiling)
+ADMIN_USERS = {CREDENTIALS["username"]}
+
 # Session Timeout in Seconds
 SESSION_TIMEOUT = 600  # 10 minutes
 
@@ -27,6 +30,13 @@ def initialize_session():
     if "authenticated" not in st.session_state:
         st.session_state.authenticated = False
         st.session_state.start_time = None
+        st.session_state.username = None
+
+def is_admin():
+    """
+    Whether the logged-in user is an administrator.
+    """
+    return bool(st.session_state.get("authenticated")) and st.session_state.get("username") in ADMIN_USERS
 
 def login():
     """
@@ -42,6 +52,7 @@ def login():
         if authenticate_user(username, password):
             st.session_state.authenticated = True
             st.session_state.start_time = time.time()
+            st.session_state.username = username
             st.success("Login successful!")
             st.experimental_rerun()
         else:
@@ -65,5 +76,6 @@ def logout():
     """
     st.session_state.authenticated = False
     st.session_state.start_time = None
+    st.session_state.username = None
     st.success("You have been logged out.")
     st.experimental_rerun()
@@ -1,16 +1,259 @@
+import uuid
 import streamlit as st
+import pandas as pd
 from submodules.key_metrics import calculate_kpis
+from submodules.growth_metrics import growth_table
 from submodules.trends_tools import get_monthly_trends, get_yearly_trends, get_comparative_trends
 from submodules.state_visuals import plot_state_contributions, plot_state_heatmap
-from submodules.contribution_tools import plot_contributions
-from submodules.anomaly_detection import detect_anomalies
-from submodules.report_generator import generate_pdf_report, download_csv
-from submodules.growth_metrics import calculate_growth_metrics
-from submodules.smart_alerts import get_smart_alerts
-from submodules.ml_forecasting import forecast_imports
+from submodules.contribution_tools import TOP_K, plot_contributions, top_k_contributions
+from submodules.anomaly_detection import anomaly_model_key, detect_anomalies
+from submodules.report_generator import EXPORT_FORMATS, export_data, get_report_job, submit_report_job
+from submodules.dataset_registry import dataset_fingerprint
+from submodules.smart_alerts import ALERTS_PAGE_SIZE, get_smart_alerts, page_alerts, sort_alerts, summarize_alerts
+from submodules.ml_forecasting import forecast_imports, forecast_table
+from submodules.periods import month_label, period_labels
+from submodules.olap_cube import get_filtered_cube
+from submodules.stage_executor import STAGE_TIMEOUT_SECONDS, run_stages, timings_table
+from submodules.profiling import current_session_id, profile_run, profile_span, profiled
 from core import get_filtered_data
 
+def filter_options(values):
+    """
+    Sidebar options for a filter column; categorical columns reuse their categories
+    (sorted here, as appends to a stored dataset add categories at the end).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return sorted(values.cat.categories.tolist(), key=str)
+    return sorted(values.dropna().unique().tolist())
+
+GROWTH_LEVELS = {
+    "Importer": 'Consignee Name',
+    "Exporter": 'Exporter Name',
+    "State": 'State',
+}
+GROWTH_ROWS_SHOWN = 100
+
+def _key_metric_controls():
+    level = st.selectbox("Growth by", options=list(GROWTH_LEVELS), key="growth_level")
+    return {"growth_entity": GROWTH_LEVELS[level]}
+
+def _compute_key_metrics(context):
+    return {
+        "metrics": calculate_kpis(context["cube"]),
+        "growth": growth_table(context["cube"], context["growth_entity"]),
+    }
+
+def _render_key_metrics(results):
+    metrics = results["metrics"]
+
+    # Display metrics
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Imports (Kgs)", f"{metrics.total_imports:,.0f}")
+    col2.metric("Total Shipments", f"{metrics.total_shipments}")
+    col3.metric("YoY Growth", f"{metrics.yoy_growth:.2f}%", delta_color="normal")
+    st.metric("MoM Growth", f"{metrics.mom_growth:.2f}%")
+    st.metric("Top Importer", metrics.top_importer)
+    st.metric("Top Exporter", metrics.top_exporter)
+
+    st.markdown("### Growth by Entity")
+    st.dataframe(results["growth"].head(GROWTH_ROWS_SHOWN), use_container_width=True)
+
+def _compute_trends(context):
+    return {
+        "monthly": get_monthly_trends(context["cube"]),
+        "yearly": get_yearly_trends(context["cube"]),
+        "comparison": get_comparative_trends(context["cube"], comparison_column="Year"),
+    }
+
+def _render_trends(results):
+    st.plotly_chart(results["monthly"], use_container_width=True)
+    st.plotly_chart(results["yearly"], use_container_width=True)
+    st.plotly_chart(results["comparison"], use_container_width=True)
+
+def _compute_state_contributions(context):
+    return {
+        "contributions": plot_state_contributions(context["cube"]),
+        "heatmap": plot_state_heatmap(context["cube"]),
+    }
+
+def _render_state_contributions(results):
+    st.plotly_chart(results["contributions"], use_container_width=True)
+    st.markdown("### State Heatmap")
+    st.plotly_chart(results["heatmap"], use_container_width=True)
+
+def _contribution_controls():
+    return {"top_k": st.slider("Number of top contributors", min_value=5, max_value=50, value=TOP_K, step=5)}
+
+def _compute_contributions(context):
+    cube, top_k = context["cube"], context["top_k"]
+    return {
+        "importer_chart": plot_contributions(cube, 'Consignee Name', k=top_k),
+        "importer_table": top_k_contributions(cube, 'Consignee Name', k=top_k),
+        "exporter_chart": plot_contributions(cube, 'Exporter Name', k=top_k),
+        "exporter_table": top_k_contributions(cube, 'Exporter Name', k=top_k),
+    }
+
+def _render_contributions(results):
+    st.markdown("### Top Importers")
+    st.plotly_chart(results["importer_chart"], use_container_width=True)
+    st.dataframe(results["importer_table"], use_container_width=True)
+
+    st.markdown("### Top Exporters")
+    st.plotly_chart(results["exporter_chart"], use_container_width=True)
+    st.dataframe(results["exporter_table"], use_container_width=True)
+
+def _compute_smart_alerts(context):
+    return {
+        "alerts": get_smart_alerts(context["cube"], months=context["months"], years=context["years"]),
+        "anomalies": detect_anomalies(context["cube"], 'Consignee Name',
+                                      model_key=anomaly_model_key(context["cube"], 'Consignee Name')),
+    }
+
+def _render_smart_alerts(results):
+    alerts = results["alerts"]
+    if alerts.empty:
+        st.success("No critical alerts!")
+    else:
+        for message in summarize_alerts(alerts):
+            st.warning(message)
+
+        col1, col2, col3 = st.columns(3)
+        rules = col1.multiselect("Rules", options=alerts['Rule'].unique().tolist(), placeholder="All")
+        order = col2.selectbox("Sort by", options=["Period", "Magnitude"])
+        selected = alerts[alerts['Rule'].isin(rules)] if rules else alerts
+        selected = sort_alerts(selected, by=order)
+        pages = max(1, -(-len(selected) // ALERTS_PAGE_SIZE))
+        page = col3.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        page_data, _ = page_alerts(selected, page=page)
+        st.dataframe(page_data, use_container_width=True)
+        st.caption(f"{len(selected):,} alerts, page {page} of {pages}")
+
+    st.markdown("### Anomalous Months by Importer")
+    anomalies = results["anomalies"]
+    if anomalies.empty:
+        st.success("No anomalous months detected.")
+    else:
+        st.dataframe(anomalies.head(ANOMALY_ROWS_SHOWN), use_container_width=True)
+
+FORECAST_LEVELS = {
+    "Total": None,
+    "Importer": 'Consignee Name',
+    "Exporter": 'Exporter Name',
+    "State": 'State',
+}
+
+def _forecast_controls():
+    level = st.selectbox("Forecast level", options=list(FORECAST_LEVELS), key="forecast_level")
+    return {"forecast_entity": FORECAST_LEVELS[level]}
+
+def _compute_forecasting(context):
+    entity_column = context["forecast_entity"]
+    table = forecast_table(context["cube"], entity_column)
+    return {
+        "forecast": forecast_imports(context["cube"], entity_column),
+        "table": table.set_axis(period_labels(table.columns), axis=1),
+    }
+
+def _render_forecasting(results):
+    st.plotly_chart(results["forecast"], use_container_width=True)
+    st.dataframe(results["table"], use_container_width=True)
+
+ANOMALY_ROWS_SHOWN = 100
+
+# Dashboard sections: (label, error name, controls, compute, render, expensive)
+# Only the selected section is computed (on the stage executor); expensive ones show a
+# placeholder while they run.
+SECTIONS = [
+    ("📌 Key Metrics", "Key Metrics", _key_metric_controls, _compute_key_metrics, _render_key_metrics, False),
+    ("📈 Trends", "Trends", None, _compute_trends, _render_trends, False),
+    ("🌍 State Contributions", "State Contributions", None, _compute_state_contributions, _render_state_contributions, False),
+    ("👥 Importer/Exporter Contributions", "Importer/Exporter Contributions", _contribution_controls, _compute_contributions, _render_contributions, False),
+    ("🚨 Smart Alerts", "Smart Alerts", None, _compute_smart_alerts, _render_smart_alerts, True),
+    ("🔮 AI Forecasting", "AI Forecasting", _forecast_controls, _compute_forecasting, _render_forecasting, True),
+]
+
+def _profiled_compute(section):
+    return profiled(section[3], name=f"{section[1]}: compute", kind="tab")
+
+def _render_result(section, result):
+    label, error_name, _, _, render, _ = section
+    if result.timed_out:
+        st.warning(f"{error_name} is taking longer than {STAGE_TIMEOUT_SECONDS}s; it will appear on the next rerun once finished.")
+    elif result.error is not None:
+        st.error(f"Error processing {error_name}: {result.error}")
+    else:
+        try:
+            with profile_span(f"{error_name}: render", kind="tab"):
+                render(result.value)
+        except Exception as e:
+            st.error(f"Error processing {error_name}: {e}")
+
+def _stage_key(error_name, context):
+    """
+    Key of a section computed on a context: frames by content, everything else by value.
+    """
+    return (error_name, tuple(sorted(
+        (name, dataset_fingerprint(value) if isinstance(value, pd.DataFrame) else repr(value))
+        for name, value in context.items()
+    )))
+
+def _run_section(section, context):
+    label, error_name, controls, compute, _, expensive = section
+    st.subheader(label)
+    try:
+        if controls is not None:
+            context = {**context, **controls()}
+    except Exception as e:
+        st.error(f"Error processing {error_name}: {e}")
+        return {}
+
+    stages = {error_name: (_profiled_compute(section), (context,), _stage_key(error_name, context))}
+    if expensive:
+        placeholder = st.empty()
+        placeholder.info(f"⏳ Computing {error_name}...")
+        with st.spinner(f"Computing {error_name}..."):
+            results = run_stages(stages)
+        placeholder.empty()
+    else:
+        results = run_stages(stages)
+    _render_result(section, results[error_name])
+    return results
+
+def _run_all_sections(context):
+    """
+    Compute every section concurrently, then render them into tabs on the script thread.
+    """
+    tabs = st.tabs([section[0] for section in SECTIONS])
+    stages = {}
+    for tab, section in zip(tabs, SECTIONS):
+        label, error_name, controls, compute, _, _ = section
+        with tab:
+            st.subheader(label)
+            section_context = context
+            if controls is not None:
+                section_context = {**context, **controls()}
+        stages[error_name] = (_profiled_compute(section), (section_context,), _stage_key(error_name, section_context))
+
+    with st.spinner("Computing all sections..."):
+        results = run_stages(stages)
+    for tab, section in zip(tabs, SECTIONS):
+        with tab:
+            _render_result(section, results[section[1]])
+    return results
+
+def _session_id():
+    if "report_session_id" not in st.session_state:
+        st.session_state.report_session_id = uuid.uuid4().hex
+    return st.session_state.report_session_id
+
 def run(data):
+    """
+    Render the Market Overview dashboard; each rerun is profiled as one run.
+    """
+    with profile_run("market_overview", session=current_session_id()):
+        _run(data)
+
+def _run(data):
     st.title("📊 Market Overview Dashboard")
     st.markdown(
         """
@@ -25,120 +268,67 @@ def run(data):
 
     # Sidebar Filters
     st.sidebar.header("Filters")
-    state = st.sidebar.selectbox("State", options=["All"] + sorted(data['State'].dropna().unique().tolist()))
-    month = st.sidebar.selectbox("Month", options=["All"] + sorted(data['Month'].dropna().unique().tolist()))
-    year = st.sidebar.selectbox("Year", options=["All"] + sorted(data['Year'].dropna().unique().tolist()))
-    importer = st.sidebar.selectbox("Importer", options=["All"] + sorted(data['Consignee Name'].dropna().unique().tolist()))
-    exporter = st.sidebar.selectbox("Exporter", options=["All"] + sorted(data['Exporter Name'].dropna().unique().tolist()))
+    state = st.sidebar.multiselect("State", options=filter_options(data['State']), placeholder="All")
+    month = st.sidebar.multiselect("Month", options=filter_options(data['Month']), format_func=month_label, placeholder="All")
+    year = st.sidebar.multiselect("Year", options=filter_options(data['Year']), placeholder="All")
+    importer = st.sidebar.multiselect("Importer", options=filter_options(data['Consignee Name']), placeholder="All")
+    exporter = st.sidebar.multiselect("Exporter", options=filter_options(data['Exporter Name']), placeholder="All")
 
-    # Filter Data
+    # Filter Data (an empty selection means "All")
     filtered_data = get_filtered_data(data, state=state, month=month, year=year, importer=importer, exporter=exporter)
     if filtered_data.empty:
         st.warning("No data available for the selected filters.")
         return
 
-    # Tabs for insights
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        "📌 Key Metrics",
-        "📈 Trends",
-        "🌍 State Contributions",
-        "👥 Importer/Exporter Contributions",
-        "🚨 Smart Alerts",
-        "🔮 AI Forecasting",
-    ])
-
-    # Tab 1: Key Metrics
-    with tab1:
-        st.subheader("📌 Key Metrics")
-        try:
-            metrics = calculate_kpis(filtered_data)
-            growth_metrics = calculate_growth_metrics(filtered_data)
-
-            # Display metrics
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total Imports (Kgs)", f"{metrics['total_imports']:,.0f}")
-            col2.metric("Total Shipments", f"{metrics['total_shipments']}")
-            col3.metric("YoY Growth", f"{growth_metrics['yoy_growth']:.2f}%", delta_color="normal")
-            st.metric("MoM Growth", f"{growth_metrics['mom_growth']:.2f}%")
-            st.metric("Top Importer", metrics['top_importer'])
-            st.metric("Top Exporter", metrics['top_exporter'])
-        except Exception as e:
-            st.error(f"Error processing Key Metrics: {e}")
-
-    # Tab 2: Trends
-    with tab2:
-        st.subheader("📈 Trends Over Time")
-        try:
-            monthly_trends_chart = get_monthly_trends(filtered_data)
-            yearly_trends_chart = get_yearly_trends(filtered_data)
-            comparison_chart = get_comparative_trends(filtered_data, comparison_column="Year")
-            st.plotly_chart(monthly_trends_chart, use_container_width=True)
-            st.plotly_chart(yearly_trends_chart, use_container_width=True)
-            st.plotly_chart(comparison_chart, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error processing Trends: {e}")
-
-    # Tab 3: State Contributions
-    with tab3:
-        st.subheader("🌍 State Contributions")
-        try:
-            state_chart = plot_state_contributions(filtered_data)
-            st.plotly_chart(state_chart, use_container_width=True)
-
-            st.markdown("### State Heatmap")
-            state_heatmap = plot_state_heatmap(filtered_data)
-            st.plotly_chart(state_heatmap, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error processing State Contributions: {e}")
-
-    # Tab 4: Importer/Exporter Contributions
-    with tab4:
-        st.subheader("👥 Importer/Exporter Contributions")
-        try:
-            st.markdown("### Top Importers")
-            importer_chart = plot_contributions(filtered_data, 'Consignee Name')
-            st.plotly_chart(importer_chart, use_container_width=True)
+    # Aggregated sections roll up the pre-built cube instead of scanning the filtered rows
+    filtered_cube = get_filtered_cube(data, state=state, month=month, year=year, importer=importer, exporter=exporter)
+    context = {"cube": filtered_cube, "rows": filtered_data, "months": month, "years": year}
 
-            st.markdown("### Top Exporters")
-            exporter_chart = plot_contributions(filtered_data, 'Exporter Name')
-            st.plotly_chart(exporter_chart, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error processing Importer/Exporter Contributions: {e}")
+    # Section selector: unlike st.tabs, only the visible section is computed on each rerun.
+    # "Show all sections" computes every section concurrently instead.
+    if st.sidebar.checkbox("Show all sections", value=False):
+        stage_results = _run_all_sections(context)
+    else:
+        labels = [section[0] for section in SECTIONS]
+        selected = st.radio("Section", labels, horizontal=True, label_visibility="collapsed", key="market_overview_section")
+        stage_results = _run_section(SECTIONS[labels.index(selected)], context)
 
-    # Tab 5: Smart Alerts
-    with tab5:
-        st.subheader("🚨 Smart Alerts")
-        try:
-            alerts = get_smart_alerts(filtered_data)
-            if alerts:
-                for alert in alerts:
-                    st.warning(alert)
-            else:
-                st.success("No critical alerts!")
-        except Exception as e:
-            st.error(f"Error processing Smart Alerts: {e}")
+    with st.sidebar.expander("⏱️ Stage timings"):
+        st.dataframe(timings_table(stage_results), use_container_width=True)
 
-    # Tab 6: AI Forecasting
-    with tab6:
-        st.subheader("🔮 AI Forecasting")
-        try:
-            forecast_chart = forecast_imports(filtered_data)
-            st.plotly_chart(forecast_chart, use_container_width=True)
-        except Exception as e:
-            st.error(f"Error processing AI Forecasting: {e}")
-
-    # Exportable Reports
+    # Exportable Reports (rendered in the background so the dashboard never waits on them)
     st.sidebar.title("📄 Exportable Reports")
     try:
+        session_id = _session_id()
+
         if st.sidebar.button("Generate PDF Report"):
-            report_path = generate_pdf_report(filtered_data, metrics)
-            st.success("Report generated successfully!")
-            st.markdown(f"[Download PDF Report]({report_path})")
+            metrics = calculate_kpis(filtered_cube)
+            st.session_state.report_job = submit_report_job(session_id, filtered_cube, metrics)
+
+        job = get_report_job(st.session_state.get("report_job"), session_id) if st.session_state.get("report_job") else None
+        if job is not None:
+            if job["status"] == "done":
+                st.sidebar.download_button("Download PDF Report", job["result"], "market_overview_report.pdf", mime="application/pdf")
+            elif job["status"] == "failed":
+                st.sidebar.error(f"Error generating PDF report: {job['error']}")
+            else:
+                st.sidebar.progress(job["progress"], text=f"Report: {job['message']}")
+                st.sidebar.button("Refresh report status")
     except Exception as e:
         st.error(f"Error generating PDF report: {e}")
 
+    # Data export: generated only when requested, for the chosen format and columns
     try:
-        csv_data = download_csv(filtered_data)
-        st.sidebar.download_button("Download CSV", csv_data, "filtered_data.csv", mime="text/csv")
+        export_format = st.sidebar.selectbox("Export format", options=list(EXPORT_FORMATS))
+        export_columns = st.sidebar.multiselect("Export columns", options=filtered_data.columns.tolist(), placeholder="All")
+        export_key = (dataset_fingerprint(filtered_data), export_format, tuple(export_columns))
+        if st.sidebar.button("Prepare Export"):
+            with st.spinner("Preparing export..."):
+                st.session_state.export = (export_key, export_data(filtered_data, export_format, export_columns))
+
+        prepared = st.session_state.get("export")
+        if prepared is not None and prepared[0] == export_key:
+            extension, mime = EXPORT_FORMATS[export_format]
+            st.sidebar.download_button(f"Download {export_format}", prepared[1], f"filtered_data.{extension}", mime=mime)
     except Exception as e:
-        st.error(f"Error downloading CSV: {e}")
+        st.error(f"Error exporting data: {e}")
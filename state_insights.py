@@ -1,10 +1,11 @@
 import streamlit as st
-import plotly.express as px
 
 def run(data):
     """
     State-Wise Insights Submodule: Displays state-wise contributions and maps.
     """
+    import plotly.express as px
+
     st.subheader("📍 State-Wise Insights")
 
     # Map State Abbreviations
@@ -46,10 +47,11 @@ def run(data):
     "DL": "Delhi",
     "INDIA": "India"  # Special handling for cases where state is set as "India"
     }
-    data['State'] = data['State'].map(STATE_ABBREVIATIONS).fillna(data['State'])
-
-    # State-Wise Data
-    state_data = data.groupby('State')['Quantity'].sum().reset_index()
+    # State-Wise Data (aggregate first, then name the states, leaving the input untouched)
+    state_data = data.groupby('State', observed=True)['Quantity'].sum().reset_index()
+    state_codes = state_data['State'].astype(object)
+    state_data['State'] = state_codes.map(STATE_ABBREVIATIONS).fillna(state_codes)
+    state_data = state_data.groupby('State', sort=False)['Quantity'].sum().reset_index()
     state_data = state_data[state_data['State'] != "India"]
 
     # Plot Bar Chart
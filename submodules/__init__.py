@@ -1,18 +1,29 @@
-from .trends_tools import get_monthly_trends, get_yearly_trends, get_comparative_trends
-from .key_metrics import calculate_kpis
-from .state_visuals import plot_state_contributions
-from .contribution_tools import plot_contributions
-from .anomaly_detection import detect_anomalies
-from .report_generator import generate_pdf_report, download_csv
+import importlib
 
-__all__ = [
-    "get_monthly_trends",
-    "get_yearly_trends",
-    "get_comparative_trends",
-    "calculate_kpis",
-    "plot_state_contributions",
-    "plot_contributions",
-    "detect_anomalies",
-    "generate_pdf_report",
-    "download_csv",
-]
+# Public names are resolved on first access (PEP 562), so importing the package, or one
+# lightweight submodule through it, does not load every analysis module and its dependencies.
+_EXPORTS = {
+    "get_monthly_trends": "trends_tools",
+    "get_yearly_trends": "trends_tools",
+    "get_comparative_trends": "trends_tools",
+    "calculate_kpis": "key_metrics",
+    "plot_state_contributions": "state_visuals",
+    "plot_contributions": "contribution_tools",
+    "detect_anomalies": "anomaly_detection",
+    "generate_pdf_report": "report_generator",
+    "download_csv": "report_generator",
+    "export_data": "report_generator",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,10 +1,272 @@
-from sklearn.ensemble import IsolationForest
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from .dataset_registry import dataset_fingerprint
+from .memo_cache import memoize
+from .panel import build_panel
+from .profiling import profiled
 
-def detect_anomalies(data):
+# Robust anomaly scoring parameters
+ANOMALY_WINDOW = 12  # Trailing months used as the baseline of each point
+ANOMALY_THRESHOLD = 3.5  # Robust z-score (0.6745 * deviation / MAD) flagged as anomalous
+MIN_HISTORY = 6  # Points needed in the trailing window before a month is scored
+SERIES_CHUNK_SIZE = 2000  # Series scored per vectorized block to bound memory
+ANOMALY_MODEL_DIR = ".anomaly_models"
+ANOMALY_MODEL_MAX_BYTES = 512 * 1024 ** 2  # 512 MB
+ANOMALY_MODEL_MAX_AGE = 30 * 24 * 3600  # 30 days
+
+def _seasonal_profile(values, periods):
+    """
+    Per-series month-of-year offsets: median of each calendar month minus the series median.
+    Months seen fewer than twice get no offset.
+    """
+    months = np.asarray(periods) % 100 - 1
+    overall = np.median(values, axis=1, keepdims=True) if values.shape[1] else np.zeros((len(values), 1))
+    profile = np.zeros((len(values), 12))
+    for month in range(12):
+        columns = values[:, months == month]
+        if columns.shape[1] >= 2:
+            profile[:, month] = np.median(columns, axis=1) - overall[:, 0]
+    return profile
+
+def _series_scale(residuals):
+    """
+    Whole-history robust scale (MAD / 0.6745) of each series' residuals.
+    """
+    median = np.median(residuals, axis=1, keepdims=True)
+    return np.median(np.abs(residuals - median), axis=1) / 0.6745
+
+def _robust_scores(residuals, window, floor, start=0):
+    """
+    Robust z-scores of residuals[:, start:] against each point's trailing window
+    (rolling median and MAD), computed for all series at once. `floor` bounds each
+    series' rolling scale from below so short, in-sample-smoothed windows do not
+    produce inflated scores.
+
+    Returns:
+        tuple: (scores, expected residual) arrays for columns start onwards.
+    """
+    n_series, n_periods = residuals.shape
+    padded = np.concatenate([np.full((n_series, window), np.nan), residuals], axis=1)
+    scores = np.full((n_series, n_periods - start), np.nan)
+    expected = np.full((n_series, n_periods - start), np.nan)
+
+    for chunk_start in range(0, n_series, SERIES_CHUNK_SIZE):
+        block = padded[chunk_start:chunk_start + SERIES_CHUNK_SIZE]
+        # windows[:, t, :] holds the `window` points before column t
+        windows = np.lib.stride_tricks.sliding_window_view(block[:, :-1], window, axis=1)[:, start:]
+        current = block[:, window + start:]
+        enough = np.sum(~np.isnan(windows), axis=2) >= MIN_HISTORY
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            # Leading windows are all-NaN until enough history exists
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            median = np.nanmedian(windows, axis=2)
+            mad = np.nanmedian(np.abs(windows - median[..., None]), axis=2)
+            mean_abs = np.nanmean(np.abs(windows - median[..., None]), axis=2) * 1.2533
+            scale = np.maximum(np.where(mad > 0, mad / 0.6745, mean_abs), floor[chunk_start:chunk_start + len(block), None])
+            deviation = current - median
+            score = np.where(scale > 0, deviation / scale, np.where(deviation == 0, 0.0, np.sign(deviation) * np.inf))
+        rows = slice(chunk_start, chunk_start + len(block))
+        scores[rows] = np.where(enough, score, np.nan)
+        expected[rows] = np.where(enough, median, np.nan)
+    return scores, expected
+
+def _model_path(model_key):
+    name = hashlib.sha256(model_key.encode()).hexdigest()[:32]
+    return os.path.join(ANOMALY_MODEL_DIR, f"{name}.npz")
+
+def anomaly_model_key(data, entity_column):
+    """
+    Persisted-model key of a dataset (e.g. the filtered cube) and entity level.
+    """
+    return f"{dataset_fingerprint(data)}:{entity_column}"
+
+def carry_forward_anomaly_model(source, target, entity_column):
+    """
+    Make the persisted model of source available under the key of target, which extends it
+    with appended months, so the next detection only scores the new months.
+
+    Returns:
+        bool: Whether a model was carried forward.
+    """
+    source_path = _model_path(anomaly_model_key(source, entity_column))
+    target_path = _model_path(anomaly_model_key(target, entity_column))
+    if not os.path.exists(source_path) or os.path.exists(target_path):
+        return False
+    try:
+        shutil.copyfile(source_path, target_path)
+        return True
+    except OSError as e:
+        logging.error(f"Error carrying forward anomaly model: {e}")
+        return False
+
+def evict_anomaly_models(max_bytes=ANOMALY_MODEL_MAX_BYTES, max_age=ANOMALY_MODEL_MAX_AGE):
+    """
+    Remove persisted models older than max_age, then the least recently used ones until under max_bytes.
     """
-    Use Isolation Forest to detect anomalies in import trends.
+    if not os.path.isdir(ANOMALY_MODEL_DIR):
+        return []
+    entries = []
+    for name in os.listdir(ANOMALY_MODEL_DIR):
+        if name.endswith(".npz"):
+            stat = os.stat(os.path.join(ANOMALY_MODEL_DIR, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    now = time.time()
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    evicted = []
+    for mtime, size, name in entries:
+        if now - mtime <= max_age and total_bytes <= max_bytes:
+            continue
+        try:
+            os.remove(os.path.join(ANOMALY_MODEL_DIR, name))
+            total_bytes -= size
+            evicted.append(name)
+        except OSError as e:
+            logging.error(f"Error evicting anomaly model {name}: {e}")
+    if evicted:
+        logging.info(f"Anomaly models evicted {len(evicted)} files")
+    return evicted
+
+def _history_checksum(values):
+    return hashlib.sha256(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+def save_anomaly_model(model_key, model):
+    """
+    Persist a fitted anomaly model (arrays only, no pickles).
+    """
+    try:
+        os.makedirs(ANOMALY_MODEL_DIR, exist_ok=True)
+        meta = {k: model[k] for k in ("window", "threshold", "checksum")}
+        np.savez_compressed(
+            _model_path(model_key),
+            entities=np.asarray(model["entities"], dtype=str),
+            periods=model["periods"],
+            profile=model["profile"],
+            floor=model["floor"],
+            scores=model["scores"],
+            expected=model["expected"],
+            meta=np.asarray(json.dumps(meta)),
+        )
+        evict_anomaly_models()
+    except Exception as e:
+        logging.error(f"Error saving anomaly model {model_key}: {e}")
+
+def load_anomaly_model(model_key):
+    """
+    Load a persisted anomaly model, or None when missing or unreadable.
+    """
+    path = _model_path(model_key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            model = json.loads(str(stored["meta"]))
+            for name in ("entities", "periods", "profile", "floor", "scores", "expected"):
+                model[name] = stored[name]
+        os.utime(path)  # Refresh age so models in use survive eviction
+        return model
+    except Exception as e:
+        logging.error(f"Error loading anomaly model {model_key}: {e}")
+        return None
+
+def fit_anomaly_model(panel, window=ANOMALY_WINDOW, threshold=ANOMALY_THRESHOLD, model=None):
+    """
+    Score every month of every series in the panel against its seasonally adjusted trailing baseline.
+    When a compatible fitted model is given, its seasonal profile and scores are reused and only
+    the months after its last period are scored.
+
+    Returns:
+        dict: Model with entities, periods, seasonal profile, scores and expected quantities.
     """
-    model = IsolationForest(contamination=0.05, random_state=42)
-    data['Anomaly'] = model.fit_predict(data[['Quantity']])
-    anomalies = data[data['Anomaly'] == -1]
-    return anomalies
+    entities = np.asarray(panel.entities.astype(str))
+    values, periods = panel.values, panel.periods
+    months = periods % 100 - 1
+
+    reusable = (
+        model is not None
+        and model["window"] == window
+        and len(model["periods"]) > 0
+        and len(model["periods"]) <= len(periods)
+        and np.array_equal(model["periods"], periods[:len(model["periods"])])
+        and np.array_equal(model["entities"], entities)
+        and model["checksum"] == _history_checksum(values[:, :len(model["periods"])])
+    )
+
+    if reusable:
+        known = len(model["periods"])
+        profile = model["profile"]
+        residuals = values - profile[:, months]
+        floor = model["floor"]
+        new_scores, new_expected = _robust_scores(residuals, window, floor, start=known)
+        scores = np.concatenate([model["scores"], new_scores], axis=1)
+        expected = np.concatenate([model["expected"], new_expected + profile[:, months[known:]]], axis=1)
+        logging.info(f"Anomaly model scored {len(periods) - known} new months incrementally")
+    else:
+        profile = _seasonal_profile(values, periods)
+        residuals = values - profile[:, months]
+        floor = _series_scale(residuals)
+        scores, expected = _robust_scores(residuals, window, floor)
+        expected = expected + profile[:, months]
+
+    return {
+        "entities": entities,
+        "periods": periods,
+        "profile": profile,
+        "floor": floor,
+        "scores": scores,
+        "expected": expected,
+        "window": window,
+        "threshold": threshold,
+        "checksum": _history_checksum(values),
+    }
+
+@profiled(kind="submodule")
+@memoize
+def detect_anomalies(data, entity_column='Consignee Name', window=ANOMALY_WINDOW,
+                     threshold=ANOMALY_THRESHOLD, model_key=None):
+    """
+    Detect anomalous months per importer, exporter or state using robust statistics
+    (seasonal offsets plus rolling median/MAD) over the monthly series of every entity at once.
+    The input frame is not modified.
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells.
+        entity_column (str): 'Consignee Name', 'Exporter Name', 'State' or None for the total series.
+        window (int): Trailing months in each baseline.
+        threshold (float): Absolute robust z-score flagged as anomalous.
+        model_key (str): Name under which the fitted model is persisted (see anomaly_model_key)
+            so later calls, and calls on the dataset extended with appended months, only score
+            the new months. None disables persistence.
+
+    Returns:
+        pd.DataFrame: One row per anomaly with the entity, Period (yyyymm), Quantity,
+            Expected quantity and Score, sorted by absolute score.
+    """
+    panel = build_panel(data, entity_column)
+    label = entity_column or "Series"
+    columns = [label, 'Period', 'Quantity', 'Expected', 'Score']
+    if panel.values.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    previous = load_anomaly_model(model_key) if model_key else None
+    model = fit_anomaly_model(panel, window=window, threshold=threshold, model=previous)
+    if model_key:
+        save_anomaly_model(model_key, model)
+
+    rows, cols = np.nonzero(np.nan_to_num(np.abs(model["scores"]), nan=0.0) >= threshold)
+    anomalies = pd.DataFrame({
+        label: panel.entities[rows],
+        'Period': panel.periods[cols],
+        'Quantity': panel.values[rows, cols],
+        'Expected': model["expected"][rows, cols],
+        'Score': model["scores"][rows, cols],
+    }, columns=columns)
+    return anomalies.sort_values('Score', key=np.abs, ascending=False, ignore_index=True)
@@ -0,0 +1,112 @@
+import numpy as np
+from .memo_cache import memoize
+
+# Traces with more points than this are drawn with WebGL
+WEBGL_POINT_THRESHOLD = 1000
+# Line/scatter traces are downsampled (LTTB) to at most this many points
+MAX_TRACE_POINTS = 2000
+# Heatmaps are pooled to at most this many columns
+MAX_HEATMAP_COLUMNS = 200
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of the points that best keep the shape.
+
+    Args:
+        y (np.ndarray): Values in x order; x is taken as the point position.
+        n_out (int): Number of points to keep (at least 3).
+
+    Returns:
+        np.ndarray: Sorted indices into y.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+def _downsample_trace(trace, max_points):
+    if trace.y is None or len(trace.y) <= max_points:
+        return trace
+    keep = lttb_indices(np.asarray(trace.y), max_points)
+    updates = {"y": np.asarray(trace.y)[keep]}
+    if trace.x is not None:
+        updates["x"] = np.asarray(trace.x)[keep]
+    for attribute in ("text", "hovertext", "customdata"):
+        values = getattr(trace, attribute)
+        if values is not None and not isinstance(values, str) and len(values) == len(trace.y):
+            updates[attribute] = np.asarray(values)[keep]
+    trace.update(updates)
+    return trace
+
+def _to_webgl(trace):
+    import plotly.graph_objects as go
+
+    valid = go.Scattergl()._valid_props
+    properties = {k: v for k, v in trace.to_plotly_json().items() if k in valid and k != "type"}
+    return go.Scattergl(**properties)
+
+def _pool_heatmap(trace, max_columns):
+    z = np.asarray(trace.z, dtype=float)
+    if z.ndim != 2 or z.shape[1] <= max_columns:
+        return trace
+    starts = np.linspace(0, z.shape[1], max_columns + 1).astype(int)[:-1]
+    pooled = np.add.reduceat(np.nan_to_num(z), starts, axis=1)
+    updates = {"z": pooled}
+    if trace.x is not None:
+        updates["x"] = np.asarray(trace.x)[starts]
+    trace.update(updates)
+    return trace
+
+def optimize_figure(fig, max_points=MAX_TRACE_POINTS, webgl_threshold=WEBGL_POINT_THRESHOLD,
+                    max_heatmap_columns=MAX_HEATMAP_COLUMNS):
+    """
+    Reduce a figure's browser payload: downsample large line/scatter traces with LTTB,
+    switch them to WebGL above the point threshold and pool wide heatmaps.
+
+    Args:
+        fig (plotly.graph_objs.Figure): Figure to optimize.
+
+    Returns:
+        fig (plotly.graph_objs.Figure): The optimized figure (traces are updated in place).
+    """
+    traces = []
+    changed = False
+    for trace in fig.data:
+        if trace.type in ("scatter", "scattergl"):
+            points = len(trace.y) if trace.y is not None else 0
+            trace = _downsample_trace(trace, max_points)
+            if trace.type == "scatter" and points > webgl_threshold:
+                trace = _to_webgl(trace)
+                changed = True
+        elif trace.type == "heatmap":
+            trace = _pool_heatmap(trace, max_heatmap_columns)
+        traces.append(trace)
+    if changed:
+        import plotly.graph_objects as go
+
+        fig = go.Figure(data=traces, layout=fig.layout)
+    return fig
+
+# Memoize a figure builder: the optimized figure itself is cached per input fingerprint, so a hit
+# skips building and validating it. Cached figures are shared by every session and must only be
+# rendered (st.plotly_chart just reads them); copy one with go.Figure(fig) before modifying it.
+memoize_figure = memoize(encode=optimize_figure)
@@ -1,15 +1,95 @@
-import plotly.express as px
+import numpy as np
+import pandas as pd
+from .chart_rendering import memoize_figure
+from .olap_cube import category_codes
+from .profiling import profiled
 
-def plot_contributions(data, contributor_type):
+# Number of named bars before the remaining contributors are folded into "Others"
+TOP_K = 20
+OTHERS_LABEL = "Others"
+
+def _entity_totals(values, quantities):
+    """
+    Total Quantity per distinct value, keeping only values that occur.
+    """
+    codes, uniques = category_codes(values)
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=quantities[valid], minlength=len(uniques))
+    present = np.bincount(codes[valid], minlength=len(uniques)) > 0
+    return np.asarray(uniques, dtype=object)[present], totals[present]
+
+def _top_positions(totals, k):
+    """
+    Positions of the k largest totals in descending order, using a partial selection.
     """
-    Generate a bar chart for contributions by importer or exporter.
+    if len(totals) > k:
+        candidates = np.argpartition(-totals, k - 1)[:k]
+    else:
+        candidates = np.arange(len(totals))
+    return candidates[np.argsort(-totals[candidates], kind="stable")]
+
+@profiled(kind="submodule")
+def top_k_contributions(data, contributor_type, k=TOP_K, others_label=OTHERS_LABEL):
     """
-    contributor_data = data.groupby(contributor_type)['Quantity'].sum().reset_index()
+    Top-k contributors by Quantity with the tail folded into an "Others" row.
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells.
+        contributor_type (str): Column to rank, e.g. 'Consignee Name' or 'Exporter Name'.
+        k (int): Number of named contributors to keep.
+        others_label (str): Label of the folded tail.
+
+    Returns:
+        pd.DataFrame: contributor_type, 'Quantity', 'Share (%)' and 'Cumulative Share (%)' (Pareto).
+    """
+    quantities = np.nan_to_num(data['Quantity'].to_numpy(dtype=float))
+    names, totals = _entity_totals(data[contributor_type], quantities)
+    top = _top_positions(totals, k)
+
+    labels = names[top].tolist()
+    values = totals[top].tolist()
+    if len(totals) > len(top):
+        labels.append(f"{others_label} ({len(totals) - len(top):,})")
+        values.append(float(totals.sum() - totals[top].sum()))
+
+    grand_total = float(totals.sum())
+    result = pd.DataFrame({contributor_type: labels, 'Quantity': values})
+    share = result['Quantity'] / grand_total * 100 if grand_total else result['Quantity'] * 0.0
+    result['Share (%)'] = share
+    result['Cumulative Share (%)'] = share.cumsum()
+    return result
+
+def cap_categories(values, quantities, k=TOP_K, others_label=OTHERS_LABEL):
+    """
+    Keep the k values with the largest total Quantity and relabel the rest as "Others".
+
+    Returns:
+        pd.Series: Labels aligned with values.
+    """
+    names, totals = _entity_totals(values, quantities)
+    if len(totals) <= k:
+        return values
+    keep = set(names[_top_positions(totals, k)].tolist())
+    labels = values.astype(object)
+    return labels.where(labels.isin(keep) | labels.isna(), others_label)
+
+@profiled(kind="submodule")
+@memoize_figure
+def plot_contributions(data, contributor_type, k=TOP_K):
+    """
+    Generate a bar chart for the top-k contributions by importer or exporter,
+    with the remaining contributors shown as a single "Others" bar.
+    """
+    import plotly.express as px
+
+    contributor_data = top_k_contributions(data, contributor_type, k=k)
     chart = px.bar(
         contributor_data,
         x=contributor_type,
         y='Quantity',
-        title=f"{contributor_type} Contributions",
+        title=f"{contributor_type} Contributions (Top {k})",
         labels={"Quantity": "Total Quantity (Kgs)", contributor_type: contributor_type},
+        hover_data={'Share (%)': ':.2f', 'Cumulative Share (%)': ':.2f'},
     )
+    chart.update_layout(xaxis=dict(type='category'))
     return chart
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import weakref
+import pandas as pd
+
+# Derived structures (indexes, aggregates, fingerprints) attached to live DataFrame objects.
+# Entries are dropped automatically when the DataFrame is garbage collected.
+_REGISTRY = {}
+
+def _entry(data):
+    key = id(data)
+    entry = _REGISTRY.get(key)
+    if entry is None or entry[0]() is not data:
+        ref = weakref.ref(data, lambda _, key=key: _REGISTRY.pop(key, None))
+        entry = (ref, {})
+        _REGISTRY[key] = entry
+    return entry[1]
+
+def get_derived(data, name, builder):
+    """
+    Return the derived structure registered under name for data, building it on first use.
+
+    Args:
+        data (pd.DataFrame): The dataset the structure is derived from.
+        name (str): Name of the derived structure.
+        builder (callable): Called with data to build the structure when missing.
+
+    Returns:
+        The derived structure.
+    """
+    derived = _entry(data)
+    if name not in derived:
+        derived[name] = builder(data)
+    return derived[name]
+
+def set_derived(data, name, value):
+    """
+    Register a derived structure for data, replacing any existing one.
+    """
+    _entry(data)[name] = value
+    return value
+
+def peek_derived(data, name, default=None):
+    """
+    Return a registered derived structure without building it.
+    """
+    entry = _REGISTRY.get(id(data))
+    if entry is None or entry[0]() is not data:
+        return default
+    return entry[1].get(name, default)
+
+def register_lineage(result, parent, token):
+    """
+    Record that result was derived from parent by a deterministic step described by token.
+    The result's fingerprint is then derived from the parent's without rehashing its rows.
+    """
+    if result is not parent:
+        set_derived(result, "lineage", (weakref.ref(parent), repr(token)))
+    return result
+
+def _hash_content(data):
+    digest = hashlib.sha256()
+    digest.update(repr([(str(c), str(t)) for c, t in data.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _build_fingerprint(data):
+    lineage = peek_derived(data, "lineage")
+    if lineage is not None:
+        parent = lineage[0]()
+        if parent is not None:
+            digest = hashlib.sha256(dataset_fingerprint(parent).encode())
+            digest.update(lineage[1].encode())
+            return digest.hexdigest()
+    return _hash_content(data)
+
+def _layout(data):
+    if isinstance(data, pd.Series):
+        return len(data), str(data.name), str(data.dtype)
+    return len(data), tuple(map(str, data.columns)), tuple(map(str, data.dtypes))
+
+def dataset_fingerprint(data):
+    """
+    Content fingerprint of a dataset, computed once per DataFrame object.
+    Frames produced by filtering or aggregation reuse their parent's fingerprint.
+
+    Datasets are treated as immutable once fingerprinted. Adding, dropping or retyping columns
+    or changing the length is detected and drops every structure derived from the old content;
+    in-place value edits are not, so copy a frame before modifying its values.
+    """
+    derived = _entry(data)
+    layout = _layout(data)
+    if derived.setdefault("layout", layout) != layout:
+        logging.warning("Dataset changed after it was fingerprinted; dropping its derived structures")
+        derived.clear()
+        derived["layout"] = layout
+    return get_derived(data, "fingerprint", _build_fingerprint)
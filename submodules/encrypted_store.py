@@ -0,0 +1,354 @@
+import io
+import json
+import logging
+import os
+import shutil
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Encrypted, column-chunked dataset store.
+# A stored dataset is a directory holding one encrypted blob per (row group, column) plus an
+# encrypted manifest with the schema, category dictionaries and per-row-group statistics.
+# Opening a dataset decrypts the manifest, prunes row groups whose statistics cannot match the
+# filters, and decrypts only the column chunks of the surviving row groups that are needed.
+
+STORE_DIR = ".dataset_store"
+STORE_VERSION = 1
+ROW_GROUP_ROWS = 250_000
+MANIFEST_FILE = "manifest.bin"
+COMPRESSION_LEVEL = 1
+
+def _dataset_dir(name, store_dir):
+    if not name or os.sep in name or name.startswith("."):
+        raise ValueError(f"Invalid dataset name: {name!r}")
+    return os.path.join(store_dir, name)
+
+def _chunk_file(group, position):
+    return f"rg{group:05d}_c{position:03d}.bin"
+
+def _encode_array(values, cipher):
+    buffer = io.BytesIO()
+    np.save(buffer, values, allow_pickle=False)
+    return cipher.encrypt(zlib.compress(buffer.getvalue(), COMPRESSION_LEVEL))
+
+def _decode_array(token, cipher):
+    return np.load(io.BytesIO(zlib.decompress(cipher.decrypt(token))), allow_pickle=False)
+
+def _column_schema(values):
+    """
+    Describe how a column is stored: categoricals (and text, which is dictionary-encoded) as
+    integer codes plus a category list, everything else as a plain NumPy array.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        return {"kind": "category", "categories": categories.tolist(), "ordered": bool(values.cat.ordered),
+                "categories_dtype": str(categories.dtype)}
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return {"kind": "datetime", "dtype": str(values.dtype)}
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return {"kind": "numeric", "dtype": str(values.dtype)}
+    return {"kind": "text"}
+
+def _to_stored(values, schema):
+    if schema["kind"] == "text":
+        values = values.astype("category")
+        schema.update(_column_schema(values))
+    if schema["kind"] == "category":
+        return values.cat.codes.to_numpy()
+    if schema["kind"] == "datetime":
+        return values.to_numpy().astype("datetime64[ns]").view(np.int64)
+    return values.to_numpy()
+
+def _from_stored(array, schema):
+    if schema["kind"] == "category":
+        categories = pd.Index(schema["categories"])
+        if schema["categories_dtype"] != "object" and len(categories):
+            categories = categories.astype(schema["categories_dtype"])
+        return pd.Categorical.from_codes(array, categories=categories, ordered=schema["ordered"])
+    if schema["kind"] == "datetime":
+        return array.view("datetime64[ns]")
+    return array.astype(schema["dtype"], copy=False)
+
+def _chunk_stats(array, schema):
+    """
+    Row-group statistics used for pruning: the set of codes present for categoricals,
+    min/max for numeric and datetime columns.
+    """
+    if len(array) == 0:
+        return None
+    if schema["kind"] == "category":
+        return {"codes": np.unique(array[array >= 0]).tolist()}
+    valid = array[~np.isnan(array)] if array.dtype.kind == "f" else array
+    if len(valid) == 0:
+        return None
+    return {"min": valid.min().item(), "max": valid.max().item()}
+
+def _write_row_groups(directory, columns, stored, schemas, cipher, first_group, row_group_rows):
+    """
+    Encrypt the stored column arrays as row groups numbered from first_group; returns their metadata.
+    """
+    rows = len(stored[columns[0]]) if columns else 0
+    row_groups = []
+    for group, start in enumerate(range(0, rows, row_group_rows), start=first_group):
+        stats = {}
+        for position, column in enumerate(columns):
+            chunk = stored[column][start:start + row_group_rows]
+            with open(os.path.join(directory, _chunk_file(group, position)), "wb") as file:
+                file.write(_encode_array(chunk, cipher))
+            stats[column] = _chunk_stats(chunk, schemas[column])
+        row_groups.append({"rows": min(row_group_rows, rows - start), "stats": stats})
+    return row_groups
+
+def _write_manifest(directory, manifest, cipher):
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(cipher.encrypt(json.dumps(manifest).encode("utf-8")))
+    os.replace(f"{path}.tmp", path)
+
+def save_dataset(data, name, cipher, store_dir=STORE_DIR, row_group_rows=ROW_GROUP_ROWS):
+    """
+    Persist a dataset as encrypted column chunks.
+
+    Args:
+        data (pd.DataFrame): Dataset to store.
+        name (str): Dataset name (a directory under store_dir).
+        cipher (Fernet): Cipher used to encrypt every chunk and the manifest.
+        store_dir (str): Root directory of the store.
+        row_group_rows (int): Rows per row group. Rows are ordered by Period (when present)
+            first so period filters prune whole row groups.
+
+    Returns:
+        dict: The (decrypted) manifest that was written.
+    """
+    try:
+        if "Period" in data.columns:
+            data = data.sort_values("Period", kind="stable")
+        schemas = {column: _column_schema(data[column]) for column in data.columns}
+        stored = {column: _to_stored(data[column], schemas[column]) for column in data.columns}
+
+        target = _dataset_dir(name, store_dir)
+        staging = f"{target}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        row_groups = _write_row_groups(staging, list(data.columns), stored, schemas, cipher, 0, row_group_rows)
+        manifest = {
+            "version": STORE_VERSION,
+            "rows": len(data),
+            "columns": [str(column) for column in data.columns],
+            "schemas": schemas,
+            "row_groups": row_groups,
+            "attrs": json.loads(json.dumps(data.attrs, default=str)),
+        }
+        _write_manifest(staging, manifest, cipher)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        logging.info(f"Stored dataset {name}: {len(data):,} rows in {len(row_groups)} row groups")
+        return manifest
+
+    except Exception as e:
+        logging.error(f"Error storing dataset {name}: {e}")
+        raise ValueError(f"Error storing dataset: {e}")
+
+def _append_stored(values, schema):
+    """
+    Convert appended values to the stored representation of an existing column, extending the
+    category list (new categories go at the end, so existing codes stay valid).
+    """
+    if schema["kind"] == "category":
+        lookup = {category: code for code, category in enumerate(schema["categories"])}
+        values = values.astype(object)
+        new = sorted({value for value in values.dropna().unique() if value not in lookup}, key=str)
+        for value in new:
+            lookup[value] = len(schema["categories"])
+            schema["categories"].append(value.item() if isinstance(value, np.generic) else value)
+        width = np.int8 if len(lookup) < 127 else np.int16 if len(lookup) < 32767 else np.int32
+        return values.map(lookup).fillna(-1).to_numpy().astype(width)
+    if schema["kind"] == "datetime":
+        return pd.to_datetime(values).to_numpy().astype("datetime64[ns]").view(np.int64)
+    if schema["kind"] == "text":
+        raise ValueError("Text columns cannot be appended to")
+    converted = values.to_numpy()
+    if converted.dtype.kind == "f" and np.dtype(schema["dtype"]).kind in "iu" and np.isnan(converted).any():
+        raise ValueError(f"Missing values cannot be stored in integer column ({schema['dtype']})")
+    return converted.astype(schema["dtype"])
+
+def append_dataset(data, name, cipher, store_dir=STORE_DIR, row_group_rows=ROW_GROUP_ROWS):
+    """
+    Append rows to a stored dataset as new encrypted row groups; existing chunks are not rewritten.
+
+    Args:
+        data (pd.DataFrame): Rows with the stored dataset's columns.
+        name (str): Dataset name.
+        cipher (Fernet): Cipher the dataset was stored with.
+        store_dir (str): Root directory of the store.
+        row_group_rows (int): Rows per new row group.
+
+    Returns:
+        dict: The updated (decrypted) manifest.
+    """
+    try:
+        manifest = read_manifest(name, cipher, store_dir)
+        columns = manifest["columns"]
+        missing = [column for column in columns if column not in data.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        if len(data) == 0:
+            return manifest
+        if "Period" in data.columns:
+            data = data.sort_values("Period", kind="stable")
+
+        schemas = manifest["schemas"]
+        stored = {column: _append_stored(data[column], schemas[column]) for column in columns}
+
+        directory = _dataset_dir(name, store_dir)
+        # Chunks first, manifest last: an interrupted append leaves only unreferenced files
+        new_groups = _write_row_groups(directory, columns, stored, schemas, cipher,
+                                       len(manifest["row_groups"]), row_group_rows)
+        manifest["row_groups"].extend(new_groups)
+        manifest["rows"] += len(data)
+        _write_manifest(directory, manifest, cipher)
+        logging.info(f"Appended {len(data):,} rows to stored dataset {name} in {len(new_groups)} row groups")
+        return manifest
+
+    except Exception as e:
+        logging.error(f"Error appending to dataset {name}: {e}")
+        raise ValueError(f"Error appending to dataset: {e}")
+
+def read_manifest(name, cipher, store_dir=STORE_DIR):
+    """
+    Decrypt and return the manifest of a stored dataset.
+    """
+    with open(os.path.join(_dataset_dir(name, store_dir), MANIFEST_FILE), "rb") as file:
+        manifest = json.loads(cipher.decrypt(file.read()))
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(f"Unsupported store version: {manifest.get('version')}")
+    return manifest
+
+def list_datasets(store_dir=STORE_DIR):
+    """
+    Names of the datasets in the store.
+    """
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(name for name in os.listdir(store_dir)
+                  if os.path.exists(os.path.join(store_dir, name, MANIFEST_FILE)))
+
+def delete_dataset(name, store_dir=STORE_DIR):
+    """
+    Remove a stored dataset.
+    """
+    shutil.rmtree(_dataset_dir(name, store_dir), ignore_errors=True)
+
+def _normalize_filter(value):
+    if value is None or (isinstance(value, str) and value == "All"):
+        return None
+    values = list(value) if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+    return values or None
+
+def _filter_targets(values, schema):
+    """
+    Translate filter values into the stored representation (codes for categoricals).
+    """
+    if schema["kind"] == "category":
+        lookup = {category: code for code, category in enumerate(schema["categories"])}
+        keys = [value.item() if isinstance(value, np.generic) else value for value in values]
+        return np.array([lookup[key] for key in keys if key in lookup], dtype=np.int64)
+    if schema["kind"] == "datetime":
+        return pd.to_datetime(values).to_numpy().astype("datetime64[ns]").view(np.int64)
+    return np.asarray(values)
+
+def _group_may_match(stats, targets, schema):
+    if stats is None:
+        return False
+    if schema["kind"] == "category":
+        return bool(np.isin(targets, stats["codes"]).any())
+    return bool(((targets >= stats["min"]) & (targets <= stats["max"])).any())
+
+def open_dataset(name, cipher, columns=None, filters=None, store_dir=STORE_DIR):
+    """
+    Read a stored dataset, decrypting only the chunks a query touches.
+
+    Args:
+        name (str): Dataset name.
+        cipher (Fernet): Cipher the dataset was stored with.
+        columns (list): Columns to return (all when None).
+        filters (dict): Column -> value or list of values ("All" or empty means no filter).
+        store_dir (str): Root directory of the store.
+
+    Returns:
+        pd.DataFrame: Matching rows of the requested columns. data.attrs["store_report"] records
+        how many row groups and chunks were decrypted.
+    """
+    try:
+        manifest = read_manifest(name, cipher, store_dir)
+        schemas = manifest["schemas"]
+        positions = {column: position for position, column in enumerate(manifest["columns"])}
+        columns = manifest["columns"] if columns is None else list(columns)
+        missing = [column for column in columns if column not in positions]
+        if missing:
+            raise ValueError(f"Unknown columns: {', '.join(missing)}")
+
+        targets = {}
+        for column, value in (filters or {}).items():
+            if column not in positions:
+                raise ValueError(f"Unknown filter column: {column}")
+            values = _normalize_filter(value)
+            if values is not None:
+                targets[column] = _filter_targets(values, schemas[column])
+
+        groups = [
+            group for group, meta in enumerate(manifest["row_groups"])
+            if all(_group_may_match(meta["stats"][column], wanted, schemas[column])
+                   for column, wanted in targets.items())
+        ]
+
+        directory = _dataset_dir(name, store_dir)
+        def read_chunk(group, column):
+            with open(os.path.join(directory, _chunk_file(group, positions[column])), "rb") as file:
+                return _decode_array(file.read(), cipher)
+
+        parts = {column: [] for column in columns}
+        chunks_read = 0
+        for group in groups:
+            chunks = {}
+            mask = None
+            for column, wanted in targets.items():
+                chunks[column] = read_chunk(group, column)
+                chunk_mask = np.isin(chunks[column], wanted)
+                mask = chunk_mask if mask is None else mask & chunk_mask
+                if not mask.any():
+                    break
+            chunks_read += len(chunks)
+            if mask is not None and not mask.any():
+                continue
+            for column in columns:
+                if column not in chunks:
+                    chunks[column] = read_chunk(group, column)
+                    chunks_read += 1
+                parts[column].append(chunks[column] if mask is None else chunks[column][mask])
+
+        result = {}
+        for column in columns:
+            if parts[column]:
+                stored = np.concatenate(parts[column])
+            else:
+                stored = np.empty(0, dtype=np.int8 if schemas[column]["kind"] == "category" else
+                                  np.int64 if schemas[column]["kind"] == "datetime" else schemas[column]["dtype"])
+            result[column] = _from_stored(stored, schemas[column])
+
+        data = pd.DataFrame(result, columns=columns)
+        data.attrs.update(manifest.get("attrs", {}))
+        data.attrs["store_report"] = {
+            "row_groups_read": len(groups),
+            "row_groups_total": len(manifest["row_groups"]),
+            "chunks_decrypted": chunks_read,
+        }
+        return data
+
+    except Exception as e:
+        logging.error(f"Error opening dataset {name}: {e}")
+        raise ValueError(f"Error opening dataset: {e}")
@@ -0,0 +1,157 @@
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from .stage_executor import PROCESS_POOL_WORKERS, submit_to_process_pool
+
+# Streaming Excel ingestion.
+# Workbooks are read with openpyxl in read-only mode, row by row, keeping only the requested
+# columns. Sheets of large workbooks are parsed in parallel on the shared process pool (openpyxl
+# parsing is pure Python).
+# Parsed sheets are not cached separately: the preprocessed result is in the ingestion cache.
+
+PARALLEL_MIN_BYTES = 4 * 1024 ** 2  # Smaller workbooks are parsed in-process
+PROGRESS_EVERY_ROWS = 50_000
+
+def _typed_column(values):
+    """
+    Build a column from cell values; mixed-type text columns become strings (the ingestion
+    parsers read strings anyway, and the result is cached as Parquet).
+    """
+    series = pd.Series(values)
+    if series.dtype == object:
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+        if kind in ("datetime", "date"):
+            series = pd.to_datetime(series, errors="coerce")
+        elif kind not in ("string", "empty"):
+            series = series.where(series.isna(), series.astype(str))
+    return series
+
+def read_sheet(path, sheet_name, columns, required=(), progress=None):
+    """
+    Stream one worksheet and return the requested columns that it contains.
+
+    Args:
+        path (str): Workbook path.
+        sheet_name (str): Worksheet to read.
+        columns (set): Header names to keep; other columns are never materialized.
+        required (iterable): Header names the sheet must have; otherwise no rows are read.
+        progress (callable): Optional callback(rows_read) every PROGRESS_EVERY_ROWS rows.
+
+    Returns:
+        pd.DataFrame: The kept columns (header row = first non-empty row). A sheet missing a
+            required column gives an empty frame with the matched headers as columns.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        positions = None
+        header_row = 0
+        for header_row, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+            if any(value is not None for value in row):
+                headers = [str(value).strip() if value is not None else None for value in row]
+                positions = {header: i for i, header in enumerate(headers) if header in columns}
+                break
+        if not positions:
+            return pd.DataFrame()
+        if not set(required) <= set(positions):
+            return pd.DataFrame(columns=list(positions))
+
+        names = list(positions)
+        indexes = [positions[name] for name in names]
+        # Cells right of the last wanted column are never turned into values
+        rows = sheet.iter_rows(min_row=header_row + 1, max_col=max(indexes) + 1, values_only=True)
+        values = {name: [] for name in names}
+        read = 0
+        for row in rows:
+            cells = [row[i] if i < len(row) else None for i in indexes]
+            if all(cell is None for cell in cells):
+                continue
+            for name, cell in zip(names, cells):
+                values[name].append(cell)
+            read += 1
+            if progress is not None and read % PROGRESS_EVERY_ROWS == 0:
+                progress(read)
+        return pd.DataFrame({name: _typed_column(values[name]) for name in names})
+    finally:
+        workbook.close()
+
+def read_excel_columns(file, columns, required=(), progress=None, parallel=None):
+    """
+    Read the requested columns from every worksheet of an .xlsx upload.
+
+    Args:
+        file: File-like object with the workbook bytes.
+        columns (iterable): Header names to read; sheets are concatenated on them.
+        required (iterable): Header names a sheet must have to be loaded; other sheets (such as
+            summary sheets) are skipped and logged.
+        progress (callable): Optional callback(fraction, message).
+        parallel (bool): Force or disable parsing sheets on the process pool; None decides by
+            sheet count and workbook size.
+
+    Returns:
+        pd.DataFrame: Rows of all sheets holding the required columns, in sheet order.
+    """
+    from openpyxl import load_workbook
+
+    progress = progress or (lambda fraction, message: None)
+    required = set(required)
+    columns = set(columns) | required
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    try:
+        with os.fdopen(handle, "wb") as tmp:
+            file.seek(0)
+            shutil.copyfileobj(file, tmp)
+            file.seek(0)
+        workbook = load_workbook(path, read_only=True)
+        sheet_names = workbook.sheetnames
+        workbook.close()
+
+        if parallel is None:
+            parallel = os.path.getsize(path) >= PARALLEL_MIN_BYTES
+        frames = {}
+        done = 0
+        if parallel and len(sheet_names) > 1 and PROCESS_POOL_WORKERS > 1:
+            try:
+                futures = {
+                    submit_to_process_pool(read_sheet, path, name, columns, required): index
+                    for index, name in enumerate(sheet_names)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    frames[index] = future.result()
+                    done += 1
+                    progress(done / len(sheet_names), f"Read sheet '{sheet_names[index]}' ({len(frames[index]):,} rows)")
+            except BrokenProcessPool:
+                logging.warning("Process pool broke while parsing sheets; parsing the rest in-process")
+        for index, name in enumerate(sheet_names):
+            if index not in frames:
+                message = f"Reading sheet '{name}'"
+                progress(done / len(sheet_names), message)
+                frames[index] = read_sheet(path, name, columns, required,
+                                           progress=lambda rows: progress(done / len(sheet_names), f"{message}: {rows:,} rows"))
+                done += 1
+                progress(done / len(sheet_names), f"Read sheet '{name}' ({len(frames[index]):,} rows)")
+
+        kept = [frame for frame in (frames[index] for index in range(len(sheet_names)))
+                if len(frame.columns) and required <= set(frame.columns)]
+        for index, name in enumerate(sheet_names):
+            matched = set(frames[index].columns)
+            if not matched:
+                logging.info(f"Excel ingestion skipped sheet '{name}': no mapped columns")
+            elif not required <= matched:
+                logging.warning(f"Excel ingestion skipped sheet '{name}': missing mapped columns "
+                                f"{', '.join(sorted(map(str, required - matched)))}")
+        if not kept:
+            raise ValueError(f"No worksheet contains all mapped columns: {', '.join(sorted(map(str, required)))}")
+        return pd.concat(kept, ignore_index=True) if len(kept) > 1 else kept[0]
+    finally:
+        os.remove(path)
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from .dataset_registry import get_derived, register_lineage
+from .profiling import profiled
+
+# Filter arguments accepted by get_filtered_data and the columns they apply to
+FILTER_DIMENSIONS = {
+    "state": "State",
+    "month": "Month",
+    "year": "Year",
+    "importer": "Consignee Name",
+    "exporter": "Exporter Name",
+}
+
+def _index_column(values):
+    """
+    Build an inverted index for one column: row positions grouped by value code.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        uniques = values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+    return {
+        "codes": codes,
+        "order": order,
+        "offsets": offsets,
+        "lookup": {value: code for code, value in enumerate(uniques)},
+    }
+
+def build_filter_index(data):
+    """
+    Build per-dimension inverted indexes over the filterable columns of the dataset.
+
+    Args:
+        data (pd.DataFrame): The preprocessed dataset.
+
+    Returns:
+        dict: Column name -> inverted index.
+    """
+    return {
+        column: _index_column(data[column])
+        for column in FILTER_DIMENSIONS.values()
+        if column in data.columns
+    }
+
+def get_filter_index(data):
+    """
+    Return the inverted indexes for data, building them once per dataset.
+    """
+    return get_derived(data, "filter_index", build_filter_index)
+
+def normalize_selection(value):
+    """
+    Normalize a filter value to a sorted tuple of selected values, or None for no filter.
+    Accepts "All", None, a single value or a list/tuple/set of values.
+    """
+    if value is None or (isinstance(value, str) and value == "All"):
+        return None
+    if isinstance(value, (list, tuple, set, frozenset, np.ndarray, pd.Index)):
+        values = [v for v in value if not (isinstance(v, str) and v == "All")]
+        if not values or len(values) != len(value):
+            return None
+        return tuple(sorted(set(values), key=str))
+    return (value,)
+
+def normalize_filters(**filters):
+    """
+    Normalize filter keyword arguments to a hashable tuple of (column, values) pairs.
+    """
+    normalized = []
+    for name, column in FILTER_DIMENSIONS.items():
+        selection = normalize_selection(filters.get(name))
+        if selection is not None:
+            normalized.append((column, selection))
+    return tuple(normalized)
+
+def filter_positions(data, normalized_filters):
+    """
+    Return the sorted row positions matching all normalized filters, or None when unfiltered.
+    The smallest posting list is taken first and probed against the other dimensions' codes.
+    """
+    if not normalized_filters:
+        return None
+
+    index = get_filter_index(data)
+    candidates = []
+    for column, selection in normalized_filters:
+        if column not in index:
+            raise ValueError(f"Column '{column}' not found in data.")
+        column_index = index[column]
+        codes = [column_index["lookup"][v] for v in selection if v in column_index["lookup"]]
+        if not codes:
+            return np.empty(0, dtype=np.intp)
+        size = sum(column_index["offsets"][c + 1] - column_index["offsets"][c] for c in codes)
+        candidates.append((size, column, codes))
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    _, column, codes = candidates[0]
+    column_index = index[column]
+    positions = np.concatenate([
+        column_index["order"][column_index["offsets"][c]:column_index["offsets"][c + 1]]
+        for c in codes
+    ])
+
+    for _, column, codes in candidates[1:]:
+        column_index = index[column]
+        # One extra slot so missing values (code -1) map to False
+        selected = np.zeros(len(column_index["lookup"]) + 1, dtype=bool)
+        selected[codes] = True
+        positions = positions[selected[column_index["codes"][positions]]]
+        if positions.size == 0:
+            break
+
+    positions.sort()
+    return positions
+
+@profiled(kind="filter")
+def get_filtered_data(data, **filters):
+    """
+    Filter the dataset by State, Month, Year, Importer and Exporter using the inverted indexes.
+
+    Args:
+        data (pd.DataFrame): The preprocessed dataset.
+        **filters: Any of state, month, year, importer, exporter. Each accepts "All",
+            None, a single value or a list of values.
+
+    Returns:
+        pd.DataFrame: Rows matching every filter.
+    """
+    normalized = normalize_filters(**filters)
+    positions = filter_positions(data, normalized)
+    if positions is None:
+        return data
+    return register_lineage(data.iloc[positions], data, ("filter", normalized))
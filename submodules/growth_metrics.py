@@ -1,14 +1,135 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from .memo_cache import memoize
+from .panel import build_panel
+from .profiling import profiled
+
+ROLLING_WINDOW = 3  # Months in each rolling growth window
+
+# Growth matrices aligned with the (entity x month) panel; percentages, NaN where undefined
+GrowthPanel = namedtuple("GrowthPanel", [
+    "entities",
+    "periods",
+    "values",
+    "mom_change",
+    "mom_growth",
+    "yoy_change",
+    "yoy_growth",
+    "rolling_growth",
+    "years",
+    "annual_totals",
+    "annual_yoy_growth",
+    "cagr",
+])
+
+def _shift(values, periods):
+    shifted = np.full_like(values, np.nan)
+    if periods < values.shape[1]:
+        shifted[:, periods:] = values[:, :-periods]
+    return shifted
+
+def _growth(current, previous):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+
+def _rolling_sum(values, window):
+    cumulative = np.cumsum(np.concatenate([np.zeros((len(values), 1)), values], axis=1), axis=1)
+    sums = np.full_like(values, np.nan)
+    if window <= values.shape[1]:
+        sums[:, window - 1:] = cumulative[:, window:] - cumulative[:, :-window]
+    return sums
+
+def growth_from_panel(panel, rolling_window=ROLLING_WINDOW):
+    """
+    Compute MoM, YoY, rolling and annual growth plus CAGR for every series of a panel
+    with array operations.
+    """
+    values, periods = panel.values.astype(float), panel.periods
+    previous_month = _shift(values, 1)
+    previous_year = _shift(values, 12)
+    rolling = _rolling_sum(values, rolling_window)
+
+    years, year_codes = np.unique(periods // 100, return_inverse=True)
+    annual_totals = np.zeros((len(values), len(years)))
+    for code in range(len(years)):
+        annual_totals[:, code] = values[:, year_codes == code].sum(axis=1)
+    annual_yoy = np.full_like(annual_totals, np.nan)
+    if len(years) > 1:
+        annual_yoy[:, 1:] = _growth(annual_totals[:, 1:], annual_totals[:, :-1])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spans = len(years) - 1
+        first, last = annual_totals[:, 0], annual_totals[:, -1]
+        cagr = np.where((first > 0) & (spans > 0), (np.power(last / first, 1 / max(spans, 1)) - 1) * 100, np.nan)
+
+    return GrowthPanel(
+        entities=panel.entities,
+        periods=periods,
+        values=values,
+        mom_change=values - previous_month,
+        mom_growth=_growth(values, previous_month),
+        yoy_change=values - previous_year,
+        yoy_growth=_growth(values, previous_year),
+        rolling_growth=_growth(rolling, _shift(rolling, rolling_window)),
+        years=years,
+        annual_totals=annual_totals,
+        annual_yoy_growth=annual_yoy,
+        cagr=cagr,
+    )
+
+@profiled(kind="submodule")
+@memoize
+def build_growth_panel(data, entity_column=None):
+    """
+    Build the growth matrices for every importer, exporter or state (or the total) at once.
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells.
+        entity_column (str): 'Consignee Name', 'Exporter Name', 'State' or None for the total.
+
+    Returns:
+        GrowthPanel: Dense (entity x month) growth matrices plus annual totals and CAGR.
+    """
+    return growth_from_panel(build_panel(data, entity_column))
+
+def _last(values):
+    return float(values[-1]) if len(values) and not np.isnan(values[-1]) else 0.0
+
 def calculate_growth_metrics(data):
     """
     Function to calculate growth metrics such as Year-over-Year (YoY) growth and
     Month-over-Month (MoM) growth based on the imported data.
+    YoY compares the last two calendar years; MoM compares the last two months.
     """
-    # Assuming 'data' has columns 'Year', 'Month', and 'Total Imports'
-    yoy_growth = (data['Total Imports'].pct_change(periods=12).mean()) * 100  # Example YoY growth calculation
-    mom_growth = (data['Total Imports'].pct_change(periods=1).mean()) * 100  # Example MoM growth calculation
-    
-    # You can modify this logic depending on your dataset and how you want to calculate the growth metrics
+    growth = build_growth_panel(data)
+    if growth.values.size == 0:
+        return {'yoy_growth': 0.0, 'mom_growth': 0.0}
     return {
-        'yoy_growth': yoy_growth,
-        'mom_growth': mom_growth
+        'yoy_growth': round(_last(growth.annual_yoy_growth[0]), 2),
+        'mom_growth': round(_last(growth.mom_growth[0]), 2),
     }
+
+@profiled(kind="submodule")
+@memoize
+def growth_table(data, entity_column):
+    """
+    Latest growth figures per entity: MoM, YoY (same month last year), rolling and annual YoY, and CAGR.
+
+    Returns:
+        pd.DataFrame: One row per entity, largest latest-month quantity first.
+    """
+    growth = build_growth_panel(data, entity_column)
+    if growth.values.size == 0:
+        return pd.DataFrame(columns=[entity_column, 'Latest Month', 'MoM Growth (%)', 'YoY Growth (%)',
+                                     'Rolling Growth (%)', 'Annual YoY Growth (%)', 'CAGR (%)'])
+    table = pd.DataFrame({
+        entity_column: growth.entities,
+        'Latest Month': growth.values[:, -1],
+        'MoM Growth (%)': growth.mom_growth[:, -1],
+        'YoY Growth (%)': growth.yoy_growth[:, -1],
+        'Rolling Growth (%)': growth.rolling_growth[:, -1],
+        'Annual YoY Growth (%)': growth.annual_yoy_growth[:, -1],
+        'CAGR (%)': growth.cagr,
+    })
+    return table.sort_values('Latest Month', ascending=False, ignore_index=True)
@@ -0,0 +1,311 @@
+import logging
+import numpy as np
+import pandas as pd
+from .anomaly_detection import carry_forward_anomaly_model
+from .dataset_registry import dataset_fingerprint, peek_derived, register_lineage, set_derived
+from .growth_metrics import GrowthPanel, build_growth_panel, growth_from_panel
+from .memo_cache import carry_forward_cached
+from .olap_cube import CUBE_DIMENSIONS, aggregate_cells
+from .panel import Panel, build_panel
+from .periods import index_to_period, period_to_index
+
+# Incremental appends.
+# A delta file (typically the latest month of customs records) is de-duplicated against the
+# existing rows of the periods it covers using hashed row keys, appended, and the derived
+# structures of the existing dataset (filter indexes, cube, memoized panels and growth figures,
+# persisted anomaly models) are extended for the touched periods and entities instead of being rebuilt.
+
+# Columns identifying a record; identical rows are numbered so the n-th copy only matches the n-th copy
+ROW_KEY_COLUMNS = ['Quantity', 'Year', 'Month', 'State', 'Consignee Name', 'Exporter Name']
+
+def _hash_column(values):
+    if not isinstance(values.dtype, pd.CategoricalDtype) and not pd.api.types.is_numeric_dtype(values):
+        values = values.astype("category")
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Hash each category once; the extra slot is the hash of a missing value (code -1)
+        categories = values.cat.categories.astype(str).to_numpy(dtype=object)
+        hashes = np.append(pd.util.hash_array(categories), np.uint64(0))
+        return hashes[values.cat.codes.to_numpy()]
+    return pd.util.hash_array(values.to_numpy(dtype=np.float64, na_value=np.nan))
+
+def row_keys(data):
+    """
+    Hashed row key per record over ROW_KEY_COLUMNS, independent of column dtypes and category order.
+
+    Returns:
+        np.ndarray: uint64 keys; repeated identical records get distinct keys by occurrence.
+    """
+    columns = [column for column in ROW_KEY_COLUMNS if column in data.columns]
+    if not columns:
+        raise ValueError("None of the row key columns are present.")
+    hashes = pd.DataFrame({column: _hash_column(data[column]) for column in columns})
+    keys = pd.util.hash_pandas_object(hashes, index=False).to_numpy()
+    occurrence = pd.Series(keys).groupby(keys).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({"key": keys, "occurrence": occurrence}), index=False).to_numpy()
+
+def new_row_mask(existing, delta):
+    """
+    Boolean mask of the delta rows whose row key does not occur in existing.
+    """
+    if len(existing) == 0:
+        return np.ones(len(delta), dtype=bool)
+    return ~np.isin(row_keys(delta), row_keys(existing))
+
+def append_report(delta, appended):
+    """
+    Summary of an append: rows received, duplicates skipped, and the periods and entities touched.
+    """
+    entities = {
+        column: int(appended[column].nunique())
+        for column in ('State', 'Consignee Name', 'Exporter Name') if column in appended.columns
+    }
+    periods = np.unique(appended['Period']).tolist() if 'Period' in appended.columns else []
+    return {
+        "rows_received": len(delta),
+        "duplicates": len(delta) - len(appended),
+        "rows_appended": len(appended),
+        "periods": [int(period) for period in periods],
+        "entities": entities,
+    }
+
+def _combine_column(old, new):
+    """
+    Concatenate a column with appended values, keeping its compact dtype where lossless.
+    Categorical columns keep a sorted category list, like compact_data.
+    """
+    if isinstance(old.dtype, pd.CategoricalDtype):
+        categories = old.cat.categories
+        values = pd.Index(np.asarray(new, dtype=object))
+        added = pd.Index(values.dropna().unique()).difference(categories)
+        old_codes = old.cat.codes.to_numpy()
+        if len(added):
+            merged = categories.append(added).sort_values()
+            remap = merged.get_indexer(categories)
+            old_codes = np.where(old_codes >= 0, remap[old_codes], -1)
+            categories = merged
+        codes = np.concatenate([old_codes, categories.get_indexer(values)])
+        return pd.Categorical.from_codes(codes, categories=categories, ordered=old.cat.ordered)
+    if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(new):
+        values = new.to_numpy()
+        dtype = old.dtype
+        with np.errstate(invalid="ignore"):
+            lossless = np.array_equal(values.astype(dtype), values, equal_nan=values.dtype.kind == "f")
+        if not lossless:
+            dtype = np.result_type(old.dtype, values.dtype)
+        return np.concatenate([old.to_numpy(), values]).astype(dtype, copy=False)
+    return pd.concat([old, new], ignore_index=True).to_numpy()
+
+def append_rows(base, delta):
+    """
+    Append the rows of delta that are not already in base.
+
+    Args:
+        base (pd.DataFrame): The loaded dataset.
+        delta (pd.DataFrame): Preprocessed new records with the same columns.
+
+    Returns:
+        tuple: (combined dataset with base rows first, appended rows, append report). When every
+            delta row is a duplicate the combined dataset is base itself.
+    """
+    missing = [column for column in base.columns if column not in delta.columns]
+    if missing:
+        raise ValueError(f"Delta is missing columns: {', '.join(missing)}")
+
+    # Only rows of the periods the delta covers can be duplicates
+    if 'Period' in base.columns:
+        overlap = base[np.isin(base['Period'].to_numpy(), np.unique(delta['Period']))]
+    else:
+        overlap = base
+    appended = delta.loc[new_row_mask(overlap, delta), list(base.columns)]
+    report = append_report(delta, appended)
+    if len(appended) == 0:
+        return base, appended, report
+
+    combined = pd.DataFrame({column: _combine_column(base[column], appended[column]) for column in base.columns})
+    combined.attrs.update(base.attrs)
+    combined.attrs["append_report"] = report
+    register_lineage(combined, base, ("append", dataset_fingerprint(appended)))
+    dataset_fingerprint(combined)  # Resolve while base is alive
+    logging.info(f"Appended {len(appended):,} rows ({report['duplicates']:,} duplicates skipped)")
+    return combined, combined.iloc[len(base):], report
+
+def _extend_column_index(column_index, values, n_old):
+    """
+    Extend one inverted index with the rows after n_old without re-sorting the existing rows.
+    Value codes only shift monotonically (categories stay sorted), so every existing posting list
+    keeps its order and moves as a block; appended rows go at the end of their value's block.
+    """
+    old_uniques = pd.Index(list(column_index["lookup"]))
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        uniques = values.cat.categories
+        delta_codes = values.cat.codes.to_numpy()[n_old:]
+    else:
+        new_values = values.iloc[n_old:]
+        uniques = old_uniques.append(pd.Index(new_values.dropna().unique())).unique().sort_values()
+        delta_codes = uniques.get_indexer(new_values)
+    remap = uniques.get_indexer(old_uniques)
+
+    # Slot 0 holds missing values (code -1), slot k + 1 holds code k
+    old_offsets = column_index["offsets"]
+    old_counts = np.zeros(len(uniques) + 1, dtype=np.int64)
+    old_counts[0] = old_offsets[0]
+    old_counts[remap + 1] = np.diff(old_offsets)
+    delta_slots = delta_codes.astype(np.int64) + 1
+    delta_counts = np.bincount(delta_slots, minlength=len(uniques) + 1)
+    cumulative = np.concatenate([[0], np.cumsum(old_counts + delta_counts)])
+    starts = cumulative[:-1]
+
+    old_slots = np.repeat(np.concatenate([[0], remap + 1]), np.diff(np.concatenate([[0], old_offsets])))
+    old_starts = np.concatenate([[0], np.cumsum(old_counts)[:-1]])
+    delta_order = np.argsort(delta_slots, kind="stable")
+    sorted_slots = delta_slots[delta_order]
+    delta_starts = np.concatenate([[0], np.cumsum(delta_counts)[:-1]])
+
+    order = np.empty(n_old + len(delta_codes), dtype=column_index["order"].dtype)
+    order[starts[old_slots] + np.arange(n_old) - old_starts[old_slots]] = column_index["order"]
+    order[starts[sorted_slots] + old_counts[sorted_slots] + np.arange(len(delta_codes)) - delta_starts[sorted_slots]] = delta_order + n_old
+
+    old_codes = column_index["codes"]
+    if not np.array_equal(remap, np.arange(len(old_uniques))):
+        old_codes = np.where(old_codes >= 0, remap[old_codes], -1)
+    return {
+        "codes": np.concatenate([old_codes, delta_codes]),
+        "order": order,
+        "offsets": cumulative[1:],
+        "lookup": {value: code for code, value in enumerate(uniques)},
+    }
+
+def _relabel(cube, data):
+    """
+    Give the cube's categorical dimensions the categories of data (a superset of its own).
+    """
+    cube = cube.copy(deep=False)
+    for column in cube.columns:
+        if isinstance(cube[column].dtype, pd.CategoricalDtype) and column in data.columns:
+            categories = data[column].cat.categories
+            if not cube[column].cat.categories.equals(categories):
+                remap = categories.get_indexer(cube[column].cat.categories)
+                codes = cube[column].cat.codes.to_numpy()
+                cube[column] = pd.Categorical.from_codes(np.where(codes >= 0, remap[codes], -1),
+                                                         categories=categories, ordered=cube[column].cat.ordered)
+    return cube
+
+def _extend_cube(cube, combined, appended):
+    """
+    Re-aggregate only the cube cells of the periods the appended rows fall in.
+    """
+    dimensions = [column for column in CUBE_DIMENSIONS if column in combined.columns]
+    cube = _relabel(cube, combined)
+    touched = np.isin(cube['Period'].to_numpy(), np.unique(appended['Period']))
+    cells = pd.concat([cube[touched], aggregate_cells(appended, dimensions)], ignore_index=True)
+    extended = pd.concat([cube[~touched], aggregate_cells(cells, dimensions)], ignore_index=True)
+    return register_lineage(extended, combined, ("olap_cube", dimensions))
+
+def _merge_panels(panel, delta, entity_order=None):
+    """
+    Add a delta panel to a panel, widening the entity and (contiguous) period axes as needed.
+    """
+    parts = [part for part in (panel, delta) if part.values.size]
+    if not parts:
+        return panel
+    month_indexes = [period_to_index(part.periods) for part in parts]
+    first = min(indexes.min() for indexes in month_indexes)
+    last = max(indexes.max() for indexes in month_indexes)
+    entities = panel.entities.append(delta.entities[~delta.entities.isin(panel.entities)])
+    if entity_order is not None:
+        entities = entity_order[entity_order.isin(entities)]
+
+    values = np.zeros((len(entities), int(last - first + 1)))
+    for part, indexes in zip(parts, month_indexes):
+        values[np.ix_(entities.get_indexer(part.entities), indexes - first)] += part.values
+    return Panel(entities, index_to_period(np.arange(first, last + 1)), values)
+
+def _update_growth(growth, panel, touched):
+    """
+    Growth matrices for an extended panel. With an unchanged period axis only the rows of the
+    touched entities are recomputed; otherwise every series shifts and all are recomputed.
+    """
+    if len(growth.entities) == 0 or not np.array_equal(panel.periods, growth.periods):
+        return growth_from_panel(panel)
+    rows = panel.entities.get_indexer(touched)
+    kept = panel.entities.get_indexer(growth.entities)
+    partial = growth_from_panel(Panel(panel.entities[rows], panel.periods, panel.values[rows]))
+    fields = {}
+    for field in GrowthPanel._fields:
+        if field in ("entities", "periods", "years"):
+            continue
+        old = getattr(growth, field)
+        values = np.empty((len(panel.entities),) + old.shape[1:])
+        values[kept] = old
+        values[rows] = getattr(partial, field)
+        fields[field] = values
+    return GrowthPanel(entities=panel.entities, periods=panel.periods, years=growth.years, **fields)
+
+def carry_forward(base, combined):
+    """
+    Extend the derived structures built for base to combined (base rows followed by appended rows):
+    filter indexes, the aggregate cube, and the memoized panels and growth figures and persisted
+    anomaly models of the unfiltered dataset and cube. Structures base never built are left to be
+    built on first use.
+
+    Returns:
+        dict: What was carried forward.
+    """
+    if combined is base:
+        return {}
+    n_old = len(base)
+    appended = combined.iloc[n_old:]
+    carried = {}
+
+    index = peek_derived(base, "filter_index")
+    if index is not None:
+        set_derived(combined, "filter_index", {
+            column: _extend_column_index(column_index, combined[column], n_old)
+            for column, column_index in index.items()
+        })
+        carried["filter_index"] = list(index)
+
+    sources = [(base, combined)]
+    cube = peek_derived(base, "olap_cube")
+    if cube is not None and 'Period' in cube.columns and 'Period' in combined.columns:
+        extended = set_derived(combined, "olap_cube", _extend_cube(cube, combined, appended))
+        sources.append((cube, extended))
+        carried["olap_cube"] = len(extended)
+
+    delta_panels = {}
+    def delta_panel(entity_column):
+        # Cube cells and raw rows give the same panel, so one delta panel serves both sources
+        if entity_column not in delta_panels:
+            delta_panels[entity_column] = build_panel.uncached(appended, entity_column)
+        return delta_panels[entity_column]
+
+    def extended_panel(panel, entity_column):
+        entity_order = None
+        if entity_column is not None and isinstance(combined[entity_column].dtype, pd.CategoricalDtype):
+            entity_order = combined[entity_column].cat.categories
+        return _merge_panels(panel, delta_panel(entity_column), entity_order)
+
+    def entity_column_of(args, kwargs):
+        return args[0] if args else kwargs.get("entity_column")
+
+    def update_panel(panel, args, kwargs):
+        return extended_panel(panel, entity_column_of(args, kwargs))
+
+    def update_growth(growth, args, kwargs):
+        entity_column = entity_column_of(args, kwargs)
+        panel = extended_panel(Panel(growth.entities, growth.periods, growth.values), entity_column)
+        return _update_growth(growth, panel, delta_panel(entity_column).entities)
+
+    carried["memoized"] = sum(
+        carry_forward_cached(build_panel, source, target, update_panel)
+        + carry_forward_cached(build_growth_panel, source, target, update_growth)
+        for source, target in sources
+    )
+    # Anomaly models are checked against the history they were fitted on, so only new months are scored
+    entity_columns = [None] + [column for column in ('State', 'Consignee Name', 'Exporter Name') if column in combined.columns]
+    carried["anomaly_models"] = sum(
+        carry_forward_anomaly_model(source, target, entity_column)
+        for source, target in sources
+        for entity_column in entity_columns
+    )
+    return carried
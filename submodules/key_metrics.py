@@ -1,8 +1,59 @@
+import logging
+from collections import namedtuple
+import numpy as np
 import pandas as pd
+from .olap_cube import category_codes, shipment_count
+from .growth_metrics import calculate_growth_metrics
+from .memo_cache import memoize
+from .profiling import profiled
+
+# Headline metrics shared by the dashboard and the PDF report
+KPIResult = namedtuple("KPIResult", [
+    "total_imports",
+    "total_shipments",
+    "unique_importers",
+    "unique_exporters",
+    "unique_states",
+    "yoy_growth",
+    "mom_growth",
+    "top_importer",
+    "top_exporter",
+    "top_state",
+])
+
+def _reduce(values, quantities):
+    """
+    Quantity total and row presence per distinct value in one bincount pass.
+    """
+    codes, uniques = category_codes(values)
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=quantities[valid], minlength=len(uniques))
+    present = np.bincount(codes[valid], minlength=len(uniques)) > 0
+    return uniques, totals, present
 
+def _summarize(values, quantities):
+    """
+    Number of distinct values present and the value with the largest total Quantity.
+    """
+    uniques, totals, present = _reduce(values, quantities)
+    if not present.any():
+        return 0, "N/A"
+    totals = np.where(present, totals, -np.inf)
+    return int(present.sum()), uniques[int(np.argmax(totals))]
+
+@profiled(kind="submodule")
+@memoize
 def calculate_kpis(data):
     """
-    Calculate Key Performance Indicators (KPIs) from the given dataset.
+    Calculate Key Performance Indicators (KPIs) from the given dataset in a single fused pass.
+    Growth figures are read from the growth engine's total series.
+    Works on raw rows and on cube cells alike.
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells.
+
+    Returns:
+        KPIResult: Headline metrics, growth figures and top contributors.
     """
     try:
         # Check required columns
@@ -11,41 +62,29 @@ def calculate_kpis(data):
         if missing_columns:
             raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
 
-        # Calculate KPIs
-        total_imports = data['Quantity'].sum()
-        total_shipments = len(data)
-        unique_importers = data['Consignee Name'].nunique()
-        unique_exporters = data['Exporter Name'].nunique()
-        unique_states = data['State'].nunique()
-
-        # Calculate YoY growth
-        yoy_growth = calculate_yoy_growth(data)
-
-        # Calculate MoM growth
-        mom_growth = calculate_mom_growth(data)
-
-        # Top contributors
-        top_importer = data.groupby('Consignee Name')['Quantity'].sum().idxmax() if not data.empty else "N/A"
-        top_exporter = data.groupby('Exporter Name')['Quantity'].sum().idxmax() if not data.empty else "N/A"
-        top_state = data.groupby('State')['Quantity'].sum().idxmax() if not data.empty else "N/A"
-
-        return {
-            'Total Imports': total_imports,
-            'Total Shipments': total_shipments,
-            'Unique Importers': unique_importers,
-            'Unique Exporters': unique_exporters,
-            'Unique States': unique_states,
-            'YoY Growth': yoy_growth,
-            'MoM Growth': mom_growth,
-            'Top Importer': top_importer,
-            'Top Exporter': top_exporter,
-            'Top State': top_state,
-        }
+        quantities = np.nan_to_num(data['Quantity'].to_numpy(dtype=float))
+        unique_importers, top_importer = _summarize(data['Consignee Name'], quantities)
+        unique_exporters, top_exporter = _summarize(data['Exporter Name'], quantities)
+        unique_states, top_state = _summarize(data['State'], quantities)
+        growth = calculate_growth_metrics(data)
+
+        return KPIResult(
+            total_imports=float(quantities.sum()),
+            total_shipments=shipment_count(data),
+            unique_importers=unique_importers,
+            unique_exporters=unique_exporters,
+            unique_states=unique_states,
+            yoy_growth=growth['yoy_growth'],
+            mom_growth=growth['mom_growth'],
+            top_importer=top_importer,
+            top_exporter=top_exporter,
+            top_state=top_state,
+        )
 
     except Exception as e:
         logging.error(f"Error in KPI calculation: {e}")
         raise ValueError(f"Error calculating KPIs: {e}")
-        
+
 def calculate_yoy_growth(data):
     """
     Calculate Year-over-Year (YoY) Growth based on the data.
@@ -57,20 +96,7 @@ def calculate_yoy_growth(data):
         float: Year-over-Year growth percentage.
     """
     try:
-        # Group by year and calculate total imports
-        yearly_totals = data.groupby('Year')['Quantity'].sum()
-
-        # Ensure at least two years are present
-        if len(yearly_totals) < 2:
-            return 0.0
-
-        # Calculate YoY growth
-        last_year = yearly_totals.index[-1]
-        previous_year = yearly_totals.index[-2]
-        yoy_growth = ((yearly_totals[last_year] - yearly_totals[previous_year]) /
-                      yearly_totals[previous_year]) * 100
-
-        return round(yoy_growth, 2)
+        return calculate_growth_metrics(data)['yoy_growth']
     except Exception as e:
         return 0.0
 
@@ -86,18 +112,6 @@ def calculate_mom_growth(data):
         float: Month-over-Month growth percentage.
     """
     try:
-        # Group by year and month to calculate monthly totals
-        monthly_data = data.groupby(['Year', 'Month'])['Quantity'].sum().reset_index()
-
-        # Ensure at least two months are present
-        if len(monthly_data) < 2:
-            return 0.0
-
-        # Calculate MoM growth
-        last_month_quantity = monthly_data.iloc[-1]['Quantity']
-        previous_month_quantity = monthly_data.iloc[-2]['Quantity']
-        mom_growth = ((last_month_quantity - previous_month_quantity) / previous_month_quantity) * 100
-
-        return round(mom_growth, 2)
+        return calculate_growth_metrics(data)['mom_growth']
     except Exception as e:
         return 0.0
@@ -0,0 +1,255 @@
+import functools
+import logging
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from .dataset_registry import dataset_fingerprint
+from .profiling import record_cache_access
+
+# Byte budget for memoized submodule results (override with DASHBOARD_MEMO_BUDGET_MB)
+MEMO_BUDGET_BYTES = int(os.environ.get("DASHBOARD_MEMO_BUDGET_MB", "512")) * 1024 ** 2
+
+class MemoCache:
+    """
+    Thread-safe LRU cache bounded by an approximate byte budget.
+    """
+
+    def __init__(self, max_bytes=MEMO_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Return (True, value) on a hit and (False, None) on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, nbytes=None):
+        """
+        Store a value, evicting least recently used entries to stay within the budget.
+        Values larger than the whole budget are not stored.
+        """
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+
+    def resize(self, max_bytes):
+        """
+        Change the byte budget, evicting entries if needed.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def items(self):
+        """
+        Snapshot of the cached (key, value) pairs, least recently used first.
+        """
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Hit/miss/eviction counters and current usage.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+# Process-wide cache; module state survives Streamlit reruns, so it is shared by all sessions
+MEMO_CACHE = MemoCache()
+
+def estimate_nbytes(value):
+    """
+    Approximate memory footprint of a cached value.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, "to_plotly_json"):
+        return len(value.to_json())
+    if isinstance(value, (tuple, list)) and any(isinstance(v, (np.ndarray, pd.DataFrame, pd.Series, pd.Index)) for v in value):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+def _freeze(value):
+    """
+    Turn call arguments into a hashable, order-independent key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_freeze(v) for v in value), key=repr))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ("dataset", dataset_fingerprint(value))
+    if isinstance(value, np.ndarray):
+        return ("array", value.dtype.str, value.shape, value.tobytes())
+    return value
+
+def _read_only_column(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy(copy=True)
+        codes.flags.writeable = False
+        values = pd.Categorical.from_codes(codes, dtype=column.dtype)
+    elif isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+        values = column.to_numpy(copy=True)
+        values.flags.writeable = False
+    else:
+        return column.copy()
+    return pd.Series(values, index=column.index, name=column.name, copy=False)
+
+def _read_only(value):
+    """
+    Read-only form of a result before it is cached: numpy buffers of arrays, frames and
+    (named) tuples of them are made non-writeable, so in-place writes raise instead of
+    silently changing the value every other session is served. Object columns stay writeable
+    (pandas internals reject read-only object buffers) and are copied on every hit instead.
+    """
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, pd.Series):
+        frozen = _read_only_column(value)
+        frozen.attrs = dict(value.attrs)
+        return frozen
+    elif isinstance(value, pd.DataFrame) and len(value.columns):
+        columns = {position: _read_only_column(value.iloc[:, position]) for position in range(value.shape[1])}
+        frozen = pd.DataFrame(columns, copy=False)
+        frozen.columns = value.columns
+        frozen.attrs = dict(value.attrs)
+        return frozen
+    elif isinstance(value, tuple) and any(isinstance(v, (np.ndarray, pd.DataFrame, pd.Series)) for v in value):
+        frozen = [_read_only(v) for v in value]
+        return type(value)(*frozen) if hasattr(value, "_fields") else tuple(frozen)
+    return value
+
+def _shared_view(value):
+    """
+    What a cache hit hands out: frames and series as shallow copies of the cached object, so
+    callers may add, drop or reorder columns without affecting it (their buffers stay read-only).
+    """
+    if isinstance(value, pd.Series):
+        return value.copy(deep=value.dtype == object)
+    if isinstance(value, pd.DataFrame):
+        shared = value.copy(deep=False)
+        for position in np.flatnonzero((value.dtypes == object).to_numpy()):
+            shared.isetitem(position, value.iloc[:, position].copy())
+        return shared
+    return value
+
+def memoize(func=None, encode=None, decode=None):
+    """
+    Memoize a submodule function whose first argument is a dataset.
+    The key is (function, dataset fingerprint, parameters); the fingerprint of a
+    filtered frame already encodes the normalized filter tuple it was produced with.
+    `encode`/`decode` optionally convert results to and from their cached form.
+    The undecorated function stays available as `func.uncached`.
+
+    Results are shared by every session: arrays and frame columns are cached read-only and
+    each call gets its own shallow copy of a frame, so a caller that needs to modify values
+    in place must take a copy first (`.copy()`). Other objects, such as figures, are handed
+    out as cached and must not be modified.
+    """
+    if func is None:
+        return functools.partial(memoize, encode=encode, decode=decode)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(data, *args, **kwargs):
+        try:
+            key = (name, dataset_fingerprint(data), _freeze(args), _freeze(kwargs))
+            hash(key)
+        except TypeError as e:
+            logging.warning(f"Uncacheable arguments for {name}: {e}")
+            return func(data, *args, **kwargs)
+
+        hit, value = MEMO_CACHE.get(key)
+        record_cache_access(hit)
+        if not hit:
+            value = func(data, *args, **kwargs)
+            value = encode(value) if encode is not None else _read_only(value)
+            MEMO_CACHE.put(key, value)
+        return decode(value) if decode is not None else _shared_view(value)
+
+    wrapper.uncached = func
+    wrapper.memo_name = name
+    return wrapper
+
+def carry_forward_cached(func, source, target, update):
+    """
+    Re-key the memoized results of func for the source dataset to the target dataset,
+    which extends it (e.g. after appending rows), instead of recomputing them on next use.
+
+    Args:
+        func (callable): A memoized function (or a wrapper of one).
+        source (pd.DataFrame): Dataset the cached results were computed for.
+        target (pd.DataFrame): Dataset the updated results are stored for.
+        update (callable): update(value, args, kwargs) -> result for target, or None to skip.
+
+    Returns:
+        int: Number of results carried forward.
+    """
+    source_key, target_key = dataset_fingerprint(source), dataset_fingerprint(target)
+    carried = 0
+    for key, value in MEMO_CACHE.items():
+        name, fingerprint, args, kwargs = key
+        if name != func.memo_name or fingerprint != source_key:
+            continue
+        updated = update(value, args, dict(kwargs))
+        if updated is not None:
+            MEMO_CACHE.put((name, target_key, args, kwargs), _read_only(updated))
+            carried += 1
+    return carried
+
+def memo_stats():
+    """
+    Counters of the shared memoization cache.
+    """
+    return MEMO_CACHE.stats()
@@ -1,34 +1,120 @@
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-import plotly.graph_objects as go
+from .chart_rendering import memoize_figure
+from .memo_cache import memoize
+from .panel import build_panel
+from .periods import index_to_period, period_labels, period_to_index
+from .profiling import profiled
 
-def forecast_imports(data):
+FORECAST_HORIZON = 12  # Months forecast after the last observed month
+SEASONAL_MIN_MONTHS = 24  # History needed before month-of-year terms are fitted
+MAX_SERIES_PLOTTED = 10
+
+def _design_matrix(month_index, seasonal):
+    """
+    Shared regressors for every series: intercept, linear trend and, when seasonal,
+    eleven month-of-year indicators.
     """
-    Forecast future imports using a simple machine learning model (e.g., Linear Regression).
+    month_index = np.asarray(month_index)
+    columns = [np.ones(len(month_index)), (month_index - month_index[0]).astype(float)]
+    if seasonal:
+        month_of_year = month_index % 12
+        columns += [(month_of_year == m).astype(float) for m in range(1, 12)]
+    return np.column_stack(columns)
+
+def _fit_block(projection, values):
     """
+    Least-squares coefficients for a block of series sharing one design matrix.
 
-    # Example: Forecast imports using 'Month' and 'Year' as features
-    data['Month'] = pd.to_datetime(data['Date']).dt.month
-    data['Year'] = pd.to_datetime(data['Date']).dt.year
+    Args:
+        projection (np.ndarray): (regressors, periods) pseudo-inverse of the design matrix.
+        values (np.ndarray): (series, periods).
 
-    # Prepare features and target variable
-    X = data[['Month', 'Year']]
-    y = data['Quantity']  # Assuming 'Quantity' is the target variable
+    Returns:
+        np.ndarray: (series, regressors) coefficients.
+    """
+    return values @ projection.T
+
+def fit_series(values, periods):
+    """
+    Fit trend (+ seasonal) least-squares models to many monthly series at once.
+    Every series shares the design matrix, so its pseudo-inverse is computed once and the
+    whole batch is fitted with one matrix product. Results are memoized per dataset by
+    forecast_table; the batch is fitted in-process, as handing it to the process pool costs
+    more than the fit (see benchmarks/suite.py).
+
+    Args:
+        values (np.ndarray): (series, periods) monthly quantities on a contiguous axis.
+        periods (np.ndarray): yyyymm keys of the columns.
+
+    Returns:
+        tuple: (coefficients array of shape (series, regressors), seasonal flag)
+    """
+    seasonal = len(periods) >= SEASONAL_MIN_MONTHS
+    design = _design_matrix(period_to_index(periods), seasonal)
+    return _fit_block(np.linalg.pinv(design), np.asarray(values, dtype=float)), seasonal
+
+def forecast_series(values, periods, horizon=FORECAST_HORIZON):
+    """
+    Forecast every series `horizon` months past its last observed month.
+
+    Returns:
+        tuple: (future yyyymm keys, (series, horizon) non-negative forecasts)
+    """
+    coefficients, seasonal = fit_series(values, periods)
+    month_index = period_to_index(periods)
+    future_index = np.arange(month_index[-1] + 1, month_index[-1] + 1 + horizon)
+    design = _design_matrix(np.concatenate([month_index[:1], future_index]), seasonal)[1:]
+    forecasts = np.clip(coefficients @ design.T, 0, None)
+    return index_to_period(future_index), forecasts
+
+@profiled(kind="submodule")
+@memoize
+def forecast_table(data, entity_column=None, horizon=FORECAST_HORIZON):
+    """
+    Forecast monthly imports for every importer, exporter or state (or the total).
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells with 'Year', 'Month' and 'Quantity'.
+        entity_column (str): 'Consignee Name', 'Exporter Name', 'State' or None for the total.
+        horizon (int): Months to forecast after the last observed month.
+
+    Returns:
+        pd.DataFrame: One row per entity, one column per forecast period (yyyymm).
+    """
+    panel = build_panel(data, entity_column)
+    if panel.values.shape[1] < 2:
+        raise ValueError("At least two months of data are needed to forecast.")
+    future_periods, forecasts = forecast_series(panel.values, panel.periods, horizon)
+    return pd.DataFrame(forecasts, index=panel.entities, columns=future_periods)
+
+@profiled(kind="submodule")
+@memoize_figure
+def forecast_imports(data, entity_column=None, horizon=FORECAST_HORIZON, max_series=MAX_SERIES_PLOTTED):
+    """
+    Forecast future imports from the monthly series, starting after the last observed month.
+    With an entity column, the largest `max_series` entities are plotted.
+    """
+    import plotly.graph_objects as go
 
-    # Train a simple linear regression model
-    model = LinearRegression()
-    model.fit(X, y)
+    panel = build_panel(data, entity_column)
+    forecast = forecast_table(data, entity_column, horizon)
 
-    # Predict future imports (for example, forecasting for the next 12 months)
-    future_months = pd.DataFrame({
-        'Month': [i for i in range(1, 13)],  # Example for 12 months
-        'Year': [2025] * 12  # Example forecasting for the year 2025
-    })
-    forecast = model.predict(future_months)
+    top = np.argsort(-panel.values.sum(axis=1), kind="stable")[:max_series]
+    history_labels = period_labels(panel.periods)
+    future_labels = period_labels(forecast.columns)
 
-    # Create a forecast plot
     forecast_plot = go.Figure()
-    forecast_plot.add_trace(go.Scatter(x=future_months['Month'], y=forecast, mode='lines', name='Forecasted Imports'))
-    forecast_plot.update_layout(title="Forecasted Imports for 2025", xaxis_title="Month", yaxis_title="Imports (Kgs)")
-    
+    for row in top:
+        name = str(panel.entities[row])
+        forecast_plot.add_trace(go.Scatter(x=history_labels, y=panel.values[row], mode='lines', name=f"{name} (actual)"))
+        forecast_plot.add_trace(go.Scatter(
+            x=[history_labels[-1]] + future_labels,
+            y=np.r_[panel.values[row, -1], forecast.iloc[row].to_numpy()],
+            mode='lines', line=dict(dash='dash'), name=f"{name} (forecast)",
+        ))
+    forecast_plot.update_layout(
+        title=f"Forecasted Imports: {future_labels[0]} to {future_labels[-1]}",
+        xaxis_title="Month", yaxis_title="Imports (Kgs)", xaxis=dict(type='category'),
+    )
     return forecast_plot
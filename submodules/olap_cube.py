@@ -0,0 +1,79 @@
+import pandas as pd
+from .dataset_registry import get_derived, register_lineage
+from .filter_index import get_filtered_data
+from .periods import period_codes
+from .profiling import profiled
+
+# Dimensions the cube is aggregated over; every dashboard groupby is a roll-up of these
+CUBE_DIMENSIONS = ['State', 'Year', 'Month', 'Consignee Name', 'Exporter Name']  # Period is derived per cell
+CUBE_MEASURES = ['Quantity', 'Shipments']
+
+def aggregate_cells(data, dimensions):
+    """
+    Group raw rows (Shipments counts them) or cube cells (Shipments is summed) into cube cells.
+    """
+    shipments = ('Shipments', 'sum') if 'Shipments' in data.columns else ('Quantity', 'size')
+    cube = (
+        data.groupby(dimensions, observed=True, dropna=False, sort=False)
+        .agg(Quantity=('Quantity', 'sum'), Shipments=shipments)
+        .reset_index()
+    )
+    if 'Year' in cube.columns and 'Month' in cube.columns:
+        cube['Period'] = period_codes(cube)
+    return cube
+
+def build_cube(data):
+    """
+    Aggregate the dataset once into (dimensions -> Quantity sum, Shipments count) cells.
+
+    Args:
+        data (pd.DataFrame): The preprocessed dataset.
+
+    Returns:
+        pd.DataFrame: One row per observed combination of CUBE_DIMENSIONS, with its yyyymm Period.
+    """
+    dimensions = [column for column in CUBE_DIMENSIONS if column in data.columns]
+    return register_lineage(aggregate_cells(data, dimensions), data, ("olap_cube", dimensions))
+
+def get_cube(data):
+    """
+    Return the cube for data, building it once per dataset.
+    """
+    return get_derived(data, "olap_cube", build_cube)
+
+@profiled(kind="filter")
+def get_filtered_cube(data, **filters):
+    """
+    Filter the cube cells with the same filters accepted by get_filtered_data.
+    """
+    return get_filtered_data(get_cube(data), **filters)
+
+def rollup(cube, by):
+    """
+    Roll the cube up to the given dimensions. Raw rows are accepted too (Quantity only).
+
+    Args:
+        cube (pd.DataFrame): Cube cells, possibly filtered.
+        by (str or list): Dimension(s) to keep.
+
+    Returns:
+        pd.DataFrame: Quantity and Shipments summed per combination of `by`.
+    """
+    measures = [measure for measure in CUBE_MEASURES if measure in cube.columns]
+    return cube.groupby(by, observed=True)[measures].sum().reset_index()
+
+def category_codes(values):
+    """
+    Integer codes and their values for a dimension column, reusing categorical codes when available.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
+
+def shipment_count(data):
+    """
+    Number of shipments in raw rows or cube cells.
+    """
+    if 'Shipments' in data.columns:
+        return int(data['Shipments'].sum())
+    return len(data)
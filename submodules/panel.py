@@ -0,0 +1,52 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from .memo_cache import memoize
+from .olap_cube import category_codes
+from .periods import index_to_period, period_codes, period_to_index
+
+TOTAL_LABEL = "Total"
+
+# Dense (entity x month) matrix of Quantity totals over a contiguous monthly axis
+Panel = namedtuple("Panel", ["entities", "periods", "values"])
+
+@memoize
+def build_panel(data, entity_column=None):
+    """
+    Aggregate the data once into a dense entity x month matrix.
+    Months without records are zero, so every row is a complete monthly series.
+
+    Args:
+        data (pd.DataFrame): Import records or cube cells with 'Year', 'Month' and 'Quantity'.
+        entity_column (str): Column defining the series, or None for a single total series.
+
+    Returns:
+        Panel: entities (pd.Index), periods (yyyymm keys, ascending and contiguous) and
+            values (float64 array of shape (entities, periods)).
+    """
+    periods = period_codes(data)
+    valid = periods >= 0
+    month_index = period_to_index(periods)
+    quantities = np.nan_to_num(data['Quantity'].to_numpy(dtype=float))
+
+    if entity_column is None:
+        codes, entities = np.zeros(len(data), dtype=np.int64), pd.Index([TOTAL_LABEL])
+    else:
+        codes, entities = category_codes(data[entity_column])
+        entities = pd.Index(entities)
+        valid &= codes >= 0
+
+    if not valid.any():
+        return Panel(pd.Index([]), np.empty(0, dtype=np.int64), np.empty((0, 0)))
+
+    month_index, codes, quantities = month_index[valid], codes[valid], quantities[valid]
+    first, last = month_index.min(), month_index.max()
+    n_periods = int(last - first + 1)
+    flat = codes.astype(np.int64) * n_periods + (month_index - first)
+    size = len(entities) * n_periods
+    values = np.bincount(flat, weights=quantities, minlength=size).reshape(len(entities), n_periods)
+
+    # Drop entities that never occur (unobserved categories)
+    present = np.bincount(codes, minlength=len(entities)) > 0
+    periods = index_to_period(np.arange(first, last + 1))
+    return Panel(entities[present], periods, values[present])
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+# Upper-case full names, 3-letter abbreviations and other common abbreviations -> month number
+MONTH_NUMBERS = {name.upper(): number for number, name in enumerate(MONTH_NAMES, start=1)}
+MONTH_NUMBERS.update({name[:3].upper(): number for number, name in enumerate(MONTH_NAMES, start=1)})
+MONTH_NUMBERS.update({"SEPT": 9})
+
+def _valid_months(numbers):
+    return np.where((numbers >= 1) & (numbers <= 12) & (numbers == np.floor(numbers)), numbers, np.nan)
+
+def _parse_month(value):
+    text = str(value).strip().upper().rstrip(".")
+    if text in MONTH_NUMBERS:
+        return MONTH_NUMBERS[text]
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+def month_numbers(values):
+    """
+    Convert a Month column holding month names or numbers to month numbers (1-12).
+    Names are matched case-insensitively, in full or abbreviated ("Jan", "Sept."), and
+    numeric strings ("1", "01") are accepted; anything else becomes NaN.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Map the categories once and take by code
+        lookup = np.append(month_numbers(pd.Series(values.cat.categories)), np.nan)
+        return lookup[values.cat.codes.to_numpy()]
+    if pd.api.types.is_numeric_dtype(values):
+        return _valid_months(values.to_numpy(dtype=float, na_value=np.nan))
+    # Parse each distinct value once and broadcast back to the rows
+    codes, uniques = pd.factorize(values)
+    parsed = np.append(_valid_months(np.array([_parse_month(value) for value in uniques], dtype=float)), np.nan)
+    return parsed[codes]
+
+def period_codes(data):
+    """
+    Integer period key (yyyymm) for every row, or -1 where Year or Month is missing.
+    Reads the 'Period' column derived at ingest when present.
+
+    Args:
+        data (pd.DataFrame): Data containing 'Period', or 'Year' and 'Month' columns.
+
+    Returns:
+        np.ndarray: int64 period keys.
+    """
+    if 'Period' in data.columns:
+        return data['Period'].to_numpy(dtype=np.int64)
+    years = data['Year'].to_numpy(dtype=float)
+    months = month_numbers(data['Month'])
+    periods = years * 100 + months
+    return np.where(np.isnan(periods), -1, periods).astype(np.int64)
+
+def period_to_index(periods):
+    """
+    Convert yyyymm keys to consecutive month indexes (year * 12 + month - 1).
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    return (periods // 100) * 12 + periods % 100 - 1
+
+def index_to_period(indexes):
+    """
+    Convert consecutive month indexes back to yyyymm keys.
+    """
+    indexes = np.asarray(indexes, dtype=np.int64)
+    return (indexes // 12) * 100 + indexes % 12 + 1
+
+def period_labels(periods):
+    """
+    Display labels such as "Jan 2024" for yyyymm keys.
+    """
+    return [f"{MONTH_NAMES[p % 100 - 1][:3]} {p // 100}" for p in np.asarray(periods, dtype=np.int64)]
+
+def month_label(month):
+    """
+    Display name of a month number (1-12).
+    """
+    return MONTH_NAMES[int(month) - 1]
+
+def period_index(periods):
+    """
+    pandas PeriodIndex (monthly) for yyyymm keys.
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    return pd.PeriodIndex.from_fields(year=periods // 100, month=periods % 100, freq="M")
@@ -0,0 +1,244 @@
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Lightweight production profiling.
+# Spans (ingestion, filtering, submodule calls, tab renders) record duration, rows in/out, RSS delta
+# and memoization hits/misses. Every finished span is written as one JSON line to PROFILE_LOG_FILE
+# (a size-capped, rotated file) and kept in a bounded in-memory buffer for the admin panel. Spans
+# opened while another is active (including on stage executor threads, which inherit the context)
+# nest under it, and all spans of one dashboard rerun share a run id so they can be drawn as a waterfall.
+
+PROFILING_ENABLED = os.environ.get("DASHBOARD_PROFILING", "1") != "0"
+PROFILE_LOG_FILE = os.environ.get("DASHBOARD_PROFILE_LOG", "profile.jsonl")
+PROFILE_LOG_MAX_BYTES = int(os.environ.get("DASHBOARD_PROFILE_LOG_MB", "50")) * 1024 ** 2  # Rotated at this size
+PROFILE_LOG_BACKUPS = 3  # Rotated files kept (profile.jsonl.1 ... .3)
+PROFILE_BUFFER_SIZE = 5000
+PERCENTILE_WINDOW = 500  # Most recent records per span name used for percentiles
+
+_CURRENT_SPAN = contextvars.ContextVar("profile_span", default=None)
+_RECORDS = deque(maxlen=PROFILE_BUFFER_SIZE)
+_LOCK = threading.Lock()
+_LOGGER = None
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _rss_bytes():
+    # Resident set size of the whole process (Linux); None where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _profile_logger():
+    global _LOGGER
+    if _LOGGER is None:
+        logger = logging.getLogger("dashboard.profile")
+        logger.propagate = False  # Keep JSON lines out of dashboard.log
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                PROFILE_LOG_FILE, maxBytes=PROFILE_LOG_MAX_BYTES, backupCount=PROFILE_LOG_BACKUPS,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _LOGGER = logger
+    return _LOGGER
+
+def _row_count(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return int(len(value))
+    return None
+
+class Span:
+    """
+    One timed operation. Set `rows_out` inside a profile_span block to record output size.
+    """
+
+    def __init__(self, name, kind, rows_in=None, parent=None, run_id=None, session=None):
+        self.name = name
+        self.kind = kind
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.parent = parent
+        self.run_id = run_id or (parent.run_id if parent is not None else None)
+        self.session = session or (parent.session if parent is not None else None)
+        self.run_start = parent.run_start if parent is not None else None
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.span_id = uuid.uuid4().hex[:12]
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def add_cache(self, hits, misses):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def _start(self):
+        self.started = time.perf_counter()
+        if self.run_start is None:
+            self.run_start = self.started
+        self.rss_before = _rss_bytes()
+
+    def _finish(self, error):
+        duration = time.perf_counter() - self.started
+        rss_after = _rss_bytes()
+        if self.parent is not None:
+            self.parent.add_cache(self.cache_hits, self.cache_misses)
+        record = {
+            "ts": time.time(),
+            "run_id": self.run_id,
+            "session": self.session,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "kind": self.kind,
+            "depth": self.depth,
+            "start_offset": self.started - self.run_start,
+            "duration": duration,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "memory_delta": rss_after - self.rss_before if rss_after is not None and self.rss_before is not None else None,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "thread": threading.current_thread().name,
+            "error": error,
+        }
+        with _LOCK:
+            _RECORDS.append(record)
+        try:
+            _profile_logger().info(json.dumps(record, default=str))
+        except Exception as e:
+            logging.error(f"Error writing profile record: {e}")
+
+class _SpanContext:
+    def __init__(self, name, kind, rows_in, run_id=None, session=None):
+        self.args = (name, kind, rows_in, run_id, session)
+
+    def __enter__(self):
+        if not PROFILING_ENABLED:
+            self.span = None
+            return None
+        name, kind, rows_in, run_id, session = self.args
+        parent = None if run_id is not None else _CURRENT_SPAN.get()
+        self.span = Span(name, kind, rows_in, parent, run_id, session)
+        self.token = _CURRENT_SPAN.set(self.span)
+        self.span._start()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is not None:
+            _CURRENT_SPAN.reset(self.token)
+            self.span._finish(f"{exc_type.__name__}: {exc}" if exc_type is not None else None)
+        return False
+
+def profile_span(name, kind="block", rows_in=None):
+    """
+    Context manager timing a block as a span nested under the active one.
+    Yields the Span (None when profiling is disabled).
+    """
+    return _SpanContext(name, kind, rows_in)
+
+def current_session_id():
+    """
+    Id of the Streamlit session running the current script, or None outside Streamlit.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+def profile_run(name, session=None):
+    """
+    Context manager opening a new top-level span (one dashboard rerun) with a fresh run id.
+    """
+    return _SpanContext(name, "run", None, run_id=uuid.uuid4().hex, session=session)
+
+def profiled(func=None, name=None, kind="function"):
+    """
+    Decorator recording each call as a span. Rows in are taken from a DataFrame first
+    argument and rows out from a DataFrame/Series/array result.
+    Apply it outside @memoize so cache hits are attributed to the call.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name, kind=kind)
+    span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILING_ENABLED:
+            return func(*args, **kwargs)
+        with profile_span(span_name, kind, _row_count(args[0]) if args else None) as span:
+            result = func(*args, **kwargs)
+            span.rows_out = _row_count(result)
+            return result
+
+    return wrapper
+
+def record_cache_access(hit):
+    """
+    Count a memoization hit or miss on the active span.
+    """
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.add_cache(1 if hit else 0, 0 if hit else 1)
+
+def recent_records(limit=None):
+    """
+    The most recent profile records, oldest first.
+    """
+    with _LOCK:
+        records = list(_RECORDS)
+    return records[-limit:] if limit else records
+
+def run_waterfall(run_id=None, session=None):
+    """
+    Spans of one rerun (the latest one, optionally of a session) ordered by start time.
+
+    Returns:
+        pd.DataFrame: name, kind, depth, start_offset, duration, rows, memory and cache columns.
+    """
+    records = recent_records()
+    if run_id is None:
+        runs = [r for r in records if r["kind"] == "run" and (session is None or r["session"] == session)]
+        if not runs:
+            return pd.DataFrame()
+        run_id = runs[-1]["run_id"]
+    spans = pd.DataFrame([r for r in records if r["run_id"] == run_id])
+    return spans.sort_values("start_offset", kind="stable").reset_index(drop=True) if not spans.empty else spans
+
+def rolling_percentiles(window=PERCENTILE_WINDOW, percentiles=(50, 90, 99)):
+    """
+    Duration percentiles (seconds) per span name over its most recent `window` records.
+
+    Returns:
+        pd.DataFrame: name, kind, count, p50/p90/p99, mean memory delta and cache hit rate,
+            slowest p90 first.
+    """
+    records = pd.DataFrame(recent_records())
+    if records.empty:
+        return records
+    rows = []
+    for (name, kind), group in records.groupby(["name", "kind"], sort=False):
+        group = group.tail(window)
+        durations = group["duration"].to_numpy()
+        row = {"name": name, "kind": kind, "count": len(group)}
+        row.update({f"p{p}": float(np.percentile(durations, p)) for p in percentiles})
+        row["mean_memory_delta_mb"] = group["memory_delta"].dropna().mean() / 1024 ** 2 if group["memory_delta"].notna().any() else None
+        lookups = group["cache_hits"].sum() + group["cache_misses"].sum()
+        row["cache_hit_rate"] = group["cache_hits"].sum() / lookups if lookups else None
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values(f"p{percentiles[1]}", ascending=False).reset_index(drop=True)
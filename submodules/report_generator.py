@@ -1,27 +1,291 @@
+import gzip
+import io
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from fpdf import FPDF
+from .contribution_tools import top_k_contributions
+from .growth_metrics import build_growth_panel
+from .olap_cube import rollup
+from .periods import period_labels
+from .profiling import profiled
 
-def download_csv(data):
+REPORT_TOP_K = 15
+REPORT_MAX_TREND_MONTHS = 36
+REPORT_JOB_MAX_AGE = 3600  # Seconds a finished report stays available for download
+MAX_REPORT_WORKERS = 2
+NEXT_LINE = {"new_x": "LMARGIN", "new_y": "NEXT"}  # fpdf cell(): move to the start of the next line
+
+# Background report rendering; jobs are kept per session until downloaded or expired
+_REPORT_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_REPORT_WORKERS, thread_name_prefix="report")
+_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+# Export formats: label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/octet-stream"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+EXPORT_CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_575  # Excel sheet limit minus the header row
+
+def _export_frame(data, columns):
+    if columns:
+        missing = [column for column in columns if column not in data.columns]
+        if missing:
+            raise ValueError(f"Missing export columns: {', '.join(missing)}")
+        return data[list(columns)]
+    return data
+
+def iter_csv_chunks(data, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yield the data as UTF-8 CSV in chunks of chunk_rows rows (header in the first chunk).
+    """
+    data = _export_frame(data, columns)
+    for start in range(0, max(len(data), 1), chunk_rows):
+        yield data.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+def _write_parquet(data, buffer, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(data.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(buffer, schema, compression="snappy") as writer:
+        for start in range(0, len(data), chunk_rows):
+            chunk = data.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+def _write_excel(data, buffer, chunk_rows):
+    from openpyxl import Workbook
+
+    if len(data) > EXCEL_MAX_ROWS:
+        raise ValueError(f"Too many rows for Excel ({len(data):,} > {EXCEL_MAX_ROWS:,}). Use CSV or Parquet.")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([str(column) for column in data.columns])
+    for start in range(0, len(data), chunk_rows):
+        chunk = data.iloc[start:start + chunk_rows].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(buffer)
+
+@profiled(kind="submodule")
+def export_data(data, export_format="CSV (gzip)", columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Serialize the selected columns in the chosen format, chunk by chunk, so no full-size
+    intermediate string is built.
+
+    Args:
+        data (pd.DataFrame): Data to export.
+        export_format (str): One of EXPORT_FORMATS.
+        columns (list): Columns to include (all when empty).
+        chunk_rows (int): Rows serialized per chunk.
+
+    Returns:
+        bytes: The exported file.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    data = _export_frame(data, columns)
+    buffer = io.BytesIO()
+    if export_format == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as compressed:
+            for chunk in iter_csv_chunks(data, chunk_rows=chunk_rows):
+                compressed.write(chunk)
+    elif export_format == "CSV":
+        for chunk in iter_csv_chunks(data, chunk_rows=chunk_rows):
+            buffer.write(chunk)
+    elif export_format == "Parquet":
+        _write_parquet(data, buffer, chunk_rows)
+    else:
+        _write_excel(data, buffer, chunk_rows)
+    return buffer.getvalue()
+
+def download_csv(data, columns=None):
     """
     Return CSV data for download.
     """
-    return data.to_csv(index=False)
+    return export_data(data, "CSV", columns=columns)
+
+def _pdf_text(value):
+    """
+    Text safe for the PDF core fonts (Latin-1 only).
+    """
+    return str(value).encode("latin-1", "replace").decode("latin-1")
+
+def _heading(pdf, text):
+    pdf.set_font("Helvetica", style="B", size=14)
+    pdf.cell(0, 10, text=_pdf_text(text), **NEXT_LINE)
+    pdf.set_font("Helvetica", size=10)
+
+def _table(pdf, table, widths, formats):
+    """
+    Draw a DataFrame as a simple bordered table.
+    """
+    pdf.set_font("Helvetica", style="B", size=9)
+    for column, width in zip(table.columns, widths):
+        pdf.cell(width, 7, text=_pdf_text(column), border=1)
+    pdf.ln()
+    pdf.set_font("Helvetica", size=9)
+    for row in table.itertuples(index=False):
+        for value, width, fmt in zip(row, widths, formats):
+            text = fmt.format(value) if fmt else str(value)
+            pdf.cell(width, 6, text=_pdf_text(text)[:60], border=1)
+        pdf.ln()
+    pdf.ln(4)
+
+def _bar_chart(pdf, labels, values, title, height=70):
+    """
+    Draw a vertical bar chart with PDF primitives.
+    """
+    _heading(pdf, title)
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    if not len(values):
+        pdf.cell(0, 8, text="No data.", **NEXT_LINE)
+        return
+    peak = values.max() if values.max() > 0 else 1.0
+    pdf.set_font("Helvetica", size=8)
+    pdf.cell(0, 5, text=f"Peak: {peak:,.0f} Kgs", **NEXT_LINE)
+    left, top = pdf.l_margin, pdf.get_y() + 2
+    width = pdf.w - pdf.l_margin - pdf.r_margin
+    bar_width = width / len(values)
+
+    pdf.set_fill_color(68, 114, 196)
+    for i, value in enumerate(values):
+        bar_height = height * max(value, 0) / peak
+        pdf.rect(left + i * bar_width + bar_width * 0.1, top + height - bar_height,
+                 bar_width * 0.8, bar_height, style="F")
+    pdf.line(left, top + height, left + width, top + height)
 
-def generate_pdf_report(data, metrics):
+    # Label every nth bar so labels never overlap
+    pdf.set_font("Helvetica", size=6)
+    step = max(1, int(np.ceil(len(labels) * 12 / width)))
+    for i in range(0, len(labels), step):
+        pdf.set_xy(left + i * bar_width, top + height + 1)
+        pdf.cell(bar_width * step, 4, text=_pdf_text(labels[i])[:12])
+    pdf.set_xy(left, top + height + 8)
+    pdf.set_font("Helvetica", size=10)
+
+@profiled(kind="submodule")
+def generate_pdf_report(data, metrics, progress=None):
     """
-    Generate a PDF report with key metrics and insights.
+    Generate a multi-page PDF report with key metrics, top-K tables and trend/state charts.
+    Everything is read from the cube cells and memoized aggregates, and rendered in memory.
+
+    Args:
+        data (pd.DataFrame): The filtered data or cube cells.
+        metrics (KPIResult): Metrics from key_metrics.calculate_kpis.
+        progress (callable): Optional callback(fraction, message).
+
+    Returns:
+        bytes: The PDF document.
     """
+    from fpdf import FPDF
+
+    progress = progress or (lambda fraction, message: None)
     pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    # Page 1: Key metrics
+    progress(0.1, "Key metrics")
     pdf.add_page()
-    pdf.set_font("Arial", size=12)
-
-    # Add Metrics
-    pdf.cell(200, 10, txt="Market Overview Report", ln=True, align='C')
-    pdf.cell(200, 10, txt=f"Total Imports: {metrics['total_imports']:,.0f} Kgs", ln=True)
-    pdf.cell(200, 10, txt=f"Total Shipments: {metrics['total_shipments']}", ln=True)
-    pdf.cell(200, 10, txt=f"Year-over-Year Growth: {metrics['yoy_growth']:.2f}%", ln=True)
-
-    # Save and return the report
-    file_path = "Market_Overview_Report.pdf"
-    pdf.output(file_path)
-    return file_path
+    pdf.set_font("Helvetica", style="B", size=18)
+    pdf.cell(0, 12, text="Market Overview Report", align='C', **NEXT_LINE)
+    pdf.set_font("Helvetica", size=9)
+    pdf.cell(0, 6, text=f"Generated {time.strftime('%Y-%m-%d %H:%M')}", align='C', **NEXT_LINE)
+    pdf.ln(6)
+    _heading(pdf, "Key Metrics")
+    for label, value in [
+        ("Total Imports", f"{metrics.total_imports:,.0f} Kgs"),
+        ("Total Shipments", f"{metrics.total_shipments:,}"),
+        ("Year-over-Year Growth", f"{metrics.yoy_growth:.2f}%"),
+        ("Month-over-Month Growth", f"{metrics.mom_growth:.2f}%"),
+        ("Unique Importers", f"{metrics.unique_importers:,}"),
+        ("Unique Exporters", f"{metrics.unique_exporters:,}"),
+        ("Unique States", f"{metrics.unique_states:,}"),
+        ("Top Importer", metrics.top_importer),
+        ("Top Exporter", metrics.top_exporter),
+        ("Top State", metrics.top_state),
+    ]:
+        pdf.cell(70, 7, text=_pdf_text(label), border=1)
+        pdf.cell(0, 7, text=_pdf_text(value), border=1, **NEXT_LINE)
+
+    # Page 2: Trend chart
+    progress(0.3, "Monthly trend")
+    pdf.add_page()
+    growth = build_growth_panel(data)
+    periods = growth.periods[-REPORT_MAX_TREND_MONTHS:]
+    totals = growth.values[0, -REPORT_MAX_TREND_MONTHS:] if growth.values.size else []
+    _bar_chart(pdf, period_labels(periods), totals, "Monthly Imports")
+
+    # State chart
+    progress(0.5, "State contributions")
+    states = rollup(data, 'State').sort_values('Quantity', ascending=False).head(REPORT_TOP_K)
+    _bar_chart(pdf, states['State'].astype(str).tolist(), states['Quantity'], "Top States by Imports")
+
+    # Pages 3+: Top-K tables
+    formats = [None, "{:,.0f}", "{:.2f}", "{:.2f}"]
+    widths = [80, 40, 30, 40]
+    for fraction, column, title in [(0.7, 'Consignee Name', "Top Importers"), (0.85, 'Exporter Name', "Top Exporters")]:
+        progress(fraction, title)
+        pdf.add_page()
+        _heading(pdf, title)
+        _table(pdf, top_k_contributions(data, column, k=REPORT_TOP_K), widths, formats)
+
+    progress(1.0, "Done")
+    return bytes(pdf.output())
+
+def submit_report_job(session_id, data, metrics):
+    """
+    Render a report in a background worker.
+
+    Returns:
+        str: Job ID to poll with get_report_job.
+    """
+    job_id = uuid.uuid4().hex
+    job = {"session_id": session_id, "status": "queued", "progress": 0.0, "message": "Queued",
+           "result": None, "error": None, "submitted": time.time()}
+    with _JOBS_LOCK:
+        _JOBS[job_id] = job
+
+    def update(fraction, message):
+        job["progress"], job["message"] = fraction, message
+
+    def render():
+        job["status"] = "running"
+        try:
+            job["result"] = generate_pdf_report(data, metrics, progress=update)
+            job["status"] = "done"
+        except Exception as e:
+            logging.error(f"Error generating PDF report: {e}")
+            job["error"], job["status"] = str(e), "failed"
+
+    _REPORT_EXECUTOR.submit(render)
+    cleanup_report_jobs()
+    return job_id
+
+def get_report_job(job_id, session_id):
+    """
+    Return the job's state (status, progress, message, result, error), or None if unknown
+    or owned by another session.
+    """
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+    if job is None or job["session_id"] != session_id:
+        return None
+    return dict(job)
+
+def cleanup_report_jobs(max_age=REPORT_JOB_MAX_AGE):
+    """
+    Drop finished jobs older than max_age seconds.
+    """
+    now = time.time()
+    with _JOBS_LOCK:
+        for job_id in [k for k, job in _JOBS.items()
+                       if job["status"] in ("done", "failed") and now - job["submitted"] > max_age]:
+            del _JOBS[job_id]
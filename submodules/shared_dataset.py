@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+from .dataset_registry import set_derived
+
+# Read-only datasets shared by every session of the server.
+# A published dataset is written once as an Arrow IPC file and served from a memory map, so its
+# column buffers live in the OS page cache: every session in this process gets the same DataFrame
+# object, and other server processes mapping the same file share the same physical pages.
+# Buffers are read-only, so code handed a shared dataset must never modify it in place.
+# Float columns are written with NaN kept as values rather than Arrow nulls: a column with nulls
+# cannot be mapped zero-copy, pandas copies it into a new (writeable) array to fill the NaN back in.
+
+SHARED_DIR = ".shared_datasets"
+SHARED_MAX_DATASETS = 4  # DataFrames kept alive in this process (least recently used dropped)
+SHARED_MAX_BYTES = 2 * 1024 ** 3  # 2 GB of Arrow files on disk
+SHARED_MAX_AGE = 30 * 24 * 3600  # 30 days
+ATTRS_METADATA_KEY = b"dashboard_attrs"
+SHARED_FORMAT_VERSION = 2  # Bump when the file layout changes so old files are not mapped
+
+_SHARED = OrderedDict()
+_LOCK = threading.Lock()
+
+def _shared_path(key, shared_dir):
+    return os.path.join(shared_dir, f"{key}-v{SHARED_FORMAT_VERSION}.arrow")
+
+def _nan_as_values(table, data):
+    import pyarrow as pa
+
+    for i, name in enumerate(table.column_names):
+        dtype = data[name].dtype
+        if isinstance(dtype, np.dtype) and dtype.kind == "f":
+            table = table.set_column(i, table.field(i), pa.array(data[name].to_numpy(), from_pandas=False))
+    return table
+
+def copied_columns(data):
+    """
+    Numeric columns of a mapped dataset that are not backed by the read-only memory map.
+    """
+    return [column for column in data.columns
+            if isinstance(data[column].dtype, np.dtype) and data[column].dtype.kind in "biuf"
+            and data[column].to_numpy().flags.writeable]
+
+def _remember(key, data):
+    with _LOCK:
+        _SHARED[key] = data
+        _SHARED.move_to_end(key)
+        while len(_SHARED) > SHARED_MAX_DATASETS:
+            _SHARED.popitem(last=False)
+    return data
+
+def _map_dataset(key, shared_dir):
+    import pyarrow as pa
+
+    with pa.memory_map(_shared_path(key, shared_dir), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps each column in its own block so null-free numeric columns stay zero-copy
+    data = table.to_pandas(split_blocks=True)
+    metadata = table.schema.metadata or {}
+    if ATTRS_METADATA_KEY in metadata:
+        data.attrs.update(json.loads(metadata[ATTRS_METADATA_KEY]))
+    copied = copied_columns(data)
+    if copied:
+        logging.warning(f"Shared dataset {key}: columns {copied} were copied instead of memory-mapped")
+    # The key identifies the content, so the registry never needs to rehash the rows
+    set_derived(data, "fingerprint", key)
+    return data
+
+def publish_dataset(key, data, shared_dir=SHARED_DIR):
+    """
+    Publish a dataset for sharing and return the shared, memory-mapped instance.
+
+    Args:
+        key (str): Content key of the dataset (e.g. the ingestion fingerprint).
+        data (pd.DataFrame): The dataset; it is written once and not retained.
+        shared_dir (str): Directory of the Arrow IPC files.
+
+    Returns:
+        pd.DataFrame: The read-only shared instance to use instead of data.
+    """
+    import pyarrow as pa
+
+    try:
+        path = _shared_path(key, shared_dir)
+        if not os.path.exists(path):
+            os.makedirs(shared_dir, exist_ok=True)
+            table = _nan_as_values(pa.Table.from_pandas(data, preserve_index=False), data)
+            attrs = json.dumps(data.attrs, default=str).encode("utf-8")
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), ATTRS_METADATA_KEY: attrs})
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+            logging.info(f"Published shared dataset {key}: {len(data):,} rows")
+        shared = get_shared_dataset(key, shared_dir)
+        evict_shared_datasets(shared_dir)
+        return shared
+    except Exception as e:
+        logging.error(f"Error publishing shared dataset {key}: {e}")
+        raise ValueError(f"Error publishing shared dataset: {e}")
+
+def get_shared_dataset(key, shared_dir=SHARED_DIR):
+    """
+    Return the shared instance of a published dataset, or None if it was never published.
+    """
+    with _LOCK:
+        data = _SHARED.get(key)
+        if data is not None:
+            _SHARED.move_to_end(key)
+            return data
+    path = _shared_path(key, shared_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        data = _remember(key, _map_dataset(key, shared_dir))
+        os.utime(path)  # Refresh age so frequently used datasets survive eviction
+        return data
+    except Exception as e:
+        logging.error(f"Error mapping shared dataset {key}: {e}")
+        return None
+
+def release_dataset(key, shared_dir=SHARED_DIR, remove_file=False):
+    """
+    Drop this process's reference to a shared dataset, optionally deleting its file.
+    Sessions still holding the DataFrame keep their memory map until they release it.
+    """
+    with _LOCK:
+        _SHARED.pop(key, None)
+    if remove_file:
+        try:
+            os.remove(_shared_path(key, shared_dir))
+        except OSError:
+            pass
+
+def evict_shared_datasets(shared_dir=SHARED_DIR, max_bytes=SHARED_MAX_BYTES, max_age=SHARED_MAX_AGE):
+    """
+    Remove published files older than max_age, then the least recently used ones until under
+    max_bytes. Datasets currently mapped by this process are never removed; sessions of other
+    processes still holding a removed dataset keep their memory map (the file is only unlinked).
+    """
+    if not os.path.isdir(shared_dir):
+        return []
+    with _LOCK:
+        mapped = {os.path.basename(_shared_path(key, shared_dir)) for key in _SHARED}
+    entries = []
+    for name in os.listdir(shared_dir):
+        if name.endswith(".arrow"):
+            stat = os.stat(os.path.join(shared_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    now = time.time()
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    evicted = []
+    for mtime, size, name in entries:
+        if name in mapped or (now - mtime <= max_age and total_bytes <= max_bytes):
+            continue
+        try:
+            os.remove(os.path.join(shared_dir, name))
+            total_bytes -= size
+            evicted.append(name)
+        except OSError as e:
+            logging.error(f"Error evicting shared dataset {name}: {e}")
+    if evicted:
+        logging.info(f"Shared datasets evicted {len(evicted)} files")
+    return evicted
@@ -1,50 +1,247 @@
-def get_smart_alerts(data):
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+from .memo_cache import MemoCache, memoize
+from .growth_metrics import ROLLING_WINDOW, build_growth_panel
+from .panel import TOTAL_LABEL
+from .profiling import profiled
+
+# Alert thresholds and rules live next to states.json at the project root
+ALERT_RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alert_rules.json")
+ALERTS_PAGE_SIZE = 50
+ALERT_COLUMNS = ['Entity Type', 'Entity', 'Period', 'Rule', 'Feature', 'Value', 'Threshold', 'Message']
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+# Rule features -> GrowthPanel matrices; only (entity x month) matrices can be compared per period
+ALERT_FEATURES = {
+    "quantity": "values",
+    "mom_change": "mom_change",
+    "mom_growth": "mom_growth",
+    "yoy_change": "yoy_change",
+    "yoy_growth": "yoy_growth",
+    "rolling_growth": "rolling_growth",
+}
+
+# Months before the evaluated month (0 = the month itself) each feature reads
+FEATURE_LAGS = {
+    "quantity": (0,),
+    "mom_change": (0, 1),
+    "mom_growth": (0, 1),
+    "yoy_change": (0, 12),
+    "yoy_growth": (0, 12),
+    # Growth of the window sum over t-w+1..t against the previous window t-2w+1..t-w
+    "rolling_growth": tuple(range(2 * ROLLING_WINDOW)),
+}
+
+# Alert records per (entity level, rules, period inputs) so unchanged periods are not re-evaluated
+_PERIOD_CACHE = MemoCache(max_bytes=64 * 1024 ** 2)
+
+def validate_alert_config(config):
     """
-    Generate smart alerts based on import data.
-    Includes alerts for low imports, abnormal growth, and declining trends.
-    
-    Args:
-        data (pd.DataFrame): Preprocessed import data.
-    
+    Check that every rule uses a known operator and feature, so a typo fails when the
+    rules are loaded rather than while the alerts tab renders.
+    """
+    for rule in config["rules"]:
+        if rule["operator"] not in OPERATORS:
+            raise ValueError(f"Unknown operator '{rule['operator']}' in rule '{rule['name']}'")
+        if rule["feature"] not in ALERT_FEATURES:
+            raise ValueError(f"Unknown feature '{rule['feature']}' in rule '{rule['name']}' "
+                             f"(expected one of: {', '.join(ALERT_FEATURES)})")
+    return config
+
+def load_alert_config(path=ALERT_RULES_FILE):
+    """
+    Load alert rules and the entity levels they are evaluated at.
+
     Returns:
-        list: A list of alert messages.
+        dict: {"entity_columns": [...], "rules": [...]}
     """
-    alerts = []
-    
     try:
-        # Ensure required columns are present
-        required_columns = ['Quantity', 'YoY Growth']
-        missing_columns = [col for col in required_columns if col not in data.columns]
-        if missing_columns:
-            raise ValueError(f"Missing required columns for alerts: {', '.join(missing_columns)}")
-        
-        # Alert 1: Low import quantities
-        low_imports_threshold = 1000  # Threshold for low imports
-        low_imports = data[data['Quantity'] < low_imports_threshold]
-        if not low_imports.empty:
-            alerts.append(f"⚠️ Low import quantities detected for {len(low_imports)} entries. Check products or suppliers.")
-
-        # Alert 2: High Year-over-Year (YoY) Growth
-        yoy_growth_threshold = 30  # YoY growth threshold
-        high_growth_alerts = data[data['YoY Growth'] > yoy_growth_threshold]
-        if not high_growth_alerts.empty:
-            alerts.append(f"🚀 High YoY growth detected for {len(high_growth_alerts)} entries. Review market demand.")
-
-        # Alert 3: Declining imports (negative YoY Growth)
-        declining_growth_alerts = data[data['YoY Growth'] < -20]  # Decline threshold: -20%
-        if not declining_growth_alerts.empty:
-            alerts.append(f"🔻 Declining imports detected for {len(declining_growth_alerts)} entries. Investigate reasons.")
-
-        # Alert 4: Sudden drops in monthly imports
-        monthly_totals = data.groupby(['Year', 'Month'])['Quantity'].sum().reset_index()
-        if len(monthly_totals) > 1:
-            monthly_totals['Change'] = monthly_totals['Quantity'].diff()
-            sudden_drops = monthly_totals[monthly_totals['Change'] < -10000]  # Example threshold: -10,000
-            if not sudden_drops.empty:
-                alerts.append(f"📉 Sudden drops in monthly imports detected in {len(sudden_drops)} months. Review data.")
-
-        # Return all generated alerts
-        return alerts if alerts else ["✅ No critical alerts detected."]
-    
+        with open(path, encoding="utf-8") as file:
+            return validate_alert_config(json.load(file))
     except Exception as e:
-        return [f"❌ Error generating alerts: {str(e)}"]
+        logging.error(f"Error loading alert rules from {path}: {e}")
+        raise ValueError(f"Error loading alert rules: {e}")
+
+def _selected_periods(periods, months=None, years=None):
+    """
+    Whether each yyyymm key passes the Month and Year filters (an empty selection means all).
+    """
+    selected = np.ones(len(periods), dtype=bool)
+    if months:
+        selected &= np.isin(periods % 100, np.asarray(months, dtype=np.int64))
+    if years:
+        selected &= np.isin(periods // 100, np.asarray(years, dtype=np.int64))
+    return selected
+
+def _readable(selected, lags):
+    """
+    Per panel column, whether every month a feature with these lags reads there is selected.
+    Lags reaching before the first month are ignored; the feature is NaN there anyway.
+    """
+    readable = selected.copy()
+    for lag in lags:
+        if 0 < lag < len(selected):
+            readable[lag:] &= selected[:-lag]
+    return readable
+
+def _period_keys(panel, rules_key, level, lags, selected):
+    """
+    Cache key per period covering every month its rules' features read (the given lags),
+    keyed by entity so new entities do not invalidate others. Months outside the selection
+    are keyed as masked rather than by their (zero) contents.
+    """
+    column_hashes = []
+    for column, is_selected in zip(panel.values.T, selected):
+        if not is_selected:
+            column_hashes.append("masked")
+            continue
+        active = np.nonzero(column)[0]
+        digest = hashlib.sha256(np.asarray(panel.entities[active].astype(str)).astype("U").tobytes())
+        digest.update(column[active].tobytes())
+        column_hashes.append(digest.hexdigest())
+    keys = []
+    for t, period in enumerate(panel.periods):
+        inputs = tuple(column_hashes[t - lag] if t >= lag else "" for lag in lags)
+        keys.append((level, rules_key, int(period), inputs))
+    return keys
+
+def _evaluate_rules(panel, rules, level, columns, selected):
+    """
+    Evaluate every rule over all entities for the given panel columns in one vectorized pass.
+    Rule features are the growth engine's (entity x month) matrices ("quantity" is the monthly total);
+    a rule is only evaluated where every month its feature reads is selected.
+
+    Returns:
+        tuple: (dict of panel column -> DataFrame of its alert records, approximate bytes per record)
+    """
+    columns = np.asarray(columns)
+    active = panel.values[:, columns] > 0
+    parts = []
+    for rule in rules:
+        feature = getattr(panel, ALERT_FEATURES[rule["feature"]])[:, columns]
+        with np.errstate(invalid="ignore"):
+            hits = OPERATORS[rule["operator"]](feature, rule["threshold"]) & ~np.isnan(feature)
+        if rule.get("active_only"):
+            hits &= active
+        hits &= _readable(selected, FEATURE_LAGS[rule["feature"]])[columns]
+        rows, cols = np.nonzero(hits)
+        if len(rows):
+            parts.append(pd.DataFrame({
+                'Entity Type': level,
+                'Entity': np.asarray(panel.entities)[rows],
+                'Period': panel.periods[columns[cols]].astype(np.int64),
+                'Rule': rule["name"],
+                'Feature': rule["feature"],
+                'Value': feature[rows, cols].astype(float),
+                'Threshold': rule["threshold"],
+                'Message': rule.get("message", rule["name"]),
+                'column': cols,
+            }))
+
+    if not parts:
+        empty = pd.DataFrame(columns=ALERT_COLUMNS)
+        return {column: empty for column in columns}, 0
+    # Split the records by panel column, keeping rule order within each period
+    records = pd.concat(parts, ignore_index=True)
+    record_columns = records.pop('column').to_numpy()
+    order = np.argsort(record_columns, kind="stable")
+    bounds = np.searchsorted(record_columns[order], np.arange(len(columns) + 1))
+    records = records.iloc[order].reset_index(drop=True)
+    row_bytes = int(records.memory_usage(deep=True).sum()) // len(records)
+    return {column: records.iloc[bounds[i]:bounds[i + 1]] for i, column in enumerate(columns)}, row_bytes
+
+@profiled(kind="submodule")
+@memoize
+def get_smart_alerts(data, config=None, months=None, years=None):
+    """
+    Generate smart alerts based on import data.
+    Evaluates the configured rules (low imports, abnormal growth, declining trends, sudden
+    drops, ...) for every entity and month. Growth features are computed from the data, and
+    only periods whose inputs changed since the last evaluation are re-evaluated.
+
+    Months removed by the Month/Year filters appear in the monthly panel as zero imports, so
+    they are masked: a rule is only evaluated for a month when every month its feature reads
+    (the month before, a year before, the rolling windows) is selected.
+
+    Args:
+        data (pd.DataFrame): Preprocessed import data or cube cells.
+        config (dict): Rules and entity levels; defaults to alert_rules.json.
+        months (list): Month numbers selected by the Month filter; None or empty for all.
+        years (list): Years selected by the Year filter; None or empty for all.
+
+    Returns:
+        pd.DataFrame: Alert records (Entity Type, Entity, Period, Rule, Feature, Value,
+            Threshold, Message), latest periods first and largest magnitude first within a period.
+    """
+    config = validate_alert_config(config) if config else load_alert_config()
+    rules = config["rules"]
+    rules_key = hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+    lags = sorted({lag for rule in rules for lag in FEATURE_LAGS[rule["feature"]]} | {0})
+
+    records = []
+    for entity_column in config.get("entity_columns", [None]):
+        if entity_column is not None and entity_column not in data.columns:
+            continue
+        level = entity_column or TOTAL_LABEL
+        panel = build_growth_panel(data, entity_column)
+        if panel.values.size == 0:
+            continue
+
+        selected = _selected_periods(panel.periods, months, years)
+        keys = _period_keys(panel, rules_key, level, lags, selected)
+        stale = []
+        for column, key in enumerate(keys):
+            hit, cached = _PERIOD_CACHE.get(key)
+            if hit:
+                records.append(cached)
+            else:
+                stale.append(column)
+        if stale:
+            evaluated, row_bytes = _evaluate_rules(panel, rules, level, stale, selected)
+            for column in stale:
+                # Sized from the whole evaluation; measuring each small frame would dominate the cost
+                _PERIOD_CACHE.put(keys[column], evaluated[column], nbytes=row_bytes * len(evaluated[column]))
+                records.append(evaluated[column])
+
+    records = [frame for frame in records if len(frame)]
+    alerts = pd.concat(records, ignore_index=True) if records else pd.DataFrame(columns=ALERT_COLUMNS)
+    return sort_alerts(alerts)
+
+def sort_alerts(alerts, by="Period"):
+    """
+    Sort alert records by period (latest first) or by magnitude, largest first.
+    """
+    magnitude = alerts['Value'].abs()
+    if by == "Magnitude":
+        order = np.lexsort((-alerts['Period'].to_numpy(), -magnitude.to_numpy()))
+    else:
+        order = np.lexsort((-magnitude.to_numpy(), -alerts['Period'].to_numpy()))
+    return alerts.iloc[order].reset_index(drop=True)
+
+def page_alerts(alerts, page=1, page_size=ALERTS_PAGE_SIZE):
+    """
+    Return one page of alert records (pages start at 1) and the number of pages.
+    """
+    pages = max(1, -(-len(alerts) // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return alerts.iloc[start:start + page_size], pages
+
+def summarize_alerts(alerts):
+    """
+    One headline message per rule with the number of alerts it raised.
+    """
+    if alerts.empty:
+        return []
+    counts = alerts.groupby(['Rule', 'Message'], sort=False).size()
+    return [f"{message} ({count:,} alerts: {rule})" for (rule, message), count in counts.items()]
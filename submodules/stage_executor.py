@@ -0,0 +1,168 @@
+import contextvars
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Per-stage timeout, counted from when the stage starts on a worker; a stage that overruns is
+# reported as timed out and left to finish in the background
+STAGE_TIMEOUT_SECONDS = 60
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Threads rather than processes: stages share the loaded frames, and the heavy numpy/pandas
+# kernels release the GIL, so nothing has to be pickled across process boundaries.
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dashboard-stage")
+
+# One long-lived process pool for CPU-bound pure-Python work (Excel parsing).
+# Workers come from a forkserver (spawn where unavailable): forking the multithreaded Streamlit
+# server directly can deadlock on locks held by other threads at fork time.
+PROCESS_POOL_WORKERS = os.cpu_count() or 1
+_PROCESS_POOL = None
+_PROCESS_POOL_LOCK = threading.Lock()
+
+# Keyed stages still running, by key: a stage that timed out keeps running in the background,
+# and the next rerun of the same stage joins it instead of starting a duplicate
+_IN_FLIGHT = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+StageResult = namedtuple("StageResult", ["name", "value", "error", "timed_out", "wall_time", "cpu_time"])
+
+def _timed_call(func, args, starts, name):
+    cpu_start = time.thread_time()
+    wall_start = starts[name] = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - wall_start, time.thread_time() - cpu_start
+
+def _forget_stage(key, future):
+    with _IN_FLIGHT_LOCK:
+        if _IN_FLIGHT.get(key) is future:
+            del _IN_FLIGHT[key]
+
+def _submit_stage(name, func, args, key, starts):
+    """
+    Submit a stage, or join the in-flight future already computing the same key.
+
+    Returns:
+        tuple: (future, joined) where joined is True for an in-flight future of an earlier run.
+    """
+    with _IN_FLIGHT_LOCK:
+        if key is not None and key in _IN_FLIGHT:
+            return _IN_FLIGHT[key], True
+        # Each stage runs in a copy of the caller's context, so profiling spans nest under the rerun
+        future = _EXECUTOR.submit(contextvars.copy_context().run, _timed_call, func, args, starts, name)
+        if key is not None:
+            _IN_FLIGHT[key] = future
+    if key is not None:
+        future.add_done_callback(lambda done: _forget_stage(key, done))
+    return future, False
+
+def run_stages(stages, timeout=STAGE_TIMEOUT_SECONDS):
+    """
+    Run independent stages concurrently and time each of them.
+
+    Args:
+        stages (dict): Stage name -> (callable, args tuple) or (callable, args tuple, key). A keyed
+            stage that is still running from an earlier call (e.g. after timing out) is joined
+            rather than started again; its timeout then counts from when this call joined it.
+        timeout (float): Seconds each stage may run, from when it starts on a worker, before it
+            is reported as timed out. Unkeyed stages still queued `timeout` seconds after
+            submission (all workers busy) are cancelled and reported as timed out too; keyed
+            ones stay queued for the next call to join.
+
+    Returns:
+        dict: Stage name -> StageResult(name, value, error, timed_out, wall_time, cpu_time).
+            Failed and timed-out stages have value None; wall_time is measured on the worker
+            for completed stages and since the stage started (or was queued) otherwise.
+    """
+    submitted = time.perf_counter()
+    starts = {}
+    futures = {}
+    keyed = set()
+    for name, stage in stages.items():
+        func, args, key = stage if len(stage) == 3 else (*stage, None)
+        futures[name], joined = _submit_stage(name, func, args, key, starts)
+        if joined:
+            logging.info(f"Stage '{name}' is still running from an earlier run; waiting for it")
+            starts[name] = submitted
+        if key is not None:
+            keyed.add(name)
+
+    pending = dict(futures)
+    timed_out = set()
+    while pending:
+        now = time.perf_counter()
+        deadlines = {name: starts.get(name, submitted) + timeout for name in pending}
+        for name, deadline in deadlines.items():
+            if now >= deadline:
+                timed_out.add(name)
+                del pending[name]
+        if pending:
+            done, _ = wait(pending.values(), timeout=min(deadlines[name] for name in pending) - now,
+                           return_when=FIRST_COMPLETED)
+            pending = {name: future for name, future in pending.items() if future not in done}
+
+    results = {}
+    for name, future in futures.items():
+        if name in timed_out and not future.done():
+            if name not in keyed:
+                future.cancel()  # Only drops stages still queued; running ones finish in the background
+            logging.warning(f"Stage '{name}' timed out after {timeout}s")
+            results[name] = StageResult(name, None, None, True, time.perf_counter() - starts.get(name, submitted), None)
+            continue
+        try:
+            value, wall_time, cpu_time = future.result()
+            results[name] = StageResult(name, value, None, False, wall_time, cpu_time)
+        except Exception as e:
+            logging.error(f"Error in stage '{name}': {e}")
+            results[name] = StageResult(name, None, e, False, time.perf_counter() - starts.get(name, submitted), None)
+    return results
+
+def timings_table(results):
+    """
+    Wall-clock and CPU seconds per stage, as rows for st.dataframe.
+    """
+    return [
+        {
+            "Stage": result.name,
+            "Wall (s)": round(result.wall_time, 3),
+            "CPU (s)": round(result.cpu_time, 3) if result.cpu_time is not None else None,
+            "Status": "timed out" if result.timed_out else ("error" if result.error else "ok"),
+        }
+        for result in results.values()
+    ]
+
+def get_process_pool():
+    """
+    Return the shared process pool, creating it on first use.
+    """
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _PROCESS_POOL = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS, mp_context=context)
+        return _PROCESS_POOL
+
+def submit_to_process_pool(func, *args):
+    """
+    Submit a call to the shared process pool. A pool broken by a dead worker is replaced
+    with a new one and the call submitted again.
+
+    Returns:
+        concurrent.futures.Future: Future of func(*args).
+    """
+    global _PROCESS_POOL
+    pool = get_process_pool()
+    try:
+        return pool.submit(func, *args)
+    except BrokenProcessPool:
+        logging.warning("Process pool is broken; starting a new one")
+        with _PROCESS_POOL_LOCK:
+            if _PROCESS_POOL is pool:
+                _PROCESS_POOL = None
+        pool.shutdown(wait=False)
+        return get_process_pool().submit(func, *args)
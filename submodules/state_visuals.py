@@ -1,6 +1,10 @@
-import plotly.express as px
 import pandas as pd
+from .periods import month_label
+from .chart_rendering import memoize_figure
+from .profiling import profiled
 
+@profiled(kind="submodule")
+@memoize_figure
 def plot_state_contributions(data):
     """
     Plot state contributions as a bar chart.
@@ -11,8 +15,10 @@ def plot_state_contributions(data):
     Returns:
         fig (plotly.graph_objs.Figure): A Plotly figure object.
     """
+    import plotly.express as px
+
     # Aggregate data by state and sum the quantities
-    state_data = data.groupby('State')['Quantity'].sum().reset_index()
+    state_data = data.groupby('State', observed=True)['Quantity'].sum().reset_index()
     
     # Create a bar chart
     fig = px.bar(state_data, x='State', y='Quantity', 
@@ -25,6 +31,8 @@ def plot_state_contributions(data):
     return fig
 
 
+@profiled(kind="submodule")
+@memoize_figure
 def plot_state_heatmap(data):
     """
     Plot a heatmap of state contributions over time (Month).
@@ -35,11 +43,14 @@ def plot_state_heatmap(data):
     Returns:
         fig (plotly.graph_objs.Figure): A Plotly figure object.
     """
+    import plotly.express as px
+
     # Aggregate data by state and month
-    state_month_data = data.groupby(['State', 'Month'])['Quantity'].sum().reset_index()
+    state_month_data = data.groupby(['State', 'Month'], observed=True)['Quantity'].sum().reset_index()
     
-    # Pivot data for heatmap format
+    # Pivot data for heatmap format; month numbers become names only for display
     heatmap_data = state_month_data.pivot(index='State', columns='Month', values='Quantity')
+    heatmap_data.columns = [month_label(month) for month in heatmap_data.columns]
     
     # Create a heatmap
     fig = px.imshow(heatmap_data, title="State Contributions Heatmap",
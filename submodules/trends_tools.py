@@ -1,10 +1,16 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
+from .chart_rendering import memoize_figure
+from .contribution_tools import TOP_K, cap_categories
+from .periods import MONTH_NAMES, month_label, period_codes
+from .profiling import profiled
 
+@profiled(kind="submodule")
+@memoize_figure
 def get_monthly_trends(data):
     """
     Generate a line chart for monthly trends of imports.
-    Data should contain 'Date' and 'Quantity' columns.
+    Data should contain 'Period' (or 'Year' and 'Month') and 'Quantity' columns.
 
     Args:
         data (pd.DataFrame): The data containing import records.
@@ -12,13 +18,22 @@ def get_monthly_trends(data):
     Returns:
         fig (plotly.graph_objs.Figure): A Plotly figure object.
     """
-    # Grouping data by Month and Year to get total imports per month
-    monthly_data = data.groupby(['Year', 'Month'])['Quantity'].sum().reset_index()
+    import plotly.express as px
+
+    # Grouping data by the integer period key to get total imports per month
+    periods = period_codes(data)
+    monthly_data = (
+        pd.DataFrame({'Period': periods, 'Quantity': data['Quantity'].to_numpy()})[periods >= 0]
+        .groupby('Period')['Quantity'].sum().reset_index()
+    )
+    monthly_data['Year'] = (monthly_data['Period'] // 100).astype(str)
+    monthly_data['Month'] = [month_label(p % 100) for p in monthly_data['Period']]
     
     # Create the line chart
     fig = px.line(monthly_data, x='Month', y='Quantity', color='Year', 
                   title="Monthly Trends of Imports", 
                   labels={'Quantity': 'Total Quantity (Kgs)', 'Month': 'Month'},
+                  category_orders={'Month': MONTH_NAMES},
                   markers=True)
     
     # Update layout for better visualization
@@ -27,6 +42,8 @@ def get_monthly_trends(data):
     return fig
 
 
+@profiled(kind="submodule")
+@memoize_figure
 def get_yearly_trends(data):
     """
     Generate a bar chart for yearly trends of imports.
@@ -38,8 +55,10 @@ def get_yearly_trends(data):
     Returns:
         fig (plotly.graph_objs.Figure): A Plotly figure object.
     """
+    import plotly.express as px
+
     # Grouping data by Year to get total imports per year
-    yearly_data = data.groupby('Year')['Quantity'].sum().reset_index()
+    yearly_data = data.groupby('Year', observed=True)['Quantity'].sum().reset_index()
     
     # Create the bar chart
     fig = px.bar(yearly_data, x='Year', y='Quantity', 
@@ -52,28 +71,42 @@ def get_yearly_trends(data):
     return fig
 
 
-def get_comparative_trends(data, comparison_column="Year"):
+@profiled(kind="submodule")
+@memoize_figure
+def get_comparative_trends(data, comparison_column="Year", max_series=TOP_K):
     """
     Generate a comparative line chart based on the provided comparison column.
     Can compare trends by Year, Month, or any other categorical column.
+    High-cardinality columns keep the `max_series` largest series and fold the rest into "Others".
     
     Args:
         data (pd.DataFrame): The data containing import records.
         comparison_column (str): The column used for comparison (default: 'Year').
+        max_series (int): Maximum number of named series.
     
     Returns:
         fig (plotly.graph_objs.Figure): A Plotly figure object.
     """
+    import plotly.express as px
+
     if comparison_column not in data.columns:
         raise ValueError(f"Column '{comparison_column}' not found in data.")
     
+    # Cap the number of series before grouping
+    quantities = np.nan_to_num(data['Quantity'].to_numpy(dtype=float))
+    series = cap_categories(data[comparison_column], quantities, k=max_series)
+    capped_data = pd.DataFrame({comparison_column: series, 'Month': data['Month'], 'Quantity': data['Quantity']})
+
     # Grouping data by the comparison column and summing the imports
-    comparative_data = data.groupby([comparison_column, 'Month'])['Quantity'].sum().reset_index()
+    comparative_data = capped_data.groupby([comparison_column, 'Month'], observed=True)['Quantity'].sum().reset_index()
+    if comparison_column != 'Month':
+        comparative_data['Month'] = comparative_data['Month'].map(month_label)
 
     # Create the comparative line chart
     fig = px.line(comparative_data, x='Month', y='Quantity', color=comparison_column, 
                   title=f"Comparative Trends by {comparison_column}",
                   labels={'Quantity': 'Total Quantity (Kgs)', 'Month': 'Month'},
+                  category_orders={'Month': MONTH_NAMES},
                   markers=True)
     
     # Update layout for better visualization
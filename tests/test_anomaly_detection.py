@@ -0,0 +1,65 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules import anomaly_detection, memo_cache
+from submodules.anomaly_detection import anomaly_model_key, detect_anomalies, evict_anomaly_models
+from submodules.incremental import append_rows, carry_forward
+from submodules.memo_cache import MemoCache
+from submodules.olap_cube import get_cube
+
+@pytest.fixture(autouse=True)
+def model_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(memo_cache, "MEMO_CACHE", MemoCache())
+    monkeypatch.setattr(anomaly_detection, "ANOMALY_MODEL_DIR", str(tmp_path))
+    return tmp_path
+
+def records(first_period, months, seed=0):
+    rng = np.random.default_rng(seed)
+    index = np.arange(first_period, first_period + months)
+    rows = []
+    for importer in range(20):
+        quantity = 1000 + 100 * np.sin(index * np.pi / 6) + rng.normal(0, 10, months)
+        rows.append(pd.DataFrame({
+            'Quantity': quantity,
+            'Year': 2020 + index // 12,
+            'Month': index % 12 + 1,
+            'State': "Goa",
+            'Consignee Name': f"Importer {importer}",
+            'Exporter Name': "Exporter",
+        }))
+    data = pd.concat(rows, ignore_index=True)
+    data['Period'] = data['Year'] * 100 + data['Month']
+    return data
+
+def detect(cube):
+    return detect_anomalies(cube, 'Consignee Name', model_key=anomaly_model_key(cube, 'Consignee Name'))
+
+def test_appended_months_are_scored_incrementally(caplog):
+    base = records(0, 36)
+    base.loc[(base['Consignee Name'] == "Importer 3") & (base['Period'] == 202206), 'Quantity'] *= 5
+    before = detect(get_cube(base))
+    assert len(os.listdir(anomaly_detection.ANOMALY_MODEL_DIR)) == 1
+    assert ("Importer 3", 202206) in set(zip(before['Consignee Name'], before['Period']))
+
+    combined, _, _ = append_rows(base, records(36, 2, seed=1))
+    assert carry_forward(base, combined)["anomaly_models"] == 1
+    with caplog.at_level(logging.INFO):
+        anomalies = detect(get_cube(combined))
+    assert "scored 2 new months incrementally" in caplog.text
+
+    # Months already scored keep their persisted scores
+    known = anomalies[anomalies['Period'] < 202301].reset_index(drop=True)
+    pd.testing.assert_frame_equal(known, before, check_categorical=False)
+
+def test_model_directory_is_bounded(model_dir):
+    for months in (24, 30, 36):
+        detect(get_cube(records(0, months)))
+    sizes = sorted(os.path.getsize(path) for path in model_dir.iterdir())
+    assert len(sizes) == 3
+
+    evicted = evict_anomaly_models(max_bytes=sizes[-1])
+    assert len(evicted) >= 2 and len(os.listdir(model_dir)) == 3 - len(evicted)
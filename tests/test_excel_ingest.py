@@ -0,0 +1,63 @@
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from submodules import excel_ingest, stage_executor
+from submodules.excel_ingest import read_excel_columns
+
+COLUMNS = ['Date', 'Importer', 'Quantity', 'State']
+REQUIRED = ['Date', 'Importer', 'Quantity']
+
+def workbook_bytes():
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.title = "Jan"
+    first.append(['Date', 'Importer', 'Quantity', 'Unused', 'State'])
+    for day in range(1, 31):
+        first.append([datetime(2024, 1, day), f"Importer {day % 4}", f"{day * 10} KGS", "x" * day, "Goa"])
+
+    second = workbook.create_sheet("Feb")
+    second.append([])  # Header row found below a blank row
+    second.append(['Quantity', 'Importer', 'Date'])
+    for day in range(1, 29):
+        # Mixed cell types in one column come back as strings
+        second.append([day if day % 2 else f"{day} MT", f"Importer {day % 3}", datetime(2024, 2, day)])
+    second.append([None, None, None])
+
+    summary = workbook.create_sheet("Summary")
+    summary.append(['Importer', 'Total'])
+    summary.append(['Importer 1', 100])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def test_parallel_and_serial_reads_are_equal(monkeypatch):
+    serial = read_excel_columns(workbook_bytes(), COLUMNS, REQUIRED, parallel=False)
+
+    submitted = []
+    def submit(func, *args):
+        submitted.append(args[1])
+        return stage_executor.submit_to_process_pool(func, *args)
+    monkeypatch.setattr(excel_ingest, "PROCESS_POOL_WORKERS", 2)
+    monkeypatch.setattr(excel_ingest, "submit_to_process_pool", submit)
+    parallel = read_excel_columns(workbook_bytes(), COLUMNS, REQUIRED, parallel=True)
+
+    assert submitted == ["Jan", "Feb", "Summary"]
+    pd.testing.assert_frame_equal(parallel, serial)
+
+def test_sheets_are_concatenated_on_the_requested_columns():
+    data = read_excel_columns(workbook_bytes(), COLUMNS, REQUIRED, parallel=False)
+    assert len(data) == 30 + 28  # The summary sheet and blank rows are skipped
+    assert set(data.columns) == set(COLUMNS)
+    assert data['State'].isna().sum() == 28
+    assert data.loc[30:, 'Quantity'].tolist()[:2] == ["1", "2 MT"]
+
+def test_workbook_without_required_columns_is_rejected():
+    with pytest.raises(ValueError):
+        read_excel_columns(workbook_bytes(), ['Exporter'], ['Exporter'], parallel=False)
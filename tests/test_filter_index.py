@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules.filter_index import FILTER_DIMENSIONS, get_filtered_data
+
+def sample_data(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.choice(["Goa", "Kerala", "Gujarat", None], rows, p=[0.4, 0.3, 0.2, 0.1])
+    return pd.DataFrame({
+        'Quantity': rng.uniform(1, 1000, rows),
+        'State': pd.Categorical(states, categories=["Gujarat", "Goa", "Kerala", "Punjab"]),
+        'Month': rng.integers(1, 13, rows),
+        'Year': rng.integers(2021, 2025, rows),
+        'Consignee Name': [f"Importer {i}" for i in rng.integers(0, 40, rows)],
+        'Exporter Name': pd.Categorical([f"Exporter {i}" for i in rng.integers(0, 10, rows)]),
+    })
+
+def full_scan(data, **filters):
+    mask = np.ones(len(data), dtype=bool)
+    for name, value in filters.items():
+        values = value if isinstance(value, list) else [value]
+        mask &= data[FILTER_DIMENSIONS[name]].isin(values).to_numpy()
+    return data[mask]
+
+@pytest.mark.parametrize("filters", [
+    {"state": "Goa"},
+    {"state": ["Kerala", "Gujarat"], "year": 2023},
+    {"month": [1, 2, 3], "importer": "Importer 7", "exporter": ["Exporter 1", "Exporter 2"]},
+    {"year": [2024, 2021], "month": 12, "state": "Goa", "exporter": "Exporter 3"},
+    {"state": "Punjab"},  # A category with no rows
+    {"importer": "Nobody"},  # A value not in the data
+])
+def test_indexed_filter_equals_full_scan(filters):
+    data = sample_data()
+    pd.testing.assert_frame_equal(get_filtered_data(data, **filters), full_scan(data, **filters))
+
+def test_all_and_none_leave_the_data_unfiltered():
+    data = sample_data()
+    assert get_filtered_data(data, state="All", month=None, year=["All"]) is data
+    assert len(get_filtered_data(data, state=["Goa", "All"])) == len(data)
+
+def test_unknown_filter_column_is_rejected():
+    data = sample_data().drop(columns='Exporter Name')
+    with pytest.raises(ValueError):
+        get_filtered_data(data, exporter="Exporter 1")
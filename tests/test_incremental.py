@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules import memo_cache
+from submodules.filter_index import get_filter_index, get_filtered_data
+from submodules.growth_metrics import build_growth_panel
+from submodules.incremental import append_rows, carry_forward
+from submodules.memo_cache import MemoCache
+from submodules.olap_cube import CUBE_DIMENSIONS, build_cube, get_cube
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(memo_cache, "MEMO_CACHE", MemoCache())
+
+def records(first_period, months, rows=2000, seed=0, importers=20):
+    rng = np.random.default_rng(seed)
+    index = first_period + rng.integers(0, months, rows)
+    data = pd.DataFrame({
+        'Quantity': rng.integers(1, 500, rows).astype(np.float32),
+        'Year': (2022 + index // 12).astype(np.int16),
+        'Month': (index % 12 + 1).astype(np.int8),
+        'State': pd.Categorical(rng.choice(["Goa", "Kerala"], rows)),
+        'Consignee Name': pd.Categorical([f"Importer {i}" for i in rng.integers(0, importers, rows)]),
+        'Exporter Name': pd.Categorical([f"Exporter {i}" for i in rng.integers(0, 5, rows)]),
+    })
+    data['Period'] = (data['Year'].astype(np.int32) * 100 + data['Month']).astype(np.int32)
+    return data
+
+def sorted_cells(cube):
+    cells = cube.astype({column: str for column in CUBE_DIMENSIONS})
+    return cells.sort_values(CUBE_DIMENSIONS).reset_index(drop=True)
+
+def test_rows_already_loaded_are_skipped():
+    base = records(0, 12)
+    last_month = base[base['Period'] == 202212]
+    fresh = records(12, 1, rows=50, seed=1)
+    # Two copies of one base row: the copy already in base is skipped, the second one is new
+    delta = pd.concat([last_month.iloc[:10], last_month.iloc[[0]], fresh], ignore_index=True)
+
+    combined, appended, report = append_rows(base, delta)
+    assert report["rows_received"] == 61
+    assert report["duplicates"] == 10
+    assert report["rows_appended"] == len(appended) == 51
+    assert report["periods"] == [202212, 202301]
+    assert len(combined) == len(base) + 51
+    pd.testing.assert_frame_equal(combined.iloc[:len(base)], base, check_categorical=False)
+
+    # Appending the same delta again adds nothing
+    again, _, report = append_rows(combined, delta)
+    assert again is combined and report["rows_appended"] == 0
+
+def test_carried_structures_equal_a_full_rebuild():
+    base = records(0, 24)
+    get_filter_index(base)
+    get_cube(base)
+    build_growth_panel(base, 'Consignee Name')
+
+    # New importers widen the categories, so every carried structure has to be relabelled
+    combined, _, _ = append_rows(base, records(23, 2, rows=300, seed=2, importers=25))
+    carried = carry_forward(base, combined)
+    assert set(carried) >= {"filter_index", "olap_cube", "memoized"}
+    rebuilt = combined.copy()
+
+    for filters in [{"importer": "Importer 22"}, {"state": "Goa", "year": 2023, "month": [12]},
+                    {"exporter": ["Exporter 1", "Exporter 4"], "month": 1}]:
+        pd.testing.assert_frame_equal(get_filtered_data(combined, **filters).reset_index(drop=True),
+                                      get_filtered_data(rebuilt, **filters).reset_index(drop=True))
+    pd.testing.assert_frame_equal(sorted_cells(get_cube(combined)), sorted_cells(build_cube(rebuilt)),
+                                  check_dtype=False)
+
+    growth = build_growth_panel(combined, 'Consignee Name')
+    assert memo_cache.MEMO_CACHE.stats()["hits"] == 1  # Served from the carried entry
+    expected = build_growth_panel.uncached(rebuilt, 'Consignee Name')
+    assert list(growth.entities) == list(expected.entities)
+    np.testing.assert_allclose(growth.values, expected.values)
+    np.testing.assert_allclose(growth.rolling_growth, expected.rolling_growth)
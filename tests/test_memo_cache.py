@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules import memo_cache
+from submodules.dataset_registry import dataset_fingerprint
+from submodules.memo_cache import MemoCache, memoize, memo_stats
+from submodules.panel import Panel
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = MemoCache(max_bytes=1024 ** 2)
+    monkeypatch.setattr(memo_cache, "MEMO_CACHE", cache)
+    return cache
+
+def sample_data():
+    return pd.DataFrame({
+        'State': pd.Categorical(["Goa", "Kerala", "Goa"]),
+        'Quantity': [10.0, 20.0, 30.0],
+        'Year': [2023, 2023, 2024],
+    })
+
+def test_counts_hits_misses_and_evictions():
+    cache = MemoCache(max_bytes=150)
+    cache.put("a", np.zeros(8))
+    cache.put("b", np.zeros(8))
+    assert cache.get("a")[0]
+    assert cache.get("missing") == (False, None)
+    cache.put("c", np.zeros(8))  # 192 bytes over a 150 byte budget: evicts b, the least recently used
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert [key for key, _ in cache.items()] == ["a", "c"]
+    assert stats["bytes"] <= stats["max_bytes"]
+
+def test_values_larger_than_budget_are_not_stored():
+    cache = MemoCache(max_bytes=10)
+    cache.put("big", np.zeros(100))
+    assert cache.stats()["entries"] == 0
+
+def test_memoize_keys_on_content_and_parameters():
+    calls = []
+
+    @memoize
+    def totals(data, column, scale=1):
+        calls.append(column)
+        return data.groupby(column, observed=True)['Quantity'].sum() * scale
+
+    first = totals(sample_data(), 'State')
+    second = totals(sample_data(), 'State')  # A different object with the same content
+    totals(sample_data(), 'State', scale=2)
+    totals(sample_data(), 'Year')
+    assert calls == ['State', 'State', 'Year']
+    assert first.equals(second)
+    assert memo_stats()["hits"] == 1
+
+def test_cached_frames_are_isolated_from_callers():
+    @memoize
+    def summary(data):
+        return data.groupby('State', observed=True)['Quantity'].agg(['sum', 'count'])
+
+    data = sample_data()
+    result = summary(data)
+    expected = result.copy()
+
+    with pytest.raises(ValueError):
+        result.loc['Goa', 'sum'] = 0
+    with pytest.raises(ValueError):
+        result['sum'] *= 2
+    result['share'] = result['sum'] / result['sum'].sum()
+    result.drop(columns='count', inplace=True)
+
+    again = summary(data)
+    assert again is not result
+    pd.testing.assert_frame_equal(again, expected)
+
+def test_cached_arrays_are_read_only():
+    @memoize
+    def panel(data):
+        return Panel(pd.Index(["Goa"]), np.array([202401]), np.ones((1, 1)))
+
+    result = panel(sample_data())
+    with pytest.raises(ValueError):
+        result.values[0, 0] = 5
+    assert panel(sample_data()).values[0, 0] == 1
+
+def test_fingerprint_follows_structural_changes():
+    data = sample_data()
+    before = dataset_fingerprint(data)
+    data['Month'] = 1
+    assert dataset_fingerprint(data) != before
+    assert dataset_fingerprint(data) == dataset_fingerprint(data.copy())
+
+@pytest.mark.xfail(strict=True, reason="In-place value edits keep the layout, so the fingerprint "
+                                        "and everything cached under it go stale; copy before editing")
+def test_fingerprint_follows_value_changes():
+    data = sample_data()
+    before = dataset_fingerprint(data)
+    data['Quantity'] = data['Quantity'] * 2
+    assert dataset_fingerprint(data) != before
+
+def test_uncached_function_is_exposed():
+    @memoize
+    def rows(data):
+        return len(data)
+
+    assert rows.uncached(sample_data()) == 3
+    assert memo_stats()["misses"] == 0
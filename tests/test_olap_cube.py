@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules.filter_index import get_filtered_data
+from submodules.olap_cube import build_cube, get_cube, get_filtered_cube, rollup, shipment_count
+
+def sample_data(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Quantity': rng.integers(1, 1000, rows).astype(float),
+        'State': pd.Categorical(rng.choice(["Goa", "Kerala", "Gujarat"], rows)),
+        'Month': rng.integers(1, 13, rows),
+        'Year': rng.integers(2022, 2025, rows),
+        'Consignee Name': pd.Categorical([f"Importer {i}" for i in rng.integers(0, 30, rows)]),
+        'Exporter Name': pd.Categorical([f"Exporter {i}" for i in rng.integers(0, 8, rows)]),
+    })
+
+def raw_rollup(rows, by):
+    return (
+        rows.groupby(by, observed=True)
+        .agg(Quantity=('Quantity', 'sum'), Shipments=('Quantity', 'size'))
+        .reset_index()
+    )
+
+@pytest.mark.parametrize("filters, by", [
+    ({}, ['State']),
+    ({"year": 2023}, ['Year', 'Month']),
+    ({"state": ["Goa", "Kerala"], "month": [6, 7]}, ['Consignee Name']),
+    ({"exporter": "Exporter 2"}, ['State', 'Exporter Name']),
+])
+def test_filtered_rollup_equals_groupby_over_raw_rows(filters, by):
+    data = sample_data()
+    cube = get_filtered_cube(data, **filters)
+    rows = get_filtered_data(data, **filters)
+
+    pd.testing.assert_frame_equal(rollup(cube, by), raw_rollup(rows, by), check_dtype=False)
+    assert shipment_count(cube) == shipment_count(rows) == len(rows)
+
+def test_cube_is_built_once_per_dataset():
+    data = sample_data()
+    cube = get_cube(data)
+    assert get_cube(data) is cube
+    assert len(cube) < len(data)
+    pd.testing.assert_frame_equal(cube, build_cube(data))
+    assert (cube['Period'] == cube['Year'] * 100 + cube['Month']).all()
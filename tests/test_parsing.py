@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import parse_dates, parse_quantity
+
+@pytest.mark.parametrize("text, kilograms", [
+    ("1,200 KGS", 1200.0),
+    ("12.5 MT", 12500.0),
+    ("1,200,000 g", 1200.0),
+    ("-1,234.5 KG", -1234.5),
+    ("250", 250.0),
+])
+def test_quantities_are_converted_to_kilograms(text, kilograms):
+    quantities, failed = parse_quantity(pd.Series([text]))
+    assert quantities[0] == pytest.approx(kilograms)
+    assert failed == 0
+
+@pytest.mark.parametrize("text", ["12,5 MT", "1.200,5 KG", "1,2000 KG", "12 BARRELS"])
+def test_ambiguous_quantities_are_counted_as_failures(text):
+    quantities, failed = parse_quantity(pd.Series([text, "10 KG", None]))
+    assert np.isnan(quantities[0]) and quantities[1] == 10.0 and np.isnan(quantities[2])
+    assert failed == 1
+
+def test_dates_in_several_formats_are_parsed_per_layout():
+    values = pd.Series(["2024-02-05", "05/02/2024", "25/02/2024", "2024-03-01", None, "not a date"])
+    dates, failed = parse_dates(values)
+    expected = pd.to_datetime(["2024-02-05", "2024-02-05", "2024-02-25", "2024-03-01", None, None])
+    assert dates.tolist() == pd.Series(expected).tolist()
+    assert failed == 1
+
+def test_repeated_dates_are_parsed_once_and_broadcast():
+    values = pd.Series(["01/31/2024", "01/31/2024", "02/29/2024"] * 1000)
+    dates, failed = parse_dates(values)
+    assert failed == 0
+    assert dates.iloc[:3].tolist() == [pd.Timestamp("2024-01-31"), pd.Timestamp("2024-01-31"), pd.Timestamp("2024-02-29")]
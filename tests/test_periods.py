@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from submodules.periods import index_to_period, month_numbers, period_codes, period_to_index
+
+def test_month_names_abbreviations_and_numbers():
+    values = pd.Series(["January", "feb", "MAR.", "Sept", "sept.", "Sep", "10", "11.0", "13", "Smarch", None])
+    expected = [1, 2, 3, 9, 9, 9, 10, 11, np.nan, np.nan, np.nan]
+    np.testing.assert_array_equal(month_numbers(values), expected)
+
+def test_categorical_months_map_each_category_once():
+    values = pd.Series(pd.Categorical(["Sept", "Oct", "Sept", None]))
+    np.testing.assert_array_equal(month_numbers(values), [9, 10, 9, np.nan])
+
+def test_period_codes_and_month_indexes_round_trip():
+    data = pd.DataFrame({'Year': [2023, 2024, None], 'Month': ["Dec", "Jan", "Feb"]})
+    periods = period_codes(data)
+    np.testing.assert_array_equal(periods, [202312, 202401, -1])
+    assert period_to_index(periods[1]) - period_to_index(periods[0]) == 1
+    np.testing.assert_array_equal(index_to_period(period_to_index(periods[:2])), periods[:2])
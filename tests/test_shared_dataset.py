@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from submodules import shared_dataset
+from submodules.dataset_registry import dataset_fingerprint
+from submodules.shared_dataset import copied_columns, evict_shared_datasets, get_shared_dataset, publish_dataset
+
+@pytest.fixture(autouse=True)
+def fresh_shared(monkeypatch):
+    monkeypatch.setattr(shared_dataset, "_SHARED", type(shared_dataset._SHARED)())
+
+def sample_data():
+    return pd.DataFrame({
+        # NaN is what a failed quantity parse leaves behind
+        'Quantity': np.array([10.5, np.nan, 30.0], dtype=np.float32),
+        'Year': np.array([2023, 2023, 2024], dtype=np.int16),
+        'Month': np.array([1, 2, 1], dtype=np.int8),
+        'Period': np.array([202301, 202302, 202401], dtype=np.int32),
+        'State': pd.Categorical(["Goa", "Kerala", "Goa"]),
+    })
+
+def test_numeric_columns_are_mapped_read_only(tmp_path):
+    data = sample_data()
+    shared = publish_dataset("abc", data, shared_dir=str(tmp_path))
+
+    assert copied_columns(shared) == []
+    for column in ['Quantity', 'Year', 'Month', 'Period']:
+        assert shared[column].to_numpy().flags.writeable is False
+    with pytest.raises(ValueError):
+        shared.loc[0, 'Quantity'] = 1.0
+    pd.testing.assert_frame_equal(shared, data)
+
+def test_published_dataset_is_shared_and_keyed_by_content(tmp_path):
+    shared = publish_dataset("abc", sample_data(), shared_dir=str(tmp_path))
+    assert get_shared_dataset("abc", shared_dir=str(tmp_path)) is shared
+    assert dataset_fingerprint(shared) == "abc"
+    assert get_shared_dataset("missing", shared_dir=str(tmp_path)) is None
+
+def test_eviction_keeps_mapped_datasets(tmp_path):
+    publish_dataset("kept", sample_data(), shared_dir=str(tmp_path))
+    publish_dataset("old", sample_data(), shared_dir=str(tmp_path))
+    shared_dataset.release_dataset("old")
+
+    evicted = evict_shared_datasets(str(tmp_path), max_bytes=0)
+    assert evicted == [os.path.basename(shared_dataset._shared_path("old", str(tmp_path)))]
+    assert get_shared_dataset("kept", shared_dir=str(tmp_path)) is not None
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from submodules import memo_cache, smart_alerts
+from submodules.growth_metrics import build_growth_panel
+from submodules.memo_cache import MemoCache
+from submodules.smart_alerts import get_smart_alerts
+
+ROLLING_CONFIG = {
+    "entity_columns": ["Consignee Name"],
+    "rules": [
+        {"name": "Rolling surge", "feature": "rolling_growth", "operator": ">", "threshold": 50},
+        {"name": "Rolling slump", "feature": "rolling_growth", "operator": "<", "threshold": -50},
+    ],
+}
+DROP_CONFIG = {
+    "entity_columns": ["Consignee Name"],
+    "rules": [{"name": "Sudden monthly drop", "feature": "mom_change", "operator": "<", "threshold": -100}],
+}
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(memo_cache, "MEMO_CACHE", MemoCache())
+    monkeypatch.setattr(smart_alerts, "_PERIOD_CACHE", MemoCache())
+
+def monthly_data(quantities, entity="Acme"):
+    periods = np.arange(len(quantities))
+    return pd.DataFrame({
+        'Consignee Name': pd.Categorical([entity] * len(quantities)),
+        'Year': 2022 + periods // 12,
+        'Month': periods % 12 + 1,
+        'Quantity': np.asarray(quantities, dtype=float),
+    })
+
+def alert_values(alerts, period):
+    return alerts.loc[alerts['Period'] == period, 'Value'].tolist()
+
+def test_rolling_growth_alert_follows_earlier_months():
+    quantities = np.full(24, 100.0)
+    assert get_smart_alerts(monthly_data(quantities), ROLLING_CONFIG).empty
+
+    # Month t-3 (Sep 2023) is only read by the previous rolling window of t (Dec 2023),
+    # not by the month, month-before or year-before inputs
+    quantities[20] = 1000.0
+    edited = monthly_data(quantities)
+    alerts = get_smart_alerts(edited, ROLLING_CONFIG)
+
+    expected = build_growth_panel.uncached(edited, 'Consignee Name').rolling_growth[0]
+    assert expected[22] == pytest.approx(300.0) and expected[23] == pytest.approx(-75.0)
+    assert alert_values(alerts, 202311) == [pytest.approx(300.0)]
+    assert alert_values(alerts, 202312) == [pytest.approx(-75.0)]
+
+def test_unchanged_periods_are_served_from_the_period_cache():
+    quantities = np.r_[np.full(12, 500.0), np.full(12, 50.0)]
+    first = get_smart_alerts(monthly_data(quantities), DROP_CONFIG)
+    misses = smart_alerts._PERIOD_CACHE.stats()["misses"]
+
+    # Appending a month only evaluates the new period
+    extended = get_smart_alerts(monthly_data(np.r_[quantities, 400.0]), DROP_CONFIG)
+    stats = smart_alerts._PERIOD_CACHE.stats()
+    assert stats["misses"] - misses == 1
+    assert stats["hits"] == 24
+    pd.testing.assert_frame_equal(extended, first)
+    assert alert_values(first, 202301) == [-450.0]
+
+def test_months_outside_the_selection_are_not_read_as_zero():
+    quantities = np.full(24, 500.0)
+    data = monthly_data(quantities)
+    january = data[data['Month'] == 1].reset_index(drop=True)
+
+    assert get_smart_alerts(january, DROP_CONFIG, months=[1]).empty
+    # Without the selection the filtered-out months look like drops to zero
+    assert not get_smart_alerts(january, DROP_CONFIG).empty
+
+def test_year_over_year_reads_need_the_previous_year_selected():
+    config = {**DROP_CONFIG, "rules": [
+        {"name": "Declining imports", "feature": "yoy_growth", "operator": "<", "threshold": -20},
+    ]}
+    quantities = np.r_[np.full(12, 500.0), np.full(12, 100.0), np.full(12, 100.0)]
+    data = monthly_data(quantities)
+
+    assert len(get_smart_alerts(data, config, months=[1], years=[2023])) == 0
+    assert alert_values(get_smart_alerts(data, config, months=[1], years=[2022, 2023]), 202301) == [-80.0]
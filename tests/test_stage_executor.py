@@ -0,0 +1,46 @@
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from submodules import stage_executor
+from submodules.stage_executor import run_stages, submit_to_process_pool
+
+def test_timed_out_stage_is_joined_by_the_next_run():
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = run_stages({"slow": (slow, (21,), "slow-21")}, timeout=0.05)
+    assert first["slow"].timed_out
+
+    # The rerun waits on the stage still running in the background instead of starting it again
+    threading.Timer(0.05, release.set).start()
+    second = run_stages({"slow": (slow, (21,), "slow-21")}, timeout=5)
+    assert second["slow"].value == 42 and not second["slow"].timed_out
+    assert calls == [21]
+    assert stage_executor._IN_FLIGHT == {}
+
+def test_unkeyed_stages_always_run():
+    calls = []
+    for _ in range(2):
+        results = run_stages({"count": (calls.append, (1,))})
+        assert results["count"].error is None
+    assert calls == [1, 1]
+
+def test_broken_process_pool_is_replaced_on_submit(monkeypatch):
+    monkeypatch.setattr(stage_executor, "_PROCESS_POOL", None)
+    broken = stage_executor.get_process_pool()
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result()
+
+    try:
+        assert submit_to_process_pool(abs, -3).result(timeout=60) == 3
+        assert stage_executor.get_process_pool() is not broken
+    finally:
+        stage_executor.get_process_pool().shutdown()